@@ -0,0 +1,239 @@
+"""
+导出调度器
+
+- 有界工作线程池：同时执行的压缩上传数量固定，突发导出请求在队列中排队
+- 按租户公平调度：每个租户一个队列，工作线程轮流从各租户取任务，
+  单个租户的大量导出不会饿死其他租户
+- 每个租户排队中的导出任务数量有上限，超出时拒绝提交（ExportQueueFullError）
+- 导出任务状态：queued -> compressing -> uploading -> done / failed，记录进度字节数
+"""
+import os
+import time
+import uuid
+import threading
+import logging
+from collections import deque
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+# 导出工作线程数
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+# 已结束的导出任务保留时间（秒），过期后不可查询
+EXPORT_JOB_TTL = int(os.getenv('EXPORT_JOB_TTL', '3600'))
+# 每个租户排队中（未开始执行）的导出任务数量上限，0 表示不限制
+EXPORT_QUEUE_SIZE = int(os.getenv('EXPORT_QUEUE_SIZE', '20'))
+
+# 导出模式：full=完整压缩包，delta=资源按内容哈希单独上传（已存在则跳过），压缩包只含 JSON 和资源清单
+EXPORT_MODE_FULL = 'full'
+EXPORT_MODE_DELTA = 'delta'
+EXPORT_MODES = [EXPORT_MODE_FULL, EXPORT_MODE_DELTA]
+
+EXPORT_QUEUED = 'queued'
+EXPORT_COMPRESSING = 'compressing'
+EXPORT_UPLOADING = 'uploading'
+EXPORT_DONE = 'done'
+EXPORT_FAILED = 'failed'
+
+
+class ExportQueueFullError(Exception):
+    """租户排队中的导出任务已达上限（EXPORT_QUEUE_SIZE）"""
+
+
+class ExportJob:
+    """导出任务"""
+
+    def __init__(
+        self,
+        task_id: str,
+        remote_url: str,
+        tenant: str,
+        run: Callable[['ExportJob'], None],
+        mode: str = EXPORT_MODE_FULL
+    ):
+        self.job_id = str(uuid.uuid4())
+        self.task_id = task_id
+        self.remote_url = remote_url
+        self.tenant = tenant
+        self.mode = mode
+        self.run = run
+        self.state = EXPORT_QUEUED
+        self.bytes_total = 0  # 待打包文件总字节数
+        self.bytes_done = 0  # 已写入压缩包的字节数
+        self.error: str | None = None
+        self.stats: dict = {}  # 吞吐量、CPU 耗时等统计
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (EXPORT_DONE, EXPORT_FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'task_id': self.task_id,
+            'url': self.remote_url,
+            'tenant': self.tenant,
+            'mode': self.mode,
+            'state': self.state,
+            'bytes_total': self.bytes_total,
+            'bytes_done': self.bytes_done,
+            'error': self.error,
+            'stats': self.stats,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class ExportManager:
+    """导出调度器 - 线程安全"""
+
+    def __init__(self, workers: int = EXPORT_WORKERS):
+        self.workers = workers
+        self._condition = threading.Condition()
+        # 租户 -> 排队中的导出任务；_tenants 为有排队任务的租户轮转顺序
+        self._queues: dict[str, deque[ExportJob]] = {}
+        self._tenants: deque[str] = deque()
+        # job_id -> 导出任务（含已结束的任务，保留 EXPORT_JOB_TTL 秒）；_finished 为已结束的任务，按结束顺序
+        self._jobs: dict[str, ExportJob] = {}
+        self._finished: deque[ExportJob] = deque()
+        self._threads: list[threading.Thread] = []
+        self._stop_event = threading.Event()  # 当前这批工作线程的停止信号（服务关闭时设置）
+
+    def submit(
+        self,
+        task_id: str,
+        remote_url: str,
+        run: Callable[[ExportJob], None],
+        tenant: str | None = None,
+        mode: str = EXPORT_MODE_FULL
+    ) -> ExportJob:
+        """
+        提交导出任务（立即返回）
+
+        Args:
+            task_id: 任务ID
+            remote_url: OSS 目标 URL
+            run: 执行函数 run(job)，负责更新状态和进度，异常视为失败
+            tenant: 租户标识，默认按任务ID
+            mode: 导出模式（仅记录）
+
+        Raises:
+            ExportQueueFullError: 租户排队中的导出任务已达上限
+        """
+        job = ExportJob(task_id, remote_url, tenant or task_id, run, mode)
+        with self._condition:
+            self._check_queue(job.tenant)
+            self._start_workers()
+            self._remove_expired_jobs()
+            self._jobs[job.job_id] = job
+            queue = self._queues.get(job.tenant)
+            if queue is None:
+                queue = self._queues[job.tenant] = deque()
+                self._tenants.append(job.tenant)
+            queue.append(job)
+            self._condition.notify()
+        logger.info(f"导出任务已排队: job={job.job_id}, task={task_id}, tenant={job.tenant}")
+        return job
+
+    def check_queue(self, tenant: str):
+        """
+        检查租户是否还能提交导出任务（创建导出快照前调用，队列已满时不做无用的快照）
+
+        Raises:
+            ExportQueueFullError: 租户排队中的导出任务已达上限
+        """
+        with self._condition:
+            self._check_queue(tenant)
+
+    def get_job(self, job_id: str) -> ExportJob | None:
+        """查询导出任务"""
+        with self._condition:
+            self._remove_expired_jobs()
+            return self._jobs.get(job_id)
+
+    def shutdown(self):
+        """服务关闭：丢弃未开始的导出任务（记录为失败，遗留的快照在下次启动时清理），工作线程执行完当前任务后退出"""
+        with self._condition:
+            self._stop_event.set()
+            self._stop_event = threading.Event()
+            self._threads = []
+            now = time.time()
+            for queue in self._queues.values():
+                for job in queue:
+                    job.error = '服务关闭，导出任务未执行'
+                    job.finished_at = now
+                    job.state = EXPORT_FAILED
+                    self._finished.append(job)
+            self._queues.clear()
+            self._tenants.clear()
+            self._condition.notify_all()
+
+    # ==================== 内部方法 ====================
+
+    def _check_queue(self, tenant: str):
+        """检查租户排队中的导出任务数量（调用时必须持有锁）"""
+        queue = self._queues.get(tenant)
+        if EXPORT_QUEUE_SIZE > 0 and queue is not None and len(queue) >= EXPORT_QUEUE_SIZE:
+            raise ExportQueueFullError(f"排队中的导出任务已达上限: tenant={tenant}, limit={EXPORT_QUEUE_SIZE}")
+
+    def _start_workers(self):
+        """启动工作线程（懒加载，调用时必须持有锁）"""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop, args=(self._stop_event,), daemon=True, name=f"export-{i}"
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self, stop_event: threading.Event) -> ExportJob | None:
+        """按租户轮转取出下一个导出任务（阻塞），服务关闭后返回 None"""
+        with self._condition:
+            while not self._tenants and not stop_event.is_set():
+                self._condition.wait()
+            if stop_event.is_set():
+                return None
+            tenant = self._tenants.popleft()
+            queue = self._queues[tenant]
+            job = queue.popleft()
+            if queue:
+                self._tenants.append(tenant)
+            else:
+                del self._queues[tenant]
+            return job
+
+    def _worker_loop(self, stop_event: threading.Event):
+        while True:
+            job = self._next_job(stop_event)
+            if job is None:
+                return
+            job.started_at = time.time()
+            job.state = EXPORT_COMPRESSING
+            try:
+                job.run(job)
+                state = EXPORT_DONE
+            except Exception as e:
+                job.error = str(e)
+                state = EXPORT_FAILED
+                logger.error(f"导出任务失败: job={job.job_id}, {e}", exc_info=True)
+            with self._condition:
+                # 先记录结束时间再更新状态，保证已结束的任务一定有结束时间
+                job.finished_at = time.time()
+                job.state = state
+                self._finished.append(job)
+
+    def _remove_expired_jobs(self):
+        """清理过期的已结束任务（调用时必须持有锁，按结束顺序从最早的开始，只检查过期的任务）"""
+        expire_time = time.time() - EXPORT_JOB_TTL
+        while self._finished and self._finished[0].finished_at < expire_time:
+            self._jobs.pop(self._finished.popleft().job_id, None)
+
+
+# 进程内全局导出调度器实例
+export_manager = ExportManager()
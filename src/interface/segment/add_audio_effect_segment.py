@@ -68,6 +68,15 @@ class AddAudioEffectSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddAudioEffectSegmentRequest) -> dict:
+    """添加音效片段（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.add_audio_effect_segment_to_track(
+        track_id=request.track_id,
+        audio_material=request.audio_material,
+        start_time=request.start_time
+    )}
+
+
 def handler(
     request: AddAudioEffectSegmentRequest, 
     task_manager: TaskManager
@@ -78,11 +87,7 @@ def handler(
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            segment_id = task.jianyingProject.protocol.add_audio_effect_segment_to_track(
-                track_id=request.track_id,
-                audio_material=request.audio_material,
-                start_time=request.start_time,
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             logger.info(f"添加音效片段成功: task={request.task_id}, track={request.track_id}, segment={segment_id}")
             
@@ -43,6 +43,17 @@ class AddComplexTextSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddComplexTextSegmentRequest) -> dict:
+    """添加复杂文本片段（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.add_complex_text_segment_to_track(
+        track_id=request.track_id,
+        complex_text_material=request.complex_text_material,
+        start_time=request.start_time,
+        duration=request.duration,
+        transform_info=request.transform
+    )}
+
+
 def handler(
     request: AddComplexTextSegmentRequest, 
     task_manager: TaskManager
@@ -53,13 +64,7 @@ def handler(
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            segment_id = task.jianyingProject.protocol.add_complex_text_segment_to_track(
-                track_id=request.track_id,
-                complex_text_material=request.complex_text_material,
-                start_time=request.start_time,
-                duration=request.duration,
-                transform_info=request.transform
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             logger.info(f"添加复杂文本片段成功: task={request.task_id}, track={request.track_id}, segment={segment_id}")
             
@@ -49,6 +49,16 @@ class AddEffectSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddEffectSegmentRequest) -> dict:
+    """添加视频特效片段（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.add_effect_segment_to_track(
+        track_id=request.track_id,
+        effect_material=request.effect_material,
+        start_time=request.start_time,
+        duration=request.duration
+    )}
+
+
 def handler(
     request: AddEffectSegmentRequest, 
     task_manager: TaskManager
@@ -59,12 +69,7 @@ def handler(
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            segment_id = task.jianyingProject.protocol.add_effect_segment_to_track(
-                track_id=request.track_id,
-                effect_material=request.effect_material,
-                start_time=request.start_time,
-                duration=request.duration
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             logger.info(f"添加视频特效片段成功: task={request.task_id}, track={request.track_id}, segment={segment_id}")
             
@@ -41,6 +41,16 @@ class AddFilterSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddFilterSegmentRequest) -> dict:
+    """添加滤镜片段（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.add_filter_segment_to_track(
+        track_id=request.track_id,
+        filter_material=request.filter_material,
+        start_time=request.start_time,
+        duration=request.duration
+    )}
+
+
 def handler(
     request: AddFilterSegmentRequest, 
     task_manager: TaskManager
@@ -51,12 +61,7 @@ def handler(
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            segment_id = task.jianyingProject.protocol.add_filter_segment_to_track(
-                track_id=request.track_id,
-                filter_material=request.filter_material,
-                start_time=request.start_time,
-                duration=request.duration
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             logger.info(f"添加滤镜片段成功: task={request.task_id}, track={request.track_id}, segment={segment_id}")
             
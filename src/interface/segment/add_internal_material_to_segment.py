@@ -37,6 +37,14 @@ class AddInternalMaterialToSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddInternalMaterialToSegmentRequest) -> dict:
+    """添加内部材质（单个接口和批量操作共用）"""
+    return {"material_id": protocol.add_internal_material_to_segment(
+        segment_id=request.segment_id,
+        internal_material=request.internal_material
+    )}
+
+
 def handler(
     request: AddInternalMaterialToSegmentRequest, 
     task_manager: TaskManager
@@ -47,10 +55,7 @@ def handler(
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            material_id = task.jianyingProject.protocol.add_internal_material_to_segment(
-                segment_id=request.segment_id,
-                internal_material=request.internal_material
-            )
+            material_id = apply(task.jianyingProject.protocol, request)["material_id"]
             
             logger.info(f"添加内部材质成功: task={request.task_id}, segment={request.segment_id}, material={material_id}")
             
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from task_manager import TaskManager
 from utils.models import *
+from utils.media_probe import resolve_media_materials
 from interface.utils import *
 import logging
 
@@ -64,22 +65,30 @@ class AddMediaSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddMediaSegmentRequest) -> dict:
+    """添加媒体片段（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.add_media_segment_to_track(
+        track_id=request.track_id,
+        media_material=request.media_material,
+        start_time=request.start_time,
+        transform_info=request.transform
+    )}
+
+
 def handler(
     request: AddMediaSegmentRequest, 
     task_manager: TaskManager
 ) -> dict:
     """添加片段处理函数"""
     try:
+        # 在任务锁外补齐媒体时长和宽高（可能需要 ffprobe 探测远程文件）
+        resolve_media_materials([request.media_material])
+        
         with task_manager.get_task(request.task_id) as task:
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            segment_id = task.jianyingProject.protocol.add_media_segment_to_track(
-                track_id=request.track_id,
-                media_material=request.media_material,
-                start_time=request.start_time,
-                transform_info=request.transform
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             logger.info(f"添加片段成功: task={request.task_id}, track={request.track_id}, segment={segment_id}")
             
@@ -43,6 +43,17 @@ class AddStickerSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddStickerSegmentRequest) -> dict:
+    """添加贴纸片段（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.add_sticker_segment_to_track(
+        track_id=request.track_id,
+        sticker_material=request.sticker_material,
+        start_time=request.start_time,
+        duration=request.duration,
+        transform_info=request.transform
+    )}
+
+
 def handler(
     request: AddStickerSegmentRequest, 
     task_manager: TaskManager
@@ -55,13 +66,7 @@ def handler(
             
             # 注意：duration 单位已经是毫秒，不需要 * 1000
             # start_time 也是毫秒
-            segment_id = task.jianyingProject.protocol.add_sticker_segment_to_track(
-                track_id=request.track_id,
-                sticker_material=request.sticker_material,
-                start_time=request.start_time,
-                duration=request.duration,
-                transform_info=request.transform
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             logger.info(f"添加贴纸片段成功: task={request.task_id}, track={request.track_id}, segment={segment_id}")
             
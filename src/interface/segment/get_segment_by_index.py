@@ -1,4 +1,5 @@
 """根据索引获取片段接口"""
+from typing import Optional
 from task_manager import TaskManager
 from interface.utils import *
 import logging
@@ -10,22 +11,29 @@ def handler(
     task_id: str, 
     track_id: str, 
     index: int, 
-    task_manager: TaskManager
-) -> dict:
-    """根据索引获取片段处理函数"""
+    task_manager: TaskManager,
+    if_none_match: Optional[str] = None
+):
+    """根据索引获取片段处理函数（If-None-Match 命中时返回 304）"""
     try:
-        with task_manager.get_task(task_id) as task:
+        with task_manager.get_task_readonly(task_id) as task:
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
             
-            segment = task.jianyingProject.protocol.get_segment_by_index(track_id, index)
+            protocol = task.jianyingProject.protocol
+            etag = protocol.etag
+            if etag_matches(if_none_match, etag):
+                return not_modified_response(etag)
+            
+            segment = protocol.get_segment_by_index(track_id, index)
             
             if not segment:
                 return error_response(ErrorCode.NOT_FOUND, "片段不存在", {"track_id": track_id, "index": index})
             
             logger.info(f"根据索引获取片段: task={task_id}, track={track_id}, index={index}")
             
-            return success_response("获取成功", {"segment": segment})
+            body = encode_success_response("获取成功", {"segment": segment})
+        return raw_json_response(body, etag=etag)
     except ValueError as e:
         logger.warning(f"根据索引获取片段失败: {e}")
         return error_response(ErrorCode.NOT_FOUND, str(e), {"track_id": track_id})
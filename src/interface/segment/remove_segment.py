@@ -21,6 +21,13 @@ class RemoveSegmentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: RemoveSegmentRequest) -> dict:
+    """删除片段（单个接口和批量操作共用）"""
+    if not protocol.remove_segment_by_id(request.segment_id):
+        raise NotFoundError(f"Segment not found: {request.segment_id}")
+    return {"segment_id": request.segment_id}
+
+
 def handler(
     request: RemoveSegmentRequest, 
     task_manager: TaskManager
@@ -31,9 +38,9 @@ def handler(
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            success = task.jianyingProject.protocol.remove_segment_by_id(request.segment_id)
-            
-            if not success:
+            try:
+                apply(task.jianyingProject.protocol, request)
+            except NotFoundError:
                 return error_response(ErrorCode.NOT_FOUND, "片段不存在", {"segment_id": request.segment_id})
             
             logger.info(f"删除片段成功: task={request.task_id}, segment={request.segment_id}")
@@ -36,6 +36,14 @@ class UpdateAdjustInfoRequest(BaseModel):
         }
 
 
+def apply(protocol, request: UpdateAdjustInfoRequest) -> dict:
+    """更新片段调色信息（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.update_segment_adjust_info(
+        segment_id=request.segment_id,
+        adjust_info=request.adjust_info
+    )}
+
+
 def handler(
     request: UpdateAdjustInfoRequest,
     task_manager: TaskManager
@@ -50,10 +58,7 @@ def handler(
                 )
             
             # 更新调色信息
-            segment_id = task.jianyingProject.protocol.update_segment_adjust_info(
-                segment_id=request.segment_id,
-                adjust_info=request.adjust_info
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             return success_response({
                 "segment_id": segment_id,
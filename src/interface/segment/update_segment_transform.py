@@ -30,6 +30,14 @@ class UpdateSegmentTransformRequest(BaseModel):
         }
 
 
+def apply(protocol, request: UpdateSegmentTransformRequest) -> dict:
+    """更新片段变换信息（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.update_segment_transform_info(
+        segment_id=request.segment_id,
+        transform_info=request.transform
+    )}
+
+
 def handler(
     request: UpdateSegmentTransformRequest,
     task_manager: TaskManager
@@ -44,10 +52,7 @@ def handler(
                 )
             
             # 更新变换信息
-            segment_id = task.jianyingProject.protocol.update_segment_transform_info(
-                segment_id=request.segment_id,
-                transform_info=request.transform
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             return success_response({
                 "segment_id": segment_id,
@@ -23,6 +23,14 @@ class UpdateTextContentRequest(BaseModel):
         }
 
 
+def apply(protocol, request: UpdateTextContentRequest) -> dict:
+    """更新文本内容（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.update_text_content(
+        segment_id=request.segment_id,
+        text=request.text
+    )}
+
+
 def handler(
     request: UpdateTextContentRequest,
     task_manager: TaskManager
@@ -37,10 +45,7 @@ def handler(
                 )
             
             # 更新文本素材信息
-            segment_id = task.jianyingProject.protocol.update_text_content(
-                segment_id=request.segment_id,
-                text=request.text
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             return success_response({
                 "segment_id": segment_id,
@@ -35,6 +35,14 @@ class UpdateTextMaterialRequest(BaseModel):
         }
 
 
+def apply(protocol, request: UpdateTextMaterialRequest) -> dict:
+    """更新文本素材（单个接口和批量操作共用）"""
+    return {"segment_id": protocol.update_text_material_info(
+        segment_id=request.segment_id,
+        text_material=request.text_material
+    )}
+
+
 def handler(
     request: UpdateTextMaterialRequest,
     task_manager: TaskManager
@@ -49,10 +57,7 @@ def handler(
                 )
             
             # 更新文本素材信息
-            segment_id = task.jianyingProject.protocol.update_text_material_info(
-                segment_id=request.segment_id,
-                text_material=request.text_material
-            )
+            segment_id = apply(task.jianyingProject.protocol, request)["segment_id"]
             
             return success_response({
                 "segment_id": segment_id,
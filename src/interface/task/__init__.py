@@ -5,7 +5,13 @@ from . import (
     remove_task,
     export_task,
     get_draft_info,
-    get_draft_meta_info
+    get_draft_meta_info,
+    get_resource_status,
+    get_export_job,
+    batch_task,
+    build_timeline,
+    undo_task,
+    redo_task
 )
 
 __all__ = [
@@ -14,5 +20,11 @@ __all__ = [
     'remove_task',
     'export_task',
     'get_draft_info',
-    'get_draft_meta_info'
+    'get_draft_meta_info',
+    'get_resource_status',
+    'get_export_job',
+    'batch_task',
+    'build_timeline',
+    'undo_task',
+    'redo_task'
 ]
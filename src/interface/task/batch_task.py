@@ -0,0 +1,193 @@
+"""批量操作接口
+
+一次请求按顺序执行多个修改操作（与单个接口同名、同参数，执行各接口模块的 apply），只获取一次任务锁、只落盘一次。
+
+- 原子性：任一操作失败时整批回滚，草稿恢复到批量操作前的数据
+- 引用：参数中形如 "$0.track_id" 的字符串引用本批次第 0 个操作返回的 track_id
+- 媒体素材的时长/宽高在任务锁外统一并行探测
+"""
+import os
+import re
+from pydantic import BaseModel, Field, ValidationError
+from task_manager import TaskManager
+from utils.media_probe import resolve_media_materials
+from interface.utils import success_response, error_response, ErrorCode
+from interface.track import add_track, remove_track
+from interface.segment import (
+    add_media_segment,
+    add_text_segment,
+    add_sticker_segment,
+    add_complex_text_segment,
+    add_filter_segment,
+    add_effect_segment,
+    add_audio_effect_segment,
+    add_internal_material_to_segment,
+    update_segment_transform,
+    update_text_material,
+    update_text_content,
+    update_adjust_info,
+    remove_segment
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 单次批量请求的操作数上限
+BATCH_MAX_OPERATIONS = int(os.getenv('BATCH_MAX_OPERATIONS', '1000'))
+
+# 引用前面操作的结果："$序号.字段"
+REFERENCE_PATTERN = re.compile(r'^\$(\d+)\.(\w+)$')
+
+
+class BatchOperation(BaseModel):
+    """批量操作中的单个操作"""
+    op: str = Field(..., description="操作名称（与接口模块同名），如 add_track、add_media_segment")
+    params: dict = Field(
+        default_factory=dict,
+        description="操作参数（同对应接口的请求体，无需 task_id），字符串 \"$序号.字段\" 引用本批次前面操作的结果"
+    )
+
+
+class BatchTaskRequest(BaseModel):
+    """批量操作请求"""
+    operations: list[BatchOperation] = Field(
+        ..., description="按顺序执行的操作列表", min_length=1, max_length=BATCH_MAX_OPERATIONS
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "operations": [
+                    {"op": "add_track", "params": {"track_type": "video"}},
+                    {"op": "add_media_segment", "params": {
+                        "track_id": "$0.track_id",
+                        "media_material": {"url": "https://example.com/video.mp4", "media_type": "video"}
+                    }},
+                    {"op": "update_segment_transform", "params": {
+                        "segment_id": "$1.segment_id",
+                        "transform": {"scale_x": 1.2, "scale_y": 1.2}
+                    }}
+                ]
+            }
+        }
+
+
+class BatchOperationError(Exception):
+    """批量操作中某个操作执行失败（触发整批回滚）"""
+
+    def __init__(self, index: int, op: str, error: Exception):
+        super().__init__(str(error))
+        self.index = index
+        self.op = op
+
+
+# 操作名称 -> (请求模型, 执行函数)，执行函数为接口模块的 apply（与单个接口共用）
+BATCH_OPERATIONS = {
+    'add_track': (add_track.AddTrackRequest, add_track.apply),
+    'remove_track': (remove_track.RemoveTrackRequest, remove_track.apply),
+    'add_media_segment': (add_media_segment.AddMediaSegmentRequest, add_media_segment.apply),
+    'add_text_segment': (add_text_segment.AddTextSegmentRequest, add_text_segment.apply),
+    'add_sticker_segment': (add_sticker_segment.AddStickerSegmentRequest, add_sticker_segment.apply),
+    'add_complex_text_segment': (add_complex_text_segment.AddComplexTextSegmentRequest, add_complex_text_segment.apply),
+    'add_filter_segment': (add_filter_segment.AddFilterSegmentRequest, add_filter_segment.apply),
+    'add_effect_segment': (add_effect_segment.AddEffectSegmentRequest, add_effect_segment.apply),
+    'add_audio_effect_segment': (add_audio_effect_segment.AddAudioEffectSegmentRequest, add_audio_effect_segment.apply),
+    'add_internal_material_to_segment': (
+        add_internal_material_to_segment.AddInternalMaterialToSegmentRequest, add_internal_material_to_segment.apply
+    ),
+    'update_segment_transform': (update_segment_transform.UpdateSegmentTransformRequest, update_segment_transform.apply),
+    'update_text_material': (update_text_material.UpdateTextMaterialRequest, update_text_material.apply),
+    'update_text_content': (update_text_content.UpdateTextContentRequest, update_text_content.apply),
+    'update_adjust_info': (update_adjust_info.UpdateAdjustInfoRequest, update_adjust_info.apply),
+    'remove_segment': (remove_segment.RemoveSegmentRequest, remove_segment.apply),
+}
+
+
+def _parse_operations(task_id: str, operations: list[BatchOperation]) -> list[tuple]:
+    """
+    校验所有操作的参数（任务锁外执行）
+
+    Returns:
+        [(操作名称, 请求模型实例, 执行函数, {字段: (引用序号, 引用字段)})]
+
+    Raises:
+        BatchOperationError: 操作不存在、参数不合法或引用了当前及之后的操作
+    """
+    parsed = []
+    for index, operation in enumerate(operations):
+        entry = BATCH_OPERATIONS.get(operation.op)
+        if entry is None:
+            raise BatchOperationError(index, operation.op, ValueError(f"Unsupported operation: {operation.op}"))
+        request_class, apply = entry
+        references = {}
+        for field, value in operation.params.items():
+            match = REFERENCE_PATTERN.match(value) if isinstance(value, str) else None
+            if not match:
+                continue
+            ref_index = int(match.group(1))
+            if ref_index >= index:
+                raise BatchOperationError(
+                    index, operation.op, ValueError(f"Invalid reference: {value}, must refer to an earlier operation")
+                )
+            references[field] = (ref_index, match.group(2))
+        try:
+            request = request_class(**{**operation.params, "task_id": task_id})
+        except ValidationError as e:
+            raise BatchOperationError(index, operation.op, e)
+        parsed.append((operation.op, request, apply, references))
+    return parsed
+
+
+def handler(
+    task_id: str,
+    request: BatchTaskRequest,
+    task_manager: TaskManager
+) -> dict:
+    """批量操作处理函数"""
+    try:
+        parsed = _parse_operations(task_id, request.operations)
+    except BatchOperationError as e:
+        logger.warning(f"批量操作参数错误: task={task_id}, index={e.index}, op={e.op}, {e}")
+        return error_response(ErrorCode.BAD_REQUEST, "批量操作参数错误", {
+            "index": e.index, "op": e.op, "error": str(e)
+        })
+
+    try:
+        # 在任务锁外补齐所有媒体素材的时长和宽高（并行探测）
+        resolve_media_materials([
+            op_request.media_material for _, op_request, _, _ in parsed
+            if isinstance(op_request, add_media_segment.AddMediaSegmentRequest)
+        ])
+
+        # 原子执行：任一操作失败时抛出异常，由任务锁在内存中撤销本批次的修改
+        with task_manager.get_task(task_id) as task:
+            if not task:
+                return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
+
+            protocol = task.jianyingProject.protocol
+            results = []
+            for index, (op, op_request, apply, references) in enumerate(parsed):
+                try:
+                    if references:
+                        update = {}
+                        for field, (ref_index, ref_field) in references.items():
+                            if ref_field not in results[ref_index]["result"]:
+                                raise ValueError(f"Invalid reference: ${ref_index}.{ref_field}")
+                            update[field] = results[ref_index]["result"][ref_field]
+                        op_request = op_request.model_copy(update=update)
+                    results.append({"index": index, "op": op, "result": apply(protocol, op_request)})
+                except Exception as e:
+                    raise BatchOperationError(index, op, e) from e
+
+            logger.info(f"批量操作成功: task={task_id}, 操作数={len(results)}")
+
+            return success_response("批量操作成功", {"task_id": task_id, "results": results})
+    except BatchOperationError as e:
+        logger.error(f"批量操作失败，已回滚: task={task_id}, index={e.index}, op={e.op}, {e}", exc_info=True)
+        return error_response(ErrorCode.INTERNAL_ERROR, "批量操作失败，已回滚", {
+            "index": e.index, "op": e.op, "error": str(e)
+        })
+    except Exception as e:
+        logger.error(f"批量操作失败: task={task_id}, {e}", exc_info=True)
+        return error_response(ErrorCode.INTERNAL_ERROR, "批量操作失败", {"error": str(e)})
@@ -0,0 +1,86 @@
+"""整体构建时间线接口
+
+一次请求提交完整的时间线描述（轨道、片段、素材、变换、调色、转场/动画），
+所有媒体素材先在任务锁外并行探测，远程素材统一登记并行下载，再一次性构建草稿。
+任一片段添加失败时整体回滚。
+"""
+from pydantic import BaseModel, Field
+from task_manager import TaskManager
+from utils.models import *
+from utils.media_probe import resolve_media_materials
+from interface.utils import success_response, error_response, ErrorCode
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BuildTimelineRequest(BaseModel):
+    """整体构建时间线请求"""
+    tracks: list[JianYingTimelineTrackInfo] = Field(..., description="轨道列表（按顺序创建）", min_length=1)
+    replace: bool = Field(False, description="是否先删除现有的所有轨道（整体替换时间线）")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "replace": True,
+                "tracks": [
+                    {
+                        "track_type": "video",
+                        "segments": [
+                            {
+                                "segment_type": "media",
+                                "media_material": {
+                                    "url": "https://example.com/video.mp4",
+                                    "media_type": "video",
+                                    "adjust_info": {"brightness": 10}
+                                },
+                                "transform": {"scale_x": 1.2, "scale_y": 1.2},
+                                "internal_materials": [
+                                    {"material_info": {"type": "transition", "name": "叠化"}}
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        "track_type": "text",
+                        "segments": [
+                            {"segment_type": "text", "text_material": {"text": "Hello World"}, "duration": 3000}
+                        ]
+                    }
+                ]
+            }
+        }
+
+
+def handler(
+    task_id: str,
+    request: BuildTimelineRequest,
+    task_manager: TaskManager
+) -> dict:
+    """整体构建时间线处理函数"""
+    try:
+        # 在任务锁外补齐所有媒体素材的时长和宽高（并行探测）
+        resolve_media_materials([
+            segment.media_material
+            for track in request.tracks for segment in track.segments
+            if segment.segment_type == 'media'
+        ])
+
+        # 原子执行：任一片段添加失败时抛出异常，由任务锁在内存中撤销构建的修改
+        with task_manager.get_task(task_id) as task:
+            if not task:
+                return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
+
+            protocol = task.jianyingProject.protocol
+            tracks = protocol.build_timeline(request.tracks, replace=request.replace)
+
+            logger.info(f"构建时间线成功: task={task_id}, 轨道数={len(tracks)}")
+
+            return success_response("时间线构建成功", {
+                "task_id": task_id,
+                "tracks": tracks,
+                "duration": protocol.base_info.duration
+            })
+    except Exception as e:
+        logger.error(f"构建时间线失败: task={task_id}, {e}", exc_info=True)
+        return error_response(ErrorCode.INTERNAL_ERROR, "构建时间线失败", {"error": str(e)})
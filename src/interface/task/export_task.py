@@ -1,6 +1,8 @@
 """导出任务到OSS接口"""
 from pydantic import BaseModel, Field
+from typing import Optional
 from task_manager import TaskManager
+from export_manager import EXPORT_MODES, EXPORT_MODE_FULL, ExportQueueFullError
 from interface.utils import success_response, error_response, ErrorCode
 import logging
 
@@ -10,11 +12,18 @@ logger = logging.getLogger(__name__)
 class ExportTaskRequest(BaseModel):
     """导出任务请求"""
     task_id: str = Field(..., description="任务ID", min_length=1)
+    tenant: Optional[str] = Field(None, description="租户标识（导出排队按租户公平调度），默认按任务")
+    mode: str = Field(
+        EXPORT_MODE_FULL,
+        description="导出模式：full=完整压缩包，delta=素材按内容哈希单独上传（已存在则跳过），压缩包只含 JSON 和 manifest.json"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
-                "task_id": "task-uuid"
+                "task_id": "task-uuid",
+                "tenant": "tenant-a",
+                "mode": "full"
             }
         }
 
@@ -25,23 +34,34 @@ def handler(
 ) -> dict:
     """导出任务处理函数"""
     task_id = request.task_id
+    if request.mode not in EXPORT_MODES:
+        return error_response(ErrorCode.BAD_REQUEST, "不支持的导出模式", {"mode": request.mode, "modes": EXPORT_MODES})
     
     try:
-        with task_manager.get_task(task_id) as task:
+        with task_manager.get_task_readonly(task_id) as task:
             if not task:
                 logger.warning(f"导出失败 - 任务不存在: {task_id}")
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
             
-            # 调用异步压缩上传（立即返回 URL）
-            oss_url = task.jianyingProject.export_to_oss()
-            
-            logger.info(f"已创建导出任务: {task_id}, URL: {oss_url}")
-            
-            return success_response("导出任务已创建", {
-                "task_id": task_id,
-                "url": oss_url,
-                "note": "文件正在后台压缩上传,预计 1-3 分钟后可访问"
-            })
+            # 持有任务读锁时只序列化草稿（导出内容为此时的草稿）
+            project = task.jianyingProject
+            snapshot = project.prepare_export(request.tenant)
+        
+        # 释放锁后写入快照并提交异步压缩上传（立即返回导出任务）
+        job = project.export_to_oss(snapshot, request.tenant, request.mode)
+        
+        logger.info(f"已创建导出任务: {task_id}, URL: {job.remote_url}, job={job.job_id}")
+        
+        return success_response("导出任务已创建", {
+            "task_id": task_id,
+            "job_id": job.job_id,
+            "mode": job.mode,
+            "url": job.remote_url,
+            "note": f"文件正在后台压缩上传，可通过 /exports/{job.job_id} 查询进度，状态为 done 后可访问"
+        })
+    except ExportQueueFullError as e:
+        logger.warning(f"导出排队已满: {task_id}, {e}")
+        return error_response(ErrorCode.TOO_MANY_REQUESTS, "排队中的导出任务过多，请稍后重试", {"error": str(e)})
     except Exception as e:
         logger.error(f"创建导出任务失败: {task_id}, {e}", exc_info=True)
         return error_response(ErrorCode.INTERNAL_ERROR, "创建导出任务失败", {"error": str(e)})
@@ -1,6 +1,10 @@
 """获取草稿元信息接口"""
+from typing import Optional
+from fastapi.responses import Response
 from task_manager import TaskManager
-from interface.utils import success_response, error_response, ErrorCode
+from interface.utils import (
+    error_response, encode_success_response, raw_json_response, etag_matches, not_modified_response, ErrorCode
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,17 +12,25 @@ logger = logging.getLogger(__name__)
 
 def handler(
     task_id: str, 
-    task_manager: TaskManager
-) -> dict:
-    """获取草稿元信息处理函数"""
+    task_manager: TaskManager,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None
+) -> dict | Response:
+    """获取草稿元信息处理函数（直接返回 JSON 字节，按需压缩；If-None-Match 命中时返回 304）"""
     try:
-        with task_manager.get_task(task_id) as task:
+        with task_manager.get_task_readonly(task_id) as task:
             if not task:
                 logger.warning(f"任务不存在: {task_id}")
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
             
             logger.info(f"获取草稿元信息: {task_id}")
-            return success_response("获取成功", task.jianyingProject.protocol.draft_meta_info)
+            protocol = task.jianyingProject.protocol
+            etag = protocol.etag
+            if etag_matches(if_none_match, etag):
+                return not_modified_response(etag)
+            # 在读锁内序列化，保证数据一致
+            body = encode_success_response("获取成功", protocol.draft_meta_info)
+        return raw_json_response(body, accept_encoding, etag)
     except Exception as e:
         logger.error(f"获取草稿元信息失败: {task_id}, {e}")
         return error_response(ErrorCode.INTERNAL_ERROR, "获取草稿元信息失败", {"error": str(e)})
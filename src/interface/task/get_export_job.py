@@ -0,0 +1,20 @@
+"""查询导出任务接口"""
+from export_manager import export_manager
+from interface.utils import success_response, error_response, ErrorCode
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def handler(job_id: str) -> dict:
+    """查询导出任务处理函数"""
+    try:
+        job = export_manager.get_job(job_id)
+        if not job:
+            logger.warning(f"导出任务不存在: {job_id}")
+            return error_response(ErrorCode.NOT_FOUND, "导出任务不存在", {"job_id": job_id})
+        
+        return success_response("获取成功", job.to_dict())
+    except Exception as e:
+        logger.error(f"查询导出任务失败: {job_id}, {e}")
+        return error_response(ErrorCode.INTERNAL_ERROR, "查询导出任务失败", {"error": str(e)})
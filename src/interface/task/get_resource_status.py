@@ -0,0 +1,30 @@
+"""获取任务素材下载状态接口"""
+from task_manager import TaskManager
+from utils.media_prefetch import media_prefetcher
+from interface.utils import success_response, error_response, ErrorCode
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def handler(
+    task_id: str, 
+    task_manager: TaskManager
+) -> dict:
+    """获取任务素材下载状态处理函数"""
+    try:
+        with task_manager.get_task_readonly(task_id) as task:
+            if not task:
+                logger.warning(f"任务不存在: {task_id}")
+                return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
+            
+            status = media_prefetcher.get_status(task_id)
+            logger.info(f"获取素材下载状态: {task_id}")
+            
+            return success_response("获取成功", {
+                "task_id": task_id,
+                **status
+            })
+    except Exception as e:
+        logger.error(f"获取素材下载状态失败: {task_id}, {e}")
+        return error_response(ErrorCode.INTERNAL_ERROR, "获取素材下载状态失败", {"error": str(e)})
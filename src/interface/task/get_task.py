@@ -12,7 +12,7 @@ def handler(
 ) -> dict:
     """获取任务信息处理函数"""
     try:
-        with task_manager.get_task(task_id) as task:
+        with task_manager.get_task_readonly(task_id) as task:
             if not task:
                 logger.warning(f"任务不存在: {task_id}")
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
@@ -0,0 +1,39 @@
+"""重做接口
+
+重做该任务上一步被撤销的写操作；撤销之后执行了其他写操作时无法重做。
+"""
+from task_manager import TaskManager
+from interface.utils import success_response, error_response, ErrorCode
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def handler(task_id: str, task_manager: TaskManager) -> dict:
+    """重做处理函数"""
+    try:
+        with task_manager.get_task(task_id) as task:
+            if not task:
+                return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
+
+            if not task.jianyingProject.protocol.redo():
+                return error_response(ErrorCode.BAD_REQUEST, "没有可重做的操作", {"task_id": task_id})
+
+        # 本步骤在写锁释放时（事务结束）才加入历史，之后再读取撤销/重做步数
+        with task_manager.get_task_readonly(task_id) as task:
+            if not task:
+                return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
+
+            protocol = task.jianyingProject.protocol
+            logger.info(f"重做成功: task={task_id}, undo={protocol.undo_steps}, redo={protocol.redo_steps}")
+
+            return success_response("重做成功", {
+                "task_id": task_id,
+                "undo_steps": protocol.undo_steps,
+                "redo_steps": protocol.redo_steps,
+                "duration": protocol.base_info.duration,
+                "etag": protocol.etag
+            })
+    except Exception as e:
+        logger.error(f"重做失败: task={task_id}, {e}", exc_info=True)
+        return error_response(ErrorCode.INTERNAL_ERROR, "重做失败", {"error": str(e)})
@@ -23,6 +23,14 @@ class AddTrackRequest(BaseModel):
         }
 
 
+def apply(protocol, request: AddTrackRequest) -> dict:
+    """创建轨道（单个接口和批量操作共用）"""
+    return {"track_id": protocol.add_track(
+        track_type=request.track_type,
+        index=request.index
+    )}
+
+
 def handler(request: AddTrackRequest, task_manager: TaskManager):
     """创建轨道处理函数"""
     try:
@@ -30,10 +38,7 @@ def handler(request: AddTrackRequest, task_manager: TaskManager):
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            track_id = task.jianyingProject.protocol.add_track(
-                track_type=request.track_type,
-                index=request.index
-            )
+            track_id = apply(task.jianyingProject.protocol, request)["track_id"]
             
             logger.info(f"创建轨道成功: task={request.task_id}, type={request.track_type}, track={track_id}")
             
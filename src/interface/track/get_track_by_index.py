@@ -1,4 +1,5 @@
 """根据索引获取轨道接口"""
+from typing import Optional
 from task_manager import TaskManager
 from interface.utils import *
 import logging
@@ -6,21 +7,27 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def handler(task_id: str, index: int, task_manager: TaskManager):
-    """根据索引获取轨道处理函数"""
+def handler(task_id: str, index: int, task_manager: TaskManager, if_none_match: Optional[str] = None):
+    """根据索引获取轨道处理函数（If-None-Match 命中时返回 304）"""
     try:
-        with task_manager.get_task(task_id) as task:
+        with task_manager.get_task_readonly(task_id) as task:
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
             
-            track = task.jianyingProject.protocol.get_track_by_index(index)
+            protocol = task.jianyingProject.protocol
+            etag = protocol.etag
+            if etag_matches(if_none_match, etag):
+                return not_modified_response(etag)
+            
+            track = protocol.get_track_by_index(index)
             
             if not track:
                 return error_response(ErrorCode.NOT_FOUND, "轨道不存在", {"index": index})
             
             logger.info(f"根据索引获取轨道: task={task_id}, index={index}")
             
-            return success_response("获取成功", {"track": track})
+            body = encode_success_response("获取成功", {"track": track})
+        return raw_json_response(body, etag=etag)
     except Exception as e:
         logger.error(f"根据索引获取轨道失败: {e}", exc_info=True)
         return error_response(ErrorCode.INTERNAL_ERROR, "根据索引获取轨道失败", {"error": str(e)})
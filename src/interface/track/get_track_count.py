@@ -9,7 +9,7 @@ logger = logging.getLogger(__name__)
 def handler(task_id: str, task_manager: TaskManager):
     """获取轨道数量处理函数"""
     try:
-        with task_manager.get_task(task_id) as task:
+        with task_manager.get_task_readonly(task_id) as task:
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
             
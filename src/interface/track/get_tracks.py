@@ -1,4 +1,5 @@
 """获取轨道列表接口"""
+from typing import Optional
 from task_manager import TaskManager
 from interface.utils import *
 import logging
@@ -6,19 +7,57 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def handler(task_id: str, task_manager: TaskManager):
-    """获取轨道列表处理函数"""
+def handler(
+    task_id: str,
+    task_manager: TaskManager,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    since: Optional[str] = None
+):
+    """
+    获取轨道列表处理函数（直接返回 JSON 字节，按需压缩；If-None-Match 命中时返回 304）
+
+    指定 since（之前响应的 ETag）时只返回之后修改过的轨道：
+    {"full": false, "track_ids": 当前轨道顺序, "tracks": 修改过的轨道, "removed": 已删除的轨道ID}；
+    草稿已重新加载或变更日志已不完整时返回全部轨道（full 为 true）
+    """
     try:
-        with task_manager.get_task(task_id) as task:
+        with task_manager.get_task_readonly(task_id) as task:
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": task_id})
-            
-            tracks = task.jianyingProject.protocol.get_track_list()
-            
-            logger.info(f"获取轨道列表: task={task_id}, count={len(tracks)}")
-            
-            return success_response("获取成功", {"tracks": tracks})
+
+            protocol = task.jianyingProject.protocol
+            etag = protocol.etag
+            if etag_matches(if_none_match, etag):
+                return not_modified_response(etag)
+
+            tracks = protocol.get_track_list()
+
+            if since is None:
+                logger.info(f"获取轨道列表: task={task_id}, count={len(tracks)}")
+                data = {"tracks": tracks}
+            else:
+                revision = protocol.parse_etag(since)
+                changed = protocol.get_changed_track_ids(revision) if revision is not None else None
+                track_ids = [track['id'] for track in tracks]
+                if changed is None:
+                    data = {"full": True, "track_ids": track_ids, "tracks": tracks, "removed": []}
+                else:
+                    data = {
+                        "full": False,
+                        "track_ids": track_ids,
+                        "tracks": [track for track in tracks if track['id'] in changed],
+                        "removed": sorted(changed.difference(track_ids))
+                    }
+                logger.info(
+                    f"增量获取轨道列表: task={task_id}, since={since}, "
+                    f"full={data['full']}, count={len(data['tracks'])}"
+                )
+            data["etag"] = etag
+
+            # 在读锁内序列化，保证数据一致
+            body = encode_success_response("获取成功", data)
+        return raw_json_response(body, accept_encoding, etag)
     except Exception as e:
         logger.error(f"获取轨道列表失败: {e}", exc_info=True)
         return error_response(ErrorCode.INTERNAL_ERROR, "获取轨道列表失败", {"error": str(e)})
-
@@ -21,6 +21,13 @@ class RemoveTrackRequest(BaseModel):
         }
 
 
+def apply(protocol, request: RemoveTrackRequest) -> dict:
+    """删除轨道（单个接口和批量操作共用）"""
+    if not protocol.remove_track(request.track_id):
+        raise NotFoundError(f"Track not found: {request.track_id}")
+    return {"track_id": request.track_id}
+
+
 def handler(request: RemoveTrackRequest, task_manager: TaskManager):
     """删除轨道处理函数"""
     try:
@@ -28,9 +35,9 @@ def handler(request: RemoveTrackRequest, task_manager: TaskManager):
             if not task:
                 return error_response(ErrorCode.NOT_FOUND, "任务不存在", {"task_id": request.task_id})
             
-            success = task.jianyingProject.protocol.remove_track(request.track_id)
-            
-            if not success:
+            try:
+                apply(task.jianyingProject.protocol, request)
+            except NotFoundError:
                 return error_response(ErrorCode.NOT_FOUND, "轨道不存在", {"track_id": request.track_id})
             
             logger.info(f"删除轨道成功: task={request.task_id}, track={request.track_id}")
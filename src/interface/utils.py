@@ -3,8 +3,24 @@
 
 提供所有接口共用的响应模型、辅助函数
 """
+import os
+import gzip
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Optional
+from fastapi.responses import JSONResponse, Response
+from utils.json_utils import json_dumps
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，未安装时只支持 gzip
+    zstandard = None
+
+
+# 原始字节响应：响应体超过该大小（字节）且客户端支持时压缩，<=0 表示不压缩（默认）
+# 压缩会增加 CPU 耗时，仅在带宽受限（如跨公网访问）时开启
+RESPONSE_COMPRESS_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESS_MIN_SIZE', '0'))
+# gzip 压缩级别（1 最快）
+RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', '1'))
 
 
 # ==================== 统一响应模型 ====================
@@ -41,6 +57,13 @@ class BaseResponse(BaseModel):
         }
 
 
+class FastJSONResponse(JSONResponse):
+    """JSON 响应（使用 utils.json_utils 序列化，orjson/msgspec 可用时更快），作为应用默认响应类"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
 # ==================== 响应构建函数 ====================
 def success_response(message: str = "成功", data: dict = None) -> dict:
     """
@@ -87,6 +110,76 @@ def error_response(code: int, message: str, data: dict = None) -> dict:
     }
 
 
+# ==================== 原始字节响应（大数据快速通道）====================
+def encode_success_response(message: str, data: dict) -> bytes:
+    """
+    直接将成功响应序列化为 JSON 字节（跳过 BaseResponse 校验和 jsonable_encoder）
+    
+    用于草稿、轨道列表等大数据的只读接口；data 为协议数据时必须在任务读锁内调用。
+    """
+    return json_dumps({"code": 0, "message": message, "data": data})
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set[str]:
+    """解析 Accept-Encoding 请求头（忽略 q=0 的编码）"""
+    encodings = set()
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        if not name:
+            continue
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def raw_json_response(body: bytes, accept_encoding: Optional[str] = None, etag: Optional[str] = None) -> Response:
+    """
+    构建原始 JSON 字节响应（可在任务锁外调用）
+    
+    响应体超过 RESPONSE_COMPRESS_MIN_SIZE 时按 Accept-Encoding 压缩：
+    zstd（需安装 zstandard）优先，其次 gzip。
+    
+    Args:
+        body: encode_success_response 生成的 JSON 字节
+        accept_encoding: 请求头 Accept-Encoding
+        etag: 数据版本（JianYingProtocol.etag），设置 ETag 响应头
+    """
+    headers = {'ETag': etag} if etag else {}
+    if 0 < RESPONSE_COMPRESS_MIN_SIZE <= len(body):
+        encodings = _accepted_encodings(accept_encoding)
+        headers['Vary'] = 'Accept-Encoding'
+        if zstandard is not None and 'zstd' in encodings:
+            body = zstandard.ZstdCompressor(level=3).compress(body)
+            headers['Content-Encoding'] = 'zstd'
+        elif 'gzip' in encodings or '*' in encodings:
+            body = gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL)
+            headers['Content-Encoding'] = 'gzip'
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+# ==================== 条件请求（ETag）====================
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断请求头 If-None-Match 是否命中当前 ETag（弱比较，支持多个值和 *）"""
+    if not if_none_match:
+        return False
+    for value in if_none_match.split(','):
+        value = value.strip()
+        if value == '*' or value.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    """数据未修改（304），不序列化数据"""
+    return Response(status_code=304, headers={'ETag': etag})
+
+
+# ==================== 接口异常 ====================
+class NotFoundError(ValueError):
+    """操作的轨道/片段不存在（单个接口返回 NOT_FOUND，批量操作中触发整批回滚）"""
+
+
 # ==================== 常用错误码 ====================
 class ErrorCode:
     """错误码常量"""
@@ -96,4 +189,5 @@ class ErrorCode:
     BAD_REQUEST = 400
     UNAUTHORIZED = 401
     FORBIDDEN = 403
+    TOO_MANY_REQUESTS = 429
 
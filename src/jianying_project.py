@@ -2,16 +2,27 @@ import os
 import json
 import uuid
 import zipfile
-import threading
+import time
+import shutil
 import logging
 from datetime import datetime
 import urllib.parse
-from utils.models import JianYingBaseInfo, JianYingData
+from functools import partial
+from utils.models import JianYingBaseInfo, JianYingData, JianYingSnapshot
 from utils.protocol_utils import JianYingProtocol
+from utils.media_prefetch import media_prefetcher, RESOURCE_PENDING
+from utils.media_cache import media_cache
+from utils.draft_journal import DraftJournal, replay_journal, TASK_WAL_ENABLED
+from export_manager import (
+    export_manager, ExportJob, ExportQueueFullError, EXPORT_UPLOADING, EXPORT_MODE_FULL, EXPORT_MODE_DELTA
+)
 from utils.function_utils import *
 logger = logging.getLogger(__name__)
 
 
+# 解析后的草稿（含 ID 索引）占用内存与 JSON 文件大小之比（估算任务内存占用，实测约 2.5~3.5）
+DRAFT_MEMORY_RATIO = 3
+
 
 class JianYingProject():
     """
@@ -33,8 +44,9 @@ class JianYingProject():
         # 保存工程
         project.save()
         
-        # 导出到 OSS
-        url = project.export_to_oss()
+        # 导出到 OSS（持有任务锁时准备快照，释放锁后导出）
+        snapshot = project.prepare_export()
+        job = project.export_to_oss(snapshot)
     """
     
     def __init__(self, baseInfo: JianYingBaseInfo):
@@ -51,34 +63,122 @@ class JianYingProject():
                 unique_id=str(uuid.uuid4())
             )
         
-        # 加载或构建数据，并初始化协议处理器
+        # 草稿 JSON 文件大小（加载、落盘时更新，用于估算内存占用）
+        self._json_size = 0
+        # 操作日志（WAL）：每次修改追加记录，完整 JSON 只在压缩、导出时重写
+        self.journal = DraftJournal(get_draft_journal_path(get_project_path(baseInfo.unique_id)))
+        
+        # 加载或构建数据（加载时重放操作日志），并初始化协议处理器
         jianying_data = self._get_jianying_data(baseInfo)
         
         # 协议处理器：数据的唯一来源（公开访问）
-        self.protocol = JianYingProtocol(jianying_data)
+        self.protocol = self._create_protocol(jianying_data)
+        # 磁盘上数据对应的版本号（加载/新建时磁盘与内存一致）
+        self._saved_revision = self.protocol.revision
         self.project_remote_path = os.getenv('PROJECT_REMOTE_PATH', None)
         assert self.project_remote_path, 'PROJECT_REMOTE_PATH is not set'
+        # 增量导出的资源目录（按内容哈希存放，跨工程、跨导出共享）
+        self.export_resource_remote_path = os.getenv(
+            'EXPORT_RESOURCE_REMOTE_PATH', f'{self.project_remote_path}/resources'
+        )
         
     # ==================== 公共接口（工程级操作）====================
     
     def save(self):
         """
-        保存工程到磁盘（原子写入）
+        保存工程到磁盘（原子写入完整 JSON，并清空操作日志）
         
         使用场景：
         - 修改数据后手动保存
-        - 在 taskManager 中由 acquire() 自动调用
+        - 在 taskManager 中由后台落盘线程（操作日志压缩）、任务驱逐、服务关闭时调用
         """
+        revision = self.protocol.revision
+        # 整体替换三个 JSON 后清空日志（中途崩溃时加载工程先完成替换，见 DraftJournal.compact）
         self._update_data_to_disk()
+        self._saved_revision = revision
     
-    def export_to_oss(self) -> str:
+    def commit(self, base_revision: int) -> bool:
         """
-        导出工程到 OSS（异步执行）
+        将本次写操作的修改追加到操作日志（写操作成功结束、释放写锁前调用）
+        
+        Args:
+            base_revision: 写操作开始时的版本号
         
         Returns:
-            OSS URL（立即返回，后台异步压缩上传）
+            修改是否已持久化；操作日志未启用，或操作前已有未持久化的修改（日志不连续）时
+            返回 False，由落盘线程写入完整 JSON
+        """
+        ops = self.protocol.take_journal()
+        if not TASK_WAL_ENABLED or not ops or self._saved_revision != base_revision:
+            return False
+        revision = self.protocol.revision
+        self.journal.append({'ops': ops, 'duration': self.protocol.draft_info['duration']})
+        self._saved_revision = revision
+        return True
+    
+    def rollback(self, base_revision: int):
+        """
+        撤销本次写操作的修改（写操作失败、释放写锁前调用，见 JianYingProtocol.rollback）
+        
+        Args:
+            base_revision: 写操作开始时的版本号
         """
-        return self._compress_and_upload_to_oss()
+        self.protocol.rollback()
+        if self._saved_revision is not None and self._saved_revision > base_revision:
+            # 操作过程中落盘过（如导出），磁盘数据包含已撤销的修改，标记为未落盘
+            self._saved_revision = None
+    
+    @property
+    def memory_size(self) -> int:
+        """估算内存占用（字节）：(草稿 JSON + 未压缩的操作日志) × DRAFT_MEMORY_RATIO + 撤销历史"""
+        return int((self._json_size + self.journal.size) * DRAFT_MEMORY_RATIO) + self.protocol.history_size
+    
+    @property
+    def is_dirty(self) -> bool:
+        """内存数据是否有未落盘的修改"""
+        return self.protocol.revision != self._saved_revision
+    
+    def prepare_export(self, tenant: str | None = None) -> JianYingSnapshot:
+        """
+        准备导出快照（持有任务锁时调用）：只在内存中序列化草稿 JSON、记录引用的素材，不读写文件
+        
+        写入快照目录、链接素材由 export_to_oss 在释放任务锁后执行，导出内容与调用时的草稿一致
+        
+        Args:
+            tenant: 租户标识，默认按任务
+        
+        Raises:
+            ExportQueueFullError: 租户排队中的导出任务已达上限（EXPORT_QUEUE_SIZE），此时不序列化
+        """
+        unique_id = self.protocol.base_info.unique_id
+        export_manager.check_queue(tenant or unique_id)
+        data = (self.protocol.draft_info, self.protocol.draft_meta_info, self.protocol.draft_virtual_store)
+        json_files = {
+            os.path.basename(path): json_dumps(item, indent=not JSON_COMPACT)
+            for item, path in zip(data, self._get_json_paths(''))
+        }
+        return JianYingSnapshot(
+            unique_id, get_snapshot_path(str(uuid.uuid4())), json_files, self.protocol.get_resource_urls()
+        )
+    
+    def export_to_oss(
+        self, snapshot: JianYingSnapshot, tenant: str | None = None, mode: str = EXPORT_MODE_FULL
+    ) -> ExportJob:
+        """
+        导出工程到 OSS（异步执行，释放任务锁后调用）
+        
+        Args:
+            snapshot: prepare_export 准备的导出快照
+            tenant: 租户标识（导出排队公平调度），默认按任务
+            mode: 导出模式，full=完整压缩包，delta=资源单独上传（已存在则跳过）+ JSON/清单压缩包
+        
+        Returns:
+            导出任务（立即返回，job.remote_url 为 OSS URL，后台排队压缩上传）
+        
+        Raises:
+            ExportQueueFullError: 租户排队中的导出任务已达上限（EXPORT_QUEUE_SIZE）
+        """
+        return self._compress_and_upload_to_oss(snapshot, tenant, mode)
     
     def get_project_absolute_path(self):
         """
@@ -103,14 +203,25 @@ class JianYingProject():
     
   
     def _load_cache_data(self, unique_id: str) -> JianYingData:
-        """从磁盘加载数据"""
+        """从磁盘加载数据（JSON + 操作日志重放）"""
         project_path = get_project_path(unique_id)
         
+        # 上次压缩中途崩溃：完成 JSON 替换（已包含日志中的修改）或丢弃未写完的暂存文件
+        self.journal.recover(self._get_json_paths(project_path))
+        
         # 加载 JSON 文件
         draft_info = load_json_data(get_draft_path(project_path))
         draft_meta_info = load_json_data(get_draft_meta_info_path(project_path))
         draft_virtual_store = load_json_data(get_draft_virtual_store_path(project_path))
         
+        self._update_json_size(project_path)
+        
+        # 重放上次压缩后的修改
+        records = self.journal.read()
+        if records:
+            replay_journal(records, draft_info, draft_meta_info, draft_virtual_store)
+            logger.info(f"重放操作日志: {unique_id}, {len(records)} 条记录, {self.journal.size} bytes")
+        
         # 使用协议处理器解析 BaseInfo
         baseInfo = JianYingProtocol.parse_base_info_from_draft(draft_info, draft_meta_info)
         
@@ -120,16 +231,40 @@ class JianYingProject():
     def _flush(self):
         """刷新数据到内存"""
         jianying_data = self._get_jianying_data(self.protocol.base_info)
-        self.protocol = JianYingProtocol(jianying_data)
+        self.protocol = self._create_protocol(jianying_data)
+        self._saved_revision = self.protocol.revision
+    
+    def _create_protocol(self, jianying_data: JianYingData) -> JianYingProtocol:
+        """创建协议处理器（启用操作日志时记录修改）"""
+        protocol = JianYingProtocol(jianying_data)
+        if TASK_WAL_ENABLED:
+            protocol.enable_journal()
+        return protocol
 
     def _update_data_to_disk(self):
-        """更新数据到磁盘（原子写入）"""
+        """更新数据到磁盘（三个 JSON 先写入暂存文件，再整体原子替换并清空操作日志）"""
         project_path = get_project_path(self.protocol.base_info.unique_id)
+        paths = self._get_json_paths(project_path)
         
         # 落盘
-        write_json_file(self.protocol.draft_info, get_draft_path(project_path))
-        write_json_file(self.protocol.draft_meta_info, get_draft_meta_info_path(project_path))
-        write_json_file(self.protocol.draft_virtual_store, get_draft_virtual_store_path(project_path))
+        data = (self.protocol.draft_info, self.protocol.draft_meta_info, self.protocol.draft_virtual_store)
+        for item, path in zip(data, paths):
+            write_json_file(item, self.journal.staged_path(path))
+        self.journal.compact(paths)
+        self._update_json_size(project_path)
+    
+    @staticmethod
+    def _get_json_paths(project_path: str) -> list[str]:
+        """草稿的三个 JSON 文件路径"""
+        return [
+            get_draft_path(project_path),
+            get_draft_meta_info_path(project_path),
+            get_draft_virtual_store_path(project_path)
+        ]
+    
+    def _update_json_size(self, project_path: str):
+        """记录草稿 JSON 文件大小"""
+        self._json_size = sum(os.path.getsize(path) for path in self._get_json_paths(project_path))
     
     def _build_jianying_data(self, baseInfo: JianYingBaseInfo) -> JianYingData:
         """构建新工程（内部使用）"""
@@ -158,93 +293,242 @@ class JianYingProject():
         write_json_file(draft_info, get_draft_path(project_path)) 
         write_json_file(draft_meta_info, get_draft_meta_info_path(project_path))
         write_json_file(draft_virtual_store, get_draft_virtual_store_path(project_path))
+        self._update_json_size(project_path)
+        self.journal.reset()
         return jianying_data
     
-    def _do_compress_and_upload(self, remote_url: str, zip_file_path: str):
+    def _write_snapshot(self, snapshot: JianYingSnapshot):
         """
-        实际执行压缩和上传（内部方法，由后台线程调用）
+        写入导出快照（不持有任务锁）：写入准备快照时序列化的草稿 JSON，硬链接草稿引用的素材
         
-        Args:
-            remote_url: OSS 目标 URL
-            zip_file_path: 本地压缩包路径
+        素材文件下载完成后只会被删除或替换，不会原地修改，硬链接即可固定内容。
+        尚未下载完成、或快照后已从草稿删除的素材不链接，记入 pending_resources，导出时再补齐；
+        本地缺失的远程素材重新登记下载（如服务重启前未下载完成）。
         """
-        try:
-            # 1. 压缩文件
-            project_path = get_project_path(self.protocol.base_info.unique_id)
-            logger.info(f"开始压缩文件: {project_path}")
-            
-            with zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(project_path):
-                    for file in files:
-                        # 跳过临时文件
-                        if file.startswith('.tmp_'):
-                            continue
-                        
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, project_path)
-                        
-                        # 再次检查文件是否存在（防止竞态条件）
-                        if os.path.exists(file_path):
-                            zipf.write(file_path, arcname)
-            
-            logger.info(f"压缩完成，开始上传: {remote_url}")
-            
-            # 2. 上传到 OSS（继承自 OssMixin）
-            self.protocol.post_object_file(remote_url, zip_file_path)
-            
-            logger.info(f"上传成功: {remote_url}")
-            
-            # 3. 删除本地临时压缩包
-            if os.path.exists(zip_file_path):
-                os.remove(zip_file_path)
-                logger.info(f"已删除本地压缩包: {zip_file_path}")
-                
-        except Exception as e:
-            logger.error(f"压缩上传失败: {remote_url}, 错误: {e}", exc_info=True)
-            # 清理失败的临时文件
-            if os.path.exists(zip_file_path):
+        unique_id = snapshot.unique_id
+        os.makedirs(os.path.join(snapshot.path, 'Resources'))
+        json_files, snapshot.json_files = snapshot.json_files, {}
+        for file_name, content in json_files.items():
+            with open(os.path.join(snapshot.path, file_name), 'wb') as f:
+                f.write(content)
+        
+        downloading = {
+            resource['url'] for resource in media_prefetcher.get_status(unique_id)['resources']
+            if resource['status'] == RESOURCE_PENDING
+        }
+        resource_path = get_resource_path(unique_id)
+        for url in snapshot.resource_urls:
+            file_name = url_to_filename(url)
+            dest_path = os.path.join(snapshot.path, 'Resources', file_name)
+            if url not in downloading:
                 try:
-                    os.remove(zip_file_path)
-                except:
+                    link_file(os.path.join(resource_path, file_name), dest_path)
+                    continue
+                except FileNotFoundError:
                     pass
+            if url.startswith('http'):
+                self.protocol.url_to_resource_path(url)
+                snapshot.pending_resources.append((url, file_name))
+            else:
+                # 本地素材直接从素材目录复制到快照
+                shutil.copyfile(os.getenv("JY_Res_Dir", "") + url, dest_path)
+    
+    def _complete_snapshot(self, snapshot: JianYingSnapshot):
+        """补齐快照时尚未下载完成的素材（导出工作线程中调用，不持有任务锁）"""
+        if not snapshot.pending_resources:
+            return
+        media_prefetcher.wait(snapshot.unique_id)
+        resource_path = get_resource_path(snapshot.unique_id)
+        for url, file_name in snapshot.pending_resources:
+            dest_path = os.path.join(snapshot.path, 'Resources', file_name)
+            try:
+                link_file(os.path.join(resource_path, file_name), dest_path)
+            except FileNotFoundError:
+                # 下载失败，或快照后素材已从草稿删除：直接获取到快照（命中全局缓存时不重复下载）
+                media_cache.fetch(url, dest_path, self.protocol.get_object_file)
+    
+    def _export_snapshot(self, job: ExportJob, snapshot: JianYingSnapshot, mode: str):
+        """导出快照（由导出调度器的工作线程调用），结束后删除快照"""
+        try:
+            self._complete_snapshot(snapshot)
+            if mode == EXPORT_MODE_DELTA:
+                self._do_delta_upload(job, snapshot)
+            else:
+                self._do_compress_and_upload(job, snapshot)
+        finally:
+            shutil.rmtree(snapshot.path, ignore_errors=True)
+    
+    def _do_compress_and_upload(self, job: ExportJob, snapshot: JianYingSnapshot):
+        """
+        实际执行压缩和上传（内部方法，由导出调度器的工作线程调用）
+        
+        压缩包直接流式写入 OSS 分片上传，不生成本地临时文件；
+        媒体文件本身已压缩，只存储不压缩，仅 JSON 文件使用 deflate。
+        失败时抛出异常，由调度器记录为 failed。
+        
+        Args:
+            job: 导出任务（更新状态和进度）
+            snapshot: 已补齐素材的导出快照
+        """
+        remote_url = job.remote_url
+        # 压缩并流式上传到 OSS（继承自 OssMixin）
+        project_path = snapshot.path
+        files = list(iter_project_files(project_path))
+        job.bytes_total = sum(os.path.getsize(file_path) for file_path, _ in files)
+        logger.info(f"开始压缩上传: {project_path} -> {remote_url}")
+        start_time = time.perf_counter()
+        start_cpu = time.thread_time()
+        
+        with self.protocol.open_object_writer(remote_url) as writer:
+            with zipfile.ZipFile(writer, 'w') as zipf:
+                for file_path, arcname in files:
+                    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                    zinfo.compress_type = get_zip_compress_type(file_path)
+                    # 分块写入，按已读取的源文件字节数更新进度
+                    with open(file_path, 'rb') as src, zipf.open(zinfo, 'w') as dest:
+                        while chunk := src.read(1024 * 1024):
+                            dest.write(chunk)
+                            job.bytes_done += len(chunk)
+            # 压缩包已写完，上传剩余分片并合并
+            job.state = EXPORT_UPLOADING
+        
+        # 统计吞吐量和 CPU 耗时
+        elapsed = time.perf_counter() - start_time
+        cpu_time = time.thread_time() - start_cpu
+        size_mb = writer.bytes_uploaded / 1024 / 1024
+        job.stats = {
+            'size_bytes': writer.bytes_uploaded,
+            'elapsed': round(elapsed, 3),
+            'throughput_mbps': round(size_mb / max(elapsed, 1e-6), 2),
+            'cpu_time': round(cpu_time, 3)
+        }
+        logger.info(
+            f"上传成功: {remote_url}, 大小 {size_mb:.2f}MB, 耗时 {elapsed:.2f}s, "
+            f"吞吐 {job.stats['throughput_mbps']:.2f}MB/s, CPU {cpu_time:.2f}s"
+        )
+    
+    def _do_delta_upload(self, job: ExportJob, snapshot: JianYingSnapshot):
+        """
+        增量导出（内部方法，由导出调度器的工作线程调用）
+        
+        Resources/ 下的素材按内容哈希单独上传到 `{EXPORT_RESOURCE_REMOTE_PATH}/{sha256}{ext}`，
+        OSS 上已存在的直接跳过（只改文案的重复导出不再重新上传素材）；
+        压缩包只包含草稿 JSON 和资源清单 manifest.json（素材相对路径 -> OSS URL）。
+        失败时抛出异常，由调度器记录为 failed。
+        
+        Args:
+            job: 导出任务（更新状态和进度）
+            snapshot: 已补齐素材的导出快照
+        """
+        remote_url = job.remote_url
+        # 1. 区分素材文件和草稿 JSON
+        project_path = snapshot.path
+        resource_files, bundle_files = [], []
+        for file_path, arcname in iter_project_files(project_path):
+            if arcname.split(os.sep, 1)[0] == 'Resources':
+                resource_files.append((file_path, arcname))
+            else:
+                bundle_files.append((file_path, arcname))
+        job.bytes_total = sum(
+            os.path.getsize(file_path) for file_path, _ in resource_files + bundle_files
+        )
+        logger.info(f"开始增量导出: {project_path} -> {remote_url}, 素材 {len(resource_files)} 个")
+        start_time = time.perf_counter()
+        start_cpu = time.thread_time()
+        
+        # 2. 按内容哈希上传素材，已存在的跳过（继承自 OssMixin）
+        job.state = EXPORT_UPLOADING
+        resources = []
+        uploaded = skipped = uploaded_bytes = skipped_bytes = 0
+        for file_path, arcname in resource_files:
+            size = os.path.getsize(file_path)
+            sha256 = get_file_sha256(file_path)
+            resource_url = f'{self.export_resource_remote_path}/{sha256}{get_file_extension(file_path)}'
+            if self.protocol.file_exists(resource_url):
+                skipped += 1
+                skipped_bytes += size
+            else:
+                self.protocol.post_object_file(resource_url, file_path)
+                uploaded += 1
+                uploaded_bytes += size
+            job.bytes_done += size
+            resources.append({
+                'path': arcname.replace(os.sep, '/'),
+                'url': resource_url,
+                'sha256': sha256,
+                'size': size
+            })
+        
+        # 3. 草稿 JSON 和资源清单压缩后流式上传
+        manifest = {'version': 1, 'task_id': snapshot.unique_id, 'resources': resources}
+        with self.protocol.open_object_writer(remote_url) as writer:
+            with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for file_path, arcname in bundle_files:
+                    zipf.write(file_path, arcname, get_zip_compress_type(file_path))
+                    job.bytes_done += os.path.getsize(file_path)
+                zipf.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False))
+        
+        # 4. 统计上传量和 CPU 耗时
+        elapsed = time.perf_counter() - start_time
+        cpu_time = time.thread_time() - start_cpu
+        total_mb = (uploaded_bytes + writer.bytes_uploaded) / 1024 / 1024
+        job.stats = {
+            'size_bytes': writer.bytes_uploaded,
+            'resources_uploaded': uploaded,
+            'resources_skipped': skipped,
+            'uploaded_bytes': uploaded_bytes,
+            'skipped_bytes': skipped_bytes,
+            'elapsed': round(elapsed, 3),
+            'throughput_mbps': round(total_mb / max(elapsed, 1e-6), 2),
+            'cpu_time': round(cpu_time, 3)
+        }
+        logger.info(
+            f"增量导出成功: {remote_url}, 素材上传 {uploaded} 个/跳过 {skipped} 个, "
+            f"上传 {total_mb:.2f}MB, 跳过 {skipped_bytes / 1024 / 1024:.2f}MB, "
+            f"耗时 {elapsed:.2f}s, CPU {cpu_time:.2f}s"
+        )
     
-    def _compress_and_upload_to_oss(self) -> str:
+    def _compress_and_upload_to_oss(
+        self, snapshot: JianYingSnapshot, tenant: str | None = None, mode: str = EXPORT_MODE_FULL
+    ) -> ExportJob:
         """
         压缩并上传到 OSS（异步执行）
         
-        立即返回预生成的 OSS URL，后台线程执行压缩和上传。
-        注意：返回的 URL 立即可用，但文件需要等待压缩上传完成后才能访问。
+        持有任务锁期间只序列化草稿 JSON（prepare_export），释放锁后写入快照目录、硬链接素材，
+        立即返回导出任务（含预生成的 OSS URL），由导出调度器排队对快照执行压缩和上传，
+        导出内容与准备快照时的草稿一致。
+        注意：返回的 URL 立即可用，但文件需要等待导出任务完成（done）后才能访问。
+        
+        Args:
+            snapshot: prepare_export 准备的导出快照
+            tenant: 租户标识（导出排队公平调度），默认按任务
+            mode: 导出模式（full / delta）
         
         Returns:
-            OSS URL（预生成）
+            导出任务
         """
         # 1. 生成 OSS URL（提前返回）
         time = datetime.now()
-        unique_id = self.protocol.base_info.unique_id
+        unique_id = snapshot.unique_id
         # 远端名称使用项目名称，URL 编码
         remote_name = urllib.parse.quote(self.protocol.base_info.name)
         date_str = time.strftime("%Y%m%d")
         timestamp_str = time.strftime("%Y%m%d%H%M%S%f")
         remote_url = f'{self.project_remote_path}/{date_str}/{timestamp_str}/{remote_name}.zip'
         
-        # 2. 落盘操作（确保数据最新）
-        self._update_data_to_disk()
-        
-        # 3. 本地临时压缩包路径
-        project_path = get_project_path(unique_id)
-        zip_file_path = f'{project_path}.zip'
-        
-        # 4. 启动后台线程执行压缩上传
-        thread = threading.Thread(
-            target=self._do_compress_and_upload,
-            args=(remote_url, zip_file_path),
-            daemon=True,  # 守护线程，主进程退出时自动结束
-            name=f"compress-upload-{unique_id[:8]}"
-        )
-        thread.start()
+        # 2. 写入时间点快照（草稿 JSON、素材硬链接，登记缺失素材的下载）
+        try:
+            self._write_snapshot(snapshot)
+            # 3. 提交到导出调度器（有界线程池排队执行）
+            run = partial(self._export_snapshot, snapshot=snapshot, mode=mode)
+            job = export_manager.submit(unique_id, remote_url, run, tenant, mode)
+        except Exception:
+            # 写入失败，或准备快照后队列已满（并发提交）
+            shutil.rmtree(snapshot.path, ignore_errors=True)
+            raise
         
-        logger.info(f"已创建异步压缩上传任务: {remote_url}")
+        logger.info(f"已创建异步压缩上传任务: {remote_url}, job={job.job_id}")
         
-        # 5. 立即返回 URL
-        return remote_url
+        # 4. 立即返回导出任务
+        return job
 
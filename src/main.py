@@ -6,9 +6,12 @@
 2. 路由注册（映射到 interface 模块）
 3. 全局异常处理
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
 import logging
 import os
 from datetime import datetime
@@ -18,9 +21,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from task_manager import TaskManager
+from utils.media_cache import media_cache
+from utils.media_prefetch import media_prefetcher
+from export_manager import export_manager
+from utils.function_utils import clear_snapshots
 
 # 导入接口公共工具
-from interface.utils import BaseResponse, success_response, error_response
+from interface.utils import BaseResponse, FastJSONResponse, success_response, error_response
 
 # 导入接口模块
 from interface.task import *
@@ -101,20 +108,47 @@ logger = setup_logging()
 # ==================== 全局变量 ====================
 task_manager: TaskManager | None = None
 
+# 业务线程池大小：处理函数都是同步阻塞调用（任务锁、OSS 下载、ffprobe、落盘），
+# 统一放到有界线程池执行，避免阻塞事件循环
+HANDLER_POOL_SIZE = int(os.getenv("HANDLER_POOL_SIZE", "32"))
+handler_executor: ThreadPoolExecutor | None = None
+
+
+async def dispatch(handler, *args):
+    """
+    在业务线程池中执行同步处理函数
+    
+    事件循环只负责收发请求，慢请求（如大文件下载）只占用一个工作线程，
+    不会拖慢 /health 等其他请求。
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(handler_executor, partial(handler, *args))
+
 # ==================== 生命周期管理 ====================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    global task_manager
+    global task_manager, handler_executor
     logger.info("========== 服务启动 ==========")
     logger.info("初始化 TaskManager...")
     task_manager = TaskManager()
     logger.info("TaskManager 初始化完成")
+    # 上次未完成的导出不会再执行，清理遗留的导出快照
+    clear_snapshots()
+    handler_executor = ThreadPoolExecutor(
+        max_workers=HANDLER_POOL_SIZE,
+        thread_name_prefix="handler"
+    )
+    logger.info(f"业务线程池初始化完成，线程数: {HANDLER_POOL_SIZE}")
     
     yield
     
     logger.info("========== 服务关闭 ==========")
     logger.info("清理资源...")
+    handler_executor.shutdown(wait=True)
+    export_manager.shutdown()
+    media_prefetcher.shutdown()
+    task_manager.shutdown()
 
 # ==================== FastAPI 应用 ====================
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -125,6 +159,7 @@ app = FastAPI(
     description="剪映草稿管理 HTTP API",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs" if not IS_PRODUCTION else None,
     redoc_url="/redoc" if not IS_PRODUCTION else None,
     openapi_url="/openapi.json" if not IS_PRODUCTION else None
@@ -156,138 +191,195 @@ async def health():
         }
     )
 
+@app.get("/media-cache/stats", response_model=BaseResponse, tags=["系统"])
+async def media_cache_stats():
+    """全局媒体缓存统计（命中、未命中、节省字节数）"""
+    stats = await dispatch(media_cache.get_stats)
+    return success_response(message="获取成功", data=stats)
+
+@app.get("/task-manager/stats", response_model=BaseResponse, tags=["系统"])
+async def task_manager_stats():
+    """驻留任务统计（任务数、估算内存、移出内存和重新加载次数/耗时）"""
+    stats = await dispatch(task_manager.get_stats)
+    return success_response(message="获取成功", data=stats)
+
 # ---------- 任务管理 ----------
 @app.post("/tasks", response_model=BaseResponse, tags=["任务管理"])
 async def api_create_task(request: create_task.CreateTaskRequest):
     """创建新任务"""
-    return create_task.handler(request, task_manager)
+    return await dispatch(create_task.handler, request, task_manager)
 
 @app.get("/tasks/{task_id}", response_model=BaseResponse, tags=["任务管理"])
 async def api_get_task(task_id: str):
     """获取任务信息"""
-    return get_task.handler(task_id, task_manager)
+    return await dispatch(get_task.handler, task_id, task_manager)
 
 @app.delete("/tasks", response_model=BaseResponse, tags=["任务管理"])
 async def api_remove_task(request: remove_task.RemoveTaskRequest):
     """删除任务"""
-    return remove_task.handler(request, task_manager)
+    return await dispatch(remove_task.handler, request, task_manager)
 
 @app.post("/export", response_model=BaseResponse, tags=["任务管理"])
 async def api_export_task(request: export_task.ExportTaskRequest):
     """导出任务到 OSS"""
-    return export_task.handler(request, task_manager)
+    return await dispatch(export_task.handler, request, task_manager)
+
+@app.get("/exports/{job_id}", response_model=BaseResponse, tags=["任务管理"])
+async def api_get_export_job(job_id: str):
+    """查询导出任务状态和进度"""
+    return await dispatch(get_export_job.handler, job_id)
+
+@app.post("/tasks/{task_id}/batch", response_model=BaseResponse, tags=["任务管理"])
+async def api_batch_task(task_id: str, request: batch_task.BatchTaskRequest):
+    """批量执行修改操作（一次加锁、一次落盘，失败整批回滚）"""
+    return await dispatch(batch_task.handler, task_id, request, task_manager)
+
+@app.post("/tasks/{task_id}/timeline", response_model=BaseResponse, tags=["任务管理"])
+async def api_build_timeline(task_id: str, request: build_timeline.BuildTimelineRequest):
+    """整体构建时间线（轨道、片段、素材一次提交，媒体并行探测和下载）"""
+    return await dispatch(build_timeline.handler, task_id, request, task_manager)
+
+@app.post("/tasks/{task_id}/undo", response_model=BaseResponse, tags=["任务管理"])
+async def api_undo_task(task_id: str):
+    """撤销上一步写操作（不重新下载素材）"""
+    return await dispatch(undo_task.handler, task_id, task_manager)
+
+@app.post("/tasks/{task_id}/redo", response_model=BaseResponse, tags=["任务管理"])
+async def api_redo_task(task_id: str):
+    """重做上一步被撤销的写操作"""
+    return await dispatch(redo_task.handler, task_id, task_manager)
 
 @app.get("/tasks/{task_id}/draft_info", response_model=BaseResponse, tags=["任务数据"])
-async def api_get_draft_info(task_id: str):
-    """获取草稿数据"""
-    return get_draft_info.handler(task_id, task_manager)
+async def api_get_draft_info(
+    task_id: str,
+    accept_encoding: str | None = Header(None),
+    if_none_match: str | None = Header(None)
+):
+    """获取草稿数据（支持 gzip/zstd 压缩，ETag 未变化时返回 304）"""
+    return await dispatch(get_draft_info.handler, task_id, task_manager, accept_encoding, if_none_match)
 
 @app.get("/tasks/{task_id}/draft_meta_info", response_model=BaseResponse, tags=["任务数据"])
-async def api_get_draft_meta_info(task_id: str):
-    """获取草稿元信息"""
-    return get_draft_meta_info.handler(task_id, task_manager)
+async def api_get_draft_meta_info(
+    task_id: str,
+    accept_encoding: str | None = Header(None),
+    if_none_match: str | None = Header(None)
+):
+    """获取草稿元信息（支持 gzip/zstd 压缩，ETag 未变化时返回 304）"""
+    return await dispatch(get_draft_meta_info.handler, task_id, task_manager, accept_encoding, if_none_match)
+
+@app.get("/tasks/{task_id}/resources", response_model=BaseResponse, tags=["任务数据"])
+async def api_get_resource_status(task_id: str):
+    """获取素材下载状态（pending/complete/failed）"""
+    return await dispatch(get_resource_status.handler, task_id, task_manager)
 
 # ---------- 轨道管理 ----------
 @app.post("/tracks", response_model=BaseResponse, tags=["轨道管理"])
 async def api_add_track(request: add_track.AddTrackRequest):
     """创建轨道"""
-    return add_track.handler(request, task_manager)
+    return await dispatch(add_track.handler, request, task_manager)
 
 @app.delete("/tracks", response_model=BaseResponse, tags=["轨道管理"])
 async def api_remove_track(request: remove_track.RemoveTrackRequest):
     """删除轨道"""
-    return remove_track.handler(request, task_manager)
+    return await dispatch(remove_track.handler, request, task_manager)
 
 @app.get("/tasks/{task_id}/tracks", response_model=BaseResponse, tags=["轨道管理"])
-async def api_get_tracks(task_id: str):
-    """获取轨道列表"""
-    return get_tracks.handler(task_id, task_manager)
+async def api_get_tracks(
+    task_id: str,
+    since: str | None = None,
+    accept_encoding: str | None = Header(None),
+    if_none_match: str | None = Header(None)
+):
+    """获取轨道列表（支持 gzip/zstd 压缩，ETag 未变化时返回 304，since 传入之前的 ETag 时只返回修改过的轨道）"""
+    return await dispatch(get_tracks.handler, task_id, task_manager, accept_encoding, if_none_match, since)
 
 @app.get("/tasks/{task_id}/tracks/count", response_model=BaseResponse, tags=["轨道管理"])
 async def api_get_track_count(task_id: str):
     """获取轨道数量"""
-    return get_track_count.handler(task_id, task_manager)
+    return await dispatch(get_track_count.handler, task_id, task_manager)
 
 @app.get("/tasks/{task_id}/tracks/index/{index}", response_model=BaseResponse, tags=["轨道管理"])
-async def api_get_track_by_index(task_id: str, index: int):
-    """根据索引获取轨道"""
-    return get_track_by_index.handler(task_id, index, task_manager)
+async def api_get_track_by_index(task_id: str, index: int, if_none_match: str | None = Header(None)):
+    """根据索引获取轨道（ETag 未变化时返回 304）"""
+    return await dispatch(get_track_by_index.handler, task_id, index, task_manager, if_none_match)
 
 @app.get("/tasks/{task_id}/tracks/{track_id}", response_model=BaseResponse, tags=["轨道管理"])
-async def api_get_track(task_id: str, track_id: str):
-    """获取轨道详情"""
-    return get_track.handler(task_id, track_id, task_manager)
+async def api_get_track(task_id: str, track_id: str, if_none_match: str | None = Header(None)):
+    """获取轨道详情（ETag 未变化时返回 304）"""
+    return await dispatch(get_track.handler, task_id, track_id, task_manager, if_none_match)
 
 # ---------- 片段管理 ----------
 @app.post("/segments/media", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_media_segment(request: add_media_segment.AddMediaSegmentRequest):
     """添加媒体片段（视频/图片/音频）"""
-    return add_media_segment.handler(request, task_manager)
+    return await dispatch(add_media_segment.handler, request, task_manager)
 
 @app.post("/segments/text", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_text_segment(request: add_text_segment.AddTextSegmentRequest):
     """添加文本片段"""
-    return add_text_segment.handler(request, task_manager)
+    return await dispatch(add_text_segment.handler, request, task_manager)
 
 @app.post("/segments/sticker", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_sticker_segment(request: add_sticker_segment.AddStickerSegmentRequest):
     """添加贴纸片段"""
-    return add_sticker_segment.handler(request, task_manager)
+    return await dispatch(add_sticker_segment.handler, request, task_manager)
 
 @app.post("/segments/complex-text", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_complex_text_segment(request: add_complex_text_segment.AddComplexTextSegmentRequest):
     """添加复杂文本片段（带花字、气泡等特效）"""
-    return add_complex_text_segment.handler(request, task_manager)
+    return await dispatch(add_complex_text_segment.handler, request, task_manager)
 
 @app.post("/segments/filter", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_filter_segment(request: add_filter_segment.AddFilterSegmentRequest):
     """添加滤镜片段"""
-    return add_filter_segment.handler(request, task_manager)
+    return await dispatch(add_filter_segment.handler, request, task_manager)
 
 @app.post("/segments/effect", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_effect_segment(request: add_effect_segment.AddEffectSegmentRequest):
     """添加视频特效片段"""
-    return add_effect_segment.handler(request, task_manager)
+    return await dispatch(add_effect_segment.handler, request, task_manager)
 
 @app.post("/segments/audio-effect", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_audio_effect_segment(request: add_audio_effect_segment.AddAudioEffectSegmentRequest):
     """添加音效片段"""
-    return add_audio_effect_segment.handler(request, task_manager)
+    return await dispatch(add_audio_effect_segment.handler, request, task_manager)
 
 @app.post("/segments/internal-material", response_model=BaseResponse, tags=["片段管理"])
 async def api_add_internal_material_to_segment(request: add_internal_material_to_segment.AddInternalMaterialToSegmentRequest):
     """添加内部材质到片段（转场、动画等）"""
-    return add_internal_material_to_segment.handler(request, task_manager)
+    return await dispatch(add_internal_material_to_segment.handler, request, task_manager)
 
 @app.post("/segments/transform", response_model=BaseResponse, tags=["片段管理"])
 async def api_update_segment_transform(request: update_segment_transform.UpdateSegmentTransformRequest):
     """更新片段变换信息（位置、缩放、旋转）"""
-    return update_segment_transform.handler(request, task_manager)
+    return await dispatch(update_segment_transform.handler, request, task_manager)
 
 @app.post("/segments/text-material", response_model=BaseResponse, tags=["片段管理"])
 async def api_update_text_material(request: update_text_material.UpdateTextMaterialRequest):
     """更新文本片段的文本内容"""
-    return update_text_material.handler(request, task_manager)
+    return await dispatch(update_text_material.handler, request, task_manager)
 
 @app.post("/segments/adjust-info", response_model=BaseResponse, tags=["片段管理"])
 async def api_update_adjust_info(request: update_adjust_info.UpdateAdjustInfoRequest):
     """更新视频片段的调色信息"""
-    return update_adjust_info.handler(request, task_manager)
+    return await dispatch(update_adjust_info.handler, request, task_manager)
 
 @app.delete("/segments", response_model=BaseResponse, tags=["片段管理"])
 async def api_remove_segment(request: remove_segment.RemoveSegmentRequest):
     """删除片段"""
-    return remove_segment.handler(request, task_manager)
+    return await dispatch(remove_segment.handler, request, task_manager)
 
 @app.get("/tasks/{task_id}/tracks/{track_id}/segments/count", response_model=BaseResponse, tags=["片段管理"])
 async def api_get_segment_count(task_id: str, track_id: str):
     """获取片段数量"""
-    return get_segment_count.handler(task_id, track_id, task_manager)
+    return await dispatch(get_segment_count.handler, task_id, track_id, task_manager)
 
 @app.get("/tasks/{task_id}/tracks/{track_id}/segments/index/{index}", response_model=BaseResponse, tags=["片段管理"])
-async def api_get_segment_by_index(task_id: str, track_id: str, index: int):
-    """根据索引获取片段"""
-    return get_segment_by_index.handler(task_id, track_id, index, task_manager)
+async def api_get_segment_by_index(
+    task_id: str, track_id: str, index: int, if_none_match: str | None = Header(None)
+):
+    """根据索引获取片段（ETag 未变化时返回 304）"""
+    return await dispatch(get_segment_by_index.handler, task_id, track_id, index, task_manager, if_none_match)
 
 # ==================== 错误处理 ====================
 @app.exception_handler(Exception)
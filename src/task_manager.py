@@ -1,64 +1,213 @@
 from jianying_project import JianYingProject
 from utils.models import JianYingBaseInfo
 from utils.function_utils import *
+from utils.media_prefetch import media_prefetcher
 import threading
+import heapq
+import itertools
 import time
 import logging
 import os
 import shutil
+from collections import deque
 from contextlib import contextmanager
 from readerwriterlock import rwlock
 
 logger = logging.getLogger(__name__)
 
 
-# 超过60s闲置,则移出内存
-TASK_IDLE_TIME = 60
+# 闲置超过该时间（秒）的任务移出内存，<=0 表示不按闲置时间移出（只受驻留上限约束）
+TASK_IDLE_TIME = float(os.getenv('TASK_IDLE_TIME', '60'))
+# 内存中最多驻留的任务数，超出后按最近最少使用（LRU）移出，<=0 表示不限制
+TASK_MAX_RESIDENT = int(os.getenv('TASK_MAX_RESIDENT', '0'))
+# 驻留任务的估算内存上限（MB，见 JianYingProject.memory_size），超出后按 LRU 移出，<=0 表示不限制
+TASK_MAX_RESIDENT_SIZE = float(os.getenv('TASK_MAX_RESIDENT_SIZE', '0'))
+# 正在使用或落盘失败而未能移出内存的任务，重试间隔（秒）
+TASK_EVICT_RETRY = 1
+
+# 写后落盘：脏数据最长驻留时间（秒），<=0 表示每次操作后立即落盘
+TASK_FLUSH_INTERVAL = float(os.getenv('TASK_FLUSH_INTERVAL', '2'))
+# 写后落盘：累计修改次数达到阈值时立即落盘
+TASK_FLUSH_MAX_EDITS = int(os.getenv('TASK_FLUSH_MAX_EDITS', '50'))
 
 
 class JianYingTask:
-    """剪映任务封装 - 线程安全"""
+    """剪映任务封装 - 线程安全（读写锁：读操作共享，写操作独占）"""
     
     def __init__(self, baseInfo: JianYingBaseInfo):
         self.jianyingProject = JianYingProject(baseInfo)
-        self.lock = threading.RLock()  # 任务锁
+        self.rwlock = rwlock.RWLockFair()  # 任务锁
+        self._flush_lock = threading.Lock()  # 保证同一任务同时只有一个落盘操作
         self.last_access_time = time.time()
         self.marked_for_deletion = False  # 删除标记
+        self.evicted = False  # 已移出内存标记
+        self.dirty_since = None  # 首次出现未落盘修改的时间
+        self.pending_edits = 0  # 未落盘的修改次数
+        self.accounted_size = 0  # 已计入 TaskManager 驻留内存的估算大小
+    
+    @property
+    def is_dirty(self) -> bool:
+        """是否有未落盘的修改"""
+        return self.jianyingProject.is_dirty
+    
+    @property
+    def memory_size(self) -> int:
+        """估算内存占用（字节）"""
+        return self.jianyingProject.memory_size
     
     @contextmanager
     def acquire(self):
         """
-        获取任务锁的上下文管理器
+        获取任务写锁的上下文管理器（独占）
+        
+        事务：上下文内抛出异常时在内存中撤销本次的所有修改（撤销日志，耗时只与修改量有关），
+        数据恢复到进入前的状态（见 JianYingProtocol.begin_transaction）
         
-        自动落盘：退出时自动保存数据到磁盘
+        操作日志：退出时将本次修改追加到操作日志并 fsync（见 utils.draft_journal），
+        日志超过阈值后由 TaskManager 后台线程重写完整 JSON（压缩）
+        
+        写后落盘（操作日志关闭或追加失败时）：退出时只记录脏数据，由 TaskManager 后台线程合并落盘
+        （TASK_FLUSH_INTERVAL <= 0 时退化为退出即落盘）
         
         Usage:
             with task.acquire():
-                # 操作任务，退出时自动落盘
+                # 操作任务，修改由后台线程落盘
                 task.jianyingProject.do_something()
         """
-        with self.lock:
+        with self.rwlock.gen_wlock():
             self.last_access_time = time.time()  # 进入时更新
+            protocol = self.jianyingProject.protocol
+            revision = protocol.revision
+            was_dirty = self.is_dirty
+            protocol.begin_transaction()
             try:
                 yield self
-                # 只有业务逻辑执行成功（无异常）才落盘
-                try:
-                    self.jianyingProject.save()
-                except Exception as e:
-                    logger.error(f"任务落盘失败: {e}", exc_info=True)
-                    self.jianyingProject._flush()
+                # 只有业务逻辑执行成功（无异常）才记录修改
+                protocol.end_transaction()
+                self._mark_dirty(revision)
             except Exception:
-                # 发生异常时刷新数据到内存，避免脏数据影响后续操作
-                self.jianyingProject._flush()
+                self._recover(revision, was_dirty)
                 raise
             finally:
                 self.last_access_time = time.time()  # 退出时更新
+    
+    @contextmanager
+    def acquire_readonly(self):
+        """
+        获取任务读锁的上下文管理器（共享）
+        
+        多个读操作可并发执行，只与写操作互斥；不修改数据，也不触发落盘。
+        
+        Usage:
+            with task.acquire_readonly():
+                tracks = task.jianyingProject.protocol.get_track_list()
+        """
+        with self.rwlock.gen_rlock():
+            self.last_access_time = time.time()  # 进入时更新
+            try:
+                yield self
+            finally:
+                self.last_access_time = time.time()  # 退出时更新
+    
+    def _mark_dirty(self, revision: int):
+        """记录本次操作产生的修改（调用时必须持有写锁）"""
+        if self.jianyingProject.protocol.revision != revision:
+            self._commit(revision)
+        if not self.is_dirty:
+            # 已追加到操作日志
+            self.dirty_since = None
+            self.pending_edits = 0
+            # 同步落盘模式（无后台线程）或任务已被移出内存时，由写操作自己压缩日志
+            if self.jianyingProject.journal.needs_compaction and (TASK_FLUSH_INTERVAL <= 0 or self.evicted):
+                self._flush_locked()
+            return
+        if self.jianyingProject.protocol.revision == revision:
+            return  # 只读操作
+        if self.dirty_since is None:
+            self.dirty_since = time.time()
+        self.pending_edits += 1
+        # 同步落盘模式，或任务已被移出内存（不会再被后台线程落盘）
+        if TASK_FLUSH_INTERVAL <= 0 or self.evicted:
+            self._flush_locked()
+    
+    def _commit(self, revision: int):
+        """将本次修改追加到操作日志（失败时保留脏数据，由落盘线程写入完整 JSON）"""
+        try:
+            self.jianyingProject.commit(revision)
+        except Exception as e:
+            logger.error(f"操作日志写入失败: {e}", exc_info=True)
+    
+    def _recover(self, revision: int, was_dirty: bool):
+        """操作失败后恢复内存数据（调用时必须持有写锁）"""
+        project = self.jianyingProject
+        try:
+            # 在内存中撤销本次修改（失败前未修改数据时只结束事务，撤销/重做取出的步骤放回历史）
+            project.rollback(revision)
+            if self.is_dirty and self.dirty_since is None:
+                self.dirty_since = time.time()
+            return
+        except Exception as e:
+            logger.error(f"任务回滚失败，重新加载磁盘数据: {e}", exc_info=True)
+        if project.protocol.revision == revision:
+            return
+        if not was_dirty:
+            # 磁盘数据即操作前的数据，重新加载
+            self.jianyingProject._flush()
+            return
+        # 磁盘数据落后于内存，重新加载会丢失已成功的修改，保留内存数据
+        logger.error(
+            f"任务操作失败且存在未落盘的修改，保留内存数据: "
+            f"{self.jianyingProject.protocol.base_info.unique_id}"
+        )
+    
+    def needs_flush(self) -> bool:
+        """是否达到落盘条件（脏数据驻留超时、修改次数超过阈值，或操作日志需要压缩）"""
+        if self.jianyingProject.journal.needs_compaction:
+            return True
+        if self.dirty_since is None:
+            return False
+        if self.pending_edits >= TASK_FLUSH_MAX_EDITS:
+            return True
+        return time.time() - self.dirty_since >= TASK_FLUSH_INTERVAL
+    
+    def flush(self) -> bool:
+        """
+        将未落盘的修改写入磁盘，或压缩操作日志（落盘只读取数据，持有读锁，不阻塞其他读操作）
+        
+        Returns:
+            是否执行了落盘
+        """
+        with self.rwlock.gen_rlock():
+            return self._flush_locked()
+    
+    def _flush_locked(self) -> bool:
+        """落盘（调用时必须持有读锁或写锁）"""
+        with self._flush_lock:
+            if self.marked_for_deletion:
+                return False
+            if not self.is_dirty and not self.jianyingProject.journal.needs_compaction:
+                return False
+            try:
+                self.jianyingProject.save()
+            except Exception as e:
+                # 保留脏标记，下次重试
+                logger.error(f"任务落盘失败: {e}", exc_info=True)
+                return False
+            self.dirty_since = None
+            self.pending_edits = 0
+            return True
                 
+    def clear_history(self):
+        """清空撤销/重做历史（任务移出内存时调用，删除只被历史引用的本地文件）"""
+        with self.rwlock.gen_wlock():
+            self.jianyingProject.protocol.clear_history()
+    
     def destroy(self):
         """销毁任务"""
-        with self.lock:
+        with self.rwlock.gen_wlock():
             # 删除本地文件
             task_id = self.jianyingProject.protocol.base_info.unique_id
+            media_prefetcher.forget(task_id)
             project_path = get_project_path(task_id)
             if os.path.exists(project_path):
                 shutil.rmtree(project_path)
@@ -67,8 +216,9 @@ class JianYingTask:
     
     def is_expired(self, expire_seconds: int) -> bool:
         """检查任务是否过期且未使用（线程安全）"""
-        # 尝试获取锁，如果锁被持有说明正在使用
-        acquired = self.lock.acquire(blocking=False)
+        # 尝试获取写锁，如果获取失败说明正在使用（读或写）
+        lock = self.rwlock.gen_wlock()
+        acquired = lock.acquire(blocking=False)
         if not acquired:
             return False  # 锁被持有，任务正在使用
         
@@ -77,7 +227,7 @@ class JianYingTask:
             elapsed = time.time() - self.last_access_time
             return elapsed > expire_seconds
         finally:
-            self.lock.release()
+            lock.release()
 
 
 class TaskManager:
@@ -88,44 +238,188 @@ class TaskManager:
         self.task_dict = {}
         # 读写锁：保护 task_dict（读多写少场景优化）
         self.rwlock = rwlock.RWLockFair()
+        # 唤醒后台落盘线程（修改次数达到阈值时）
+        self._flush_event = threading.Event()
+        # 唤醒后台清理线程（标记删除、超出驻留上限时）
+        self._cleanup_event = threading.Event()
+        # 到期堆 [(最近访问时间, 序号, 任务)]，每个驻留任务一条记录；驻留任务的估算内存合计
+        self._expiry_lock = threading.Lock()
+        self._expiry_heap: list[tuple[float, int, JianYingTask]] = []
+        self._expiry_seq = itertools.count()
+        self._resident_bytes = 0
+        # 标记删除、等待空闲后销毁的任务
+        self._pending_deletions: deque[JianYingTask] = deque()
+        # 统计：移出内存次数（闲置超时 / 超出驻留上限）、从磁盘重新加载的次数和耗时
+        self._stats_lock = threading.Lock()
+        self.idle_evictions = 0
+        self.budget_evictions = 0
+        self.reloads = 0
+        self.reload_seconds = 0.0
+        self.reload_max_seconds = 0.0
         # 启动后台清理线程
         cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
         cleanup_thread.start()
+        # 启动后台落盘线程
+        if TASK_FLUSH_INTERVAL > 0:
+            flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            flush_thread.start()
+    
+    def _flush_loop(self):
+        """后台落盘线程：合并同一任务的多次修改，按时间间隔或修改次数落盘"""
+        while True:
+            self._flush_event.wait(timeout=TASK_FLUSH_INTERVAL)
+            self._flush_event.clear()
+            self._flush_dirty_tasks()
+    
+    def _flush_dirty_tasks(self, force: bool = False):
+        """落盘所有满足条件的任务（force=True 时落盘所有脏任务）"""
+        with self.rwlock.gen_rlock():
+            tasks = list(self.task_dict.items())
+        for task_id, task in tasks:
+            if not force and not task.needs_flush():
+                continue
+            if task.flush():
+                logger.info(f"Flush task to disk: {task_id}")
+    
+    def shutdown(self):
+        """服务关闭：强制落盘所有未保存的修改"""
+        self._flush_dirty_tasks(force=True)
+        logger.info("TaskManager 已落盘所有任务")
     
     def _cleanup_loop(self):
-        """后台清理线程"""
+        """后台清理线程：休眠到下一个任务到期，标记删除或超出驻留上限时立即唤醒"""
         while True:
-            time.sleep(5)
-            self._remove_expired_tasks()
-    
-    def _remove_expired_tasks(self):
-        """移除过期或标记删除的任务"""
-        # 收集需要删除的任务（写锁）
-        to_remove = []
-        to_destroy = []
-        with self.rwlock.gen_wlock():
-            for task_id, task in list(self.task_dict.items()):
-                # 标记删除且空闲
-                if task.marked_for_deletion and task.is_expired(0):
-                    to_remove.append((task_id, task))
-                    to_destroy.append((task_id, task))
-                # 自动过期
-                elif task.is_expired(TASK_IDLE_TIME):
-                    to_remove.append((task_id, task))
-            
-            # 从字典删除
-            for task_id, _ in to_remove:
-                del self.task_dict[task_id]
-                logger.info(f"Remove task from memory: {task_id}")
+            timeout = self._remove_expired_tasks()
+            self._cleanup_event.wait(timeout=timeout)
+            self._cleanup_event.clear()
+    
+    def _remove_expired_tasks(self) -> float | None:
+        """
+        移除标记删除、闲置过期的任务，以及超出驻留上限时最近最少使用的任务
+        
+        到期堆按最近访问时间排序：访问任务时不更新堆，弹出时发现之后访问过则按新的访问时间重新加入。
+        只检查到期（或超出上限时最久未使用）的任务，全局写锁只在实际移除时获取。
+        
+        Returns:
+            距下一个任务到期的时间（秒），None 表示没有需要定时检查的任务
+        """
+        self._destroy_marked_tasks()
+        
+        next_wakeup = None
+        deferred = []
+        while True:
+            now = time.time()
+            with self._expiry_lock:
+                if not self._expiry_heap:
+                    break
+                access_time, _, task = self._expiry_heap[0]
+                idle = TASK_IDLE_TIME > 0 and access_time + TASK_IDLE_TIME <= now
+                if not idle and not self._over_budget():
+                    if TASK_IDLE_TIME > 0:
+                        next_wakeup = access_time + TASK_IDLE_TIME - now
+                    break
+                heapq.heappop(self._expiry_heap)
+            if task.evicted or task.marked_for_deletion:
+                continue  # 已移出内存，或由删除流程处理
+            if task.last_access_time > access_time:
+                self._push_expiry(task)
+                continue
+            if not self._evict_task(task, 'idle' if idle else 'budget'):
+                deferred.append(task)
+        
+        # 正在使用或落盘失败的任务稍后重试
+        for task in deferred:
+            self._push_expiry(task)
+        if deferred or self._pending_deletions:
+            next_wakeup = min(next_wakeup, TASK_EVICT_RETRY) if next_wakeup is not None else TASK_EVICT_RETRY
+        return next_wakeup
+    
+    def _evict_task(self, task: JianYingTask, reason: str) -> bool:
+        """
+        将任务移出内存（先落盘未保存的修改）
         
-        # 销毁任务（在锁外执行，避免阻塞）
-        for task_id, task in to_destroy:
+        Returns:
+            是否已移出；任务正在使用或落盘失败时返回 False
+        """
+        if task.is_dirty:
+            task.flush()
+        # 仍有未落盘修改或正在使用的任务等待下次清理
+        if task.is_dirty or not task.is_expired(0):
+            return False
+        task_id = task.jianyingProject.protocol.base_info.unique_id
+        with self.rwlock.gen_wlock():
+            if self.task_dict.get(task_id) is not task:
+                return True
+            task.evicted = True
+            del self.task_dict[task_id]
+        self._untrack_task(task)
+        # 释放撤销历史（重新加载后历史为空）和下载记录（未完成的下载继续执行）
+        task.clear_history()
+        media_prefetcher.forget(task_id, cancel=False)
+        with self._stats_lock:
+            if reason == 'idle':
+                self.idle_evictions += 1
+            else:
+                self.budget_evictions += 1
+        logger.info(f"Remove task from memory: {task_id} ({reason})")
+        return True
+    
+    def _destroy_marked_tasks(self):
+        """移除并销毁标记删除且空闲的任务（正在使用的任务留待下次清理）"""
+        for _ in range(len(self._pending_deletions)):
+            task = self._pending_deletions.popleft()
+            if not task.is_expired(0):
+                self._pending_deletions.append(task)
+                continue
+            task_id = task.jianyingProject.protocol.base_info.unique_id
+            with self.rwlock.gen_wlock():
+                if self.task_dict.get(task_id) is task:
+                    task.evicted = True
+                    del self.task_dict[task_id]
+                    logger.info(f"Remove task from memory: {task_id}")
+            self._untrack_task(task)
+            # 销毁任务（在锁外执行，避免阻塞）
             try:
                 task.destroy()
                 logger.info(f"Destroy task: {task_id}")
             except Exception as e:
                 logger.error(f"Destroy task failed: {task_id}, {e}")
     
+    def _over_budget(self) -> bool:
+        """驻留任务数或估算内存是否超出上限"""
+        if TASK_MAX_RESIDENT > 0 and len(self.task_dict) > TASK_MAX_RESIDENT:
+            return True
+        return TASK_MAX_RESIDENT_SIZE > 0 and self._resident_bytes > TASK_MAX_RESIDENT_SIZE * 1024 * 1024
+    
+    def _push_expiry(self, task: JianYingTask):
+        with self._expiry_lock:
+            heapq.heappush(self._expiry_heap, (task.last_access_time, next(self._expiry_seq), task))
+    
+    def _track_task(self, task: JianYingTask):
+        """登记新驻留的任务：加入到期堆并计入估算内存"""
+        size = task.memory_size
+        with self._expiry_lock:
+            heapq.heappush(self._expiry_heap, (task.last_access_time, next(self._expiry_seq), task))
+            task.accounted_size = size
+            self._resident_bytes += size
+        self._notify_cleanup()
+    
+    def _account_task(self, task: JianYingTask):
+        """写操作后更新任务的估算内存"""
+        size = task.memory_size
+        with self._expiry_lock:
+            if task.evicted:
+                return
+            self._resident_bytes += size - task.accounted_size
+            task.accounted_size = size
+        self._notify_cleanup()
+    
+    def _untrack_task(self, task: JianYingTask):
+        """任务移出内存后扣除估算内存（到期堆中的记录弹出时丢弃）"""
+        with self._expiry_lock:
+            self._resident_bytes -= task.accounted_size
+            task.accounted_size = 0
+    
     def create_task(self, baseInfo: JianYingBaseInfo) -> str:
         """
         创建新任务
@@ -144,7 +438,8 @@ class TaskManager:
             
             self.task_dict[task_id] = task
             logger.info(f"Create task: {task_id}")
-            return task_id
+        self._track_task(task)
+        return task_id
     
     def remove_task(self, task_id: str):
         """
@@ -158,8 +453,10 @@ class TaskManager:
             task = self.task_dict.get(task_id)
         
         if task:
-            # 标记删除（无需锁，原子操作）
+            # 标记删除（无需锁，原子操作），由后台清理线程在任务空闲后销毁
             task.marked_for_deletion = True
+            self._pending_deletions.append(task)
+            self._cleanup_event.set()
             logger.info(f"Mark task for deletion: {task_id}")
         else:
             # 任务不在内存，直接删除磁盘上的孤儿文件
@@ -181,57 +478,115 @@ class TaskManager:
             logger.error(f"从磁盘加载任务失败: {task_id}, {e}")
             return None
     
+    def _find_task(self, task_id: str) -> JianYingTask | None:
+        """
+        查找任务（内存优先，内存中没有则从磁盘加载）
+        
+        返回 None 表示任务不存在或已标记删除
+        """
+        # 步骤1：从内存获取任务（快速路径 - 读锁）
+        with self.rwlock.gen_rlock():
+            task = self.task_dict.get(task_id)
+        if task:
+            # 拒绝访问已标记删除的任务
+            return None if task.marked_for_deletion else task
+        
+        # 步骤2：从磁盘加载（慢速路径，在锁外执行）
+        start = time.perf_counter()
+        task = self._load_task_from_disk(task_id)
+        if not task:
+            return None
+        elapsed = time.perf_counter() - start
+        
+        # 步骤3：插入字典（写锁）
+        with self.rwlock.gen_wlock():
+            # 双重检查：可能其他线程已加载
+            if task_id in self.task_dict:
+                return self.task_dict[task_id]
+            self.task_dict[task_id] = task
+        logger.info(f"Load task from disk: {task_id}, {elapsed * 1000:.1f}ms")
+        with self._stats_lock:
+            self.reloads += 1
+            self.reload_seconds += elapsed
+            self.reload_max_seconds = max(self.reload_max_seconds, elapsed)
+        self._track_task(task)
+        return task
+    
     @contextmanager
     def get_task(self, task_id: str):
         """
-        获取任务（上下文管理器）
+        获取任务（上下文管理器，写锁）
+        
+        上下文内抛出异常会撤销本次的所有修改，恢复到进入前的数据（见 JianYingTask.acquire）
         
         Usage:
             with taskManager.get_task(task_id) as task:
                 if task:
                     # 操作任务（自动加锁，多线程安全）
-                    task.jianyingProject.save()
+                    task.jianyingProject.protocol.add_track('video')
         
         说明：
         1. 使用读锁访问 task_dict，支持并发读取
-        2. 自动加锁，多线程访问同一任务会排队
+        2. 自动加任务写锁，多线程访问同一任务会排队
         3. 自动更新访问时间，防止被清理
         4. 如果内存中没有，自动从磁盘加载
         5. 拒绝访问已标记删除的任务
         """
-        # 步骤1：从内存获取任务（快速路径 - 读锁）
-        task = None
-        with self.rwlock.gen_rlock():
-            if task_id in self.task_dict:
-                task = self.task_dict[task_id]
-                # 拒绝访问已标记删除的任务
-                if task.marked_for_deletion:
-                    yield None
-                    return
-        
-        # 如果找到任务，在锁外获取任务锁（避免嵌套锁）
-        if task:
-            with task.acquire():
-                yield task
+        task = self._find_task(task_id)
+        if not task:
+            yield None
             return
         
-        # 步骤2：从磁盘加载（慢速路径，在锁外执行）
-        task = self._load_task_from_disk(task_id)
+        # 在 task_dict 锁外获取任务锁（避免嵌套锁）
+        with task.acquire():
+            yield task
+        self._account_task(task)
+        self._notify_flush(task)
+    
+    @contextmanager
+    def get_task_readonly(self, task_id: str):
+        """
+        获取任务（上下文管理器，读锁）
         
+        用于只读接口：同一任务的多个读请求可并发执行，不触发落盘。
+        禁止在此上下文中修改任务数据。
+        
+        Usage:
+            with taskManager.get_task_readonly(task_id) as task:
+                if task:
+                    tracks = task.jianyingProject.protocol.get_track_list()
+        """
+        task = self._find_task(task_id)
         if not task:
             yield None
             return
         
-        # 步骤3：插入字典（写锁）
-        with self.rwlock.gen_wlock():
-            # 双重检查：可能其他线程已加载
-            if task_id in self.task_dict:
-                task = self.task_dict[task_id]
-            else:
-                self.task_dict[task_id] = task
-                logger.info(f"Load task from disk: {task_id}")
-        
-        # 步骤4：获取任务锁并使用
-        with task.acquire():
+        with task.acquire_readonly():
             yield task
+    
+    def get_stats(self) -> dict:
+        """获取驻留任务和移出/重新加载统计"""
+        with self._stats_lock:
+            return {
+                'resident_tasks': len(self.task_dict),
+                'resident_bytes': self._resident_bytes,
+                'max_resident_tasks': TASK_MAX_RESIDENT,
+                'max_resident_bytes': int(TASK_MAX_RESIDENT_SIZE * 1024 * 1024),
+                'idle_time': TASK_IDLE_TIME,
+                'idle_evictions': self.idle_evictions,
+                'budget_evictions': self.budget_evictions,
+                'reloads': self.reloads,
+                'reload_avg_ms': round(self.reload_seconds / self.reloads * 1000, 1) if self.reloads else 0,
+                'reload_max_ms': round(self.reload_max_seconds * 1000, 1)
+            }
+    
+    def _notify_cleanup(self):
+        """驻留任务数或估算内存超出上限时唤醒后台清理线程"""
+        if self._over_budget():
+            self._cleanup_event.set()
+    
+    def _notify_flush(self, task: JianYingTask):
+        """修改次数达到阈值或操作日志需要压缩时唤醒后台落盘线程"""
+        if task.pending_edits >= TASK_FLUSH_MAX_EDITS or task.jianyingProject.journal.needs_compaction:
+            self._flush_event.set()
 
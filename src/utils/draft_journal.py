@@ -0,0 +1,317 @@
+"""
+草稿操作日志（WAL，每个工程一个）
+
+每次写操作成功后，本次操作对草稿数据的修改（轨道增删、片段增删改、素材增删改、
+素材元信息和虚拟素材库的增删）作为一条记录追加到工程目录下的操作日志并 fsync，
+写入量只与修改量有关，与草稿大小无关。完整的三个 JSON 文件只在日志超过压缩阈值、
+任务移出内存或服务关闭时重写（压缩），重写后清空日志。
+
+加载工程时读取 JSON 文件后按顺序重放日志。重放只在日志对应的 JSON（上次压缩的结果）上执行：
+按位置插入（撤销删除轨道、片段等）重放到已包含这些修改的新 JSON 上会放错位置，
+因此压缩时三个 JSON 整体替换（见 DraftJournal.compact），重写 JSON 后、清空日志前崩溃时
+加载工程先完成替换并清空日志（见 DraftJournal.recover），不会重复重放。
+
+日志格式：每行一条记录 "<crc32 十六进制> <JSON>\\n"，JSON 为 {"ops": [[操作, 参数...]], "duration": 工程时长}。
+末尾不完整或校验失败的记录（写入时崩溃）被丢弃。
+"""
+import os
+import zlib
+import logging
+from utils.json_utils import json_dumps, json_loads
+
+logger = logging.getLogger(__name__)
+
+
+# 是否启用操作日志（关闭时退化为写后落盘完整 JSON，已有日志仍会在加载时重放）
+TASK_WAL_ENABLED = os.getenv('TASK_WAL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 每条记录追加后 fsync（关闭后断电可能丢失最近的修改，进程崩溃不受影响）
+TASK_WAL_FSYNC = os.getenv('TASK_WAL_FSYNC', 'true').lower() in ('1', 'true', 'yes')
+# 日志大小（MB）或记录数超过阈值时压缩：重写完整 JSON 并清空日志
+TASK_WAL_COMPACT_SIZE = int(os.getenv('TASK_WAL_COMPACT_SIZE', '8'))
+TASK_WAL_COMPACT_RECORDS = int(os.getenv('TASK_WAL_COMPACT_RECORDS', '1000'))
+
+
+class DraftJournal:
+    """
+    单个工程的操作日志
+
+    非线程安全：追加在任务写锁内执行，重写 JSON 后清空日志在任务读锁 + 落盘锁内执行，二者互斥。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0  # 日志字节数
+        self.records = 0  # 日志记录数
+
+    @property
+    def needs_compaction(self) -> bool:
+        """是否需要压缩（日志关闭时只要有遗留记录就压缩）"""
+        if not self.records:
+            return False
+        if not TASK_WAL_ENABLED:
+            return True
+        return self.size >= TASK_WAL_COMPACT_SIZE * 1024 * 1024 or self.records >= TASK_WAL_COMPACT_RECORDS
+
+    def read(self) -> list[dict]:
+        """读取所有有效记录（截断末尾损坏的记录）"""
+        records = []
+        valid_size = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                content = f.read()
+            for line in content.splitlines(keepends=True):
+                record = self._decode(line)
+                if record is None:
+                    logger.warning(f"操作日志末尾记录损坏，已丢弃: {self.path}, offset={valid_size}")
+                    break
+                records.append(record)
+                valid_size += len(line)
+            if valid_size < len(content):
+                os.truncate(self.path, valid_size)
+        self.size = valid_size
+        self.records = len(records)
+        return records
+
+    def append(self, record: dict):
+        """追加一条记录并 fsync"""
+        payload = json_dumps(record)
+        line = b'%08x %s\n' % (zlib.crc32(payload), payload)
+        with open(self.path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            if TASK_WAL_FSYNC:
+                os.fsync(f.fileno())
+        self.size += len(line)
+        self.records += 1
+
+    def reset(self):
+        """清空日志（完整 JSON 已落盘后调用）"""
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            with open(self.path, 'wb') as f:
+                os.fsync(f.fileno())
+        self.size = 0
+        self.records = 0
+
+    # ========== 压缩（三个 JSON 整体替换） ==========
+    @staticmethod
+    def staged_path(path: str) -> str:
+        """压缩时新 JSON 的暂存路径（.tmp_ 前缀，导出时跳过）"""
+        return os.path.join(os.path.dirname(path), f'.tmp_compact_{os.path.basename(path)}')
+
+    @property
+    def _commit_path(self) -> str:
+        """压缩提交标记：存在时暂存的新 JSON 已全部写完，包含日志中的所有修改"""
+        return os.path.join(os.path.dirname(self.path), '.tmp_compact_commit')
+
+    def compact(self, paths: list[str]):
+        """
+        新 JSON 已全部写入暂存路径（staged_path）后调用：写入提交标记，替换 JSON，清空日志，删除标记
+
+        写入标记之前崩溃：磁盘上仍是旧 JSON + 完整日志；之后崩溃：加载时完成剩余的替换（见 recover）。
+        """
+        with open(self._commit_path, 'wb') as f:
+            os.fsync(f.fileno())
+        _fsync_dir(os.path.dirname(self.path))
+        self._finish_compaction(paths)
+
+    def recover(self, paths: list[str]):
+        """加载工程前调用：处理压缩过程中崩溃留下的暂存文件"""
+        if os.path.exists(self._commit_path):
+            logger.warning(f"完成上次中断的操作日志压缩: {self.path}")
+            self._finish_compaction(paths)
+            return
+        # 未提交的暂存 JSON 不完整，丢弃
+        for path in paths:
+            staged = self.staged_path(path)
+            if os.path.exists(staged):
+                os.remove(staged)
+
+    def _finish_compaction(self, paths: list[str]):
+        # 已替换的文件暂存路径不存在，重复执行时跳过
+        for path in paths:
+            staged = self.staged_path(path)
+            if os.path.exists(staged):
+                os.replace(staged, path)
+        _fsync_dir(os.path.dirname(self.path))
+        self.reset()
+        os.remove(self._commit_path)
+
+    @staticmethod
+    def _decode(line: bytes) -> dict | None:
+        if not line.endswith(b'\n') or line[8:9] != b' ':
+            return None
+        payload = line[9:-1]
+        try:
+            if int(line[:8], 16) != zlib.crc32(payload):
+                return None
+            return json_loads(payload)
+        except ValueError:
+            return None
+
+
+def _fsync_dir(path: str):
+    """fsync 目录，确保之前的创建、重命名已落盘"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _JournalReplayer:
+    """
+    在上次压缩的草稿数据上重放操作日志（构建 JianYingProtocol 之前执行）
+
+    新增时 ID 已存在则覆盖，修改写入操作结束时的数据，删除时不存在则跳过。
+    """
+
+    def __init__(self, draft_info: dict, draft_meta_info: dict, draft_virtual_store: dict):
+        self.draft_info = draft_info
+        self.tracks = draft_info['tracks']
+        self.materials = draft_info['materials']
+        self.meta_infos = draft_meta_info['draft_materials'][0]['value']
+        self.folders = draft_virtual_store['draft_virtual_store'][0]['value']
+        self.relations = draft_virtual_store['draft_virtual_store'][1]['value']
+        self.track_index = {track['id']: track for track in self.tracks}
+        self.segment_index = {
+            segment['id']: segment for track in self.tracks for segment in track['segments']
+        }
+        self.material_index = {
+            material['id']: material for materials in self.materials.values() for material in materials
+        }
+        self.meta_info_index = {meta_info['id']: meta_info for meta_info in self.meta_infos}
+        self.folder_index = {folder['id']: folder for folder in self.folders}
+        self.relation_index = {relation['child_id']: relation for relation in self.relations}
+
+    def apply(self, record: dict):
+        for op, *args in record['ops']:
+            getattr(self, f'_{op}')(*args)
+        self.draft_info['duration'] = record['duration']
+
+    @staticmethod
+    def _replace(target: dict, value: dict):
+        """原地覆盖（保持对象不变，无需查找列表位置）"""
+        target.clear()
+        target.update(value)
+
+    @staticmethod
+    def _remove(items: list, target: dict):
+        """按对象删除列表元素（只比较引用）"""
+        del items[next(i for i, item in enumerate(items) if item is target)]
+
+    @staticmethod
+    def _insert(items: list, item: dict, position: int | None):
+        """追加或插入到指定位置（撤销删除时记录原位置）"""
+        if position is None:
+            items.append(item)
+        else:
+            items.insert(position, item)
+
+    # ========== 轨道 ==========
+    def _track_add(self, index: int, track: dict):
+        if track['id'] in self.track_index:
+            return
+        if index == -1:
+            self.tracks.append(track)
+        else:
+            self.tracks.insert(index, track)
+        self.track_index[track['id']] = track
+        # 撤销删除轨道时记录的是完整轨道
+        for segment in track['segments']:
+            self.segment_index[segment['id']] = segment
+
+    def _track_remove(self, track_id: str):
+        track = self.track_index.pop(track_id, None)
+        if track is None:
+            return
+        self._remove(self.tracks, track)
+        for segment in track['segments']:
+            self.segment_index.pop(segment['id'], None)
+
+    # ========== 片段 ==========
+    def _segment_add(self, track_id: str, segment: dict, position: int | None = None):
+        existing = self.segment_index.get(segment['id'])
+        if existing is not None:
+            self._replace(existing, segment)
+            return
+        track = self.track_index.get(track_id)
+        if track is None:
+            return  # 轨道在之后的操作中被删除（JSON 已包含该删除）
+        if position is None:
+            track['segments'].append(segment)
+        else:
+            track['segments'].insert(position, segment)  # 撤销删除片段：放回原位置
+        self.segment_index[segment['id']] = segment
+
+    def _segment_put(self, track_id: str, segment: dict):
+        existing = self.segment_index.get(segment['id'])
+        if existing is not None:
+            self._replace(existing, segment)
+
+    def _segment_remove(self, track_id: str, segment_id: str):
+        segment = self.segment_index.pop(segment_id, None)
+        track = self.track_index.get(track_id)
+        if segment is not None and track is not None:
+            self._remove(track['segments'], segment)
+
+    # ========== 素材 ==========
+    def _material_add(self, material_type: str, material: dict, position: int | None = None):
+        existing = self.material_index.get(material['id'])
+        if existing is not None:
+            self._replace(existing, material)
+            return
+        self._insert(self.materials[material_type], material, position)
+        self.material_index[material['id']] = material
+
+    def _material_put(self, material_type: str, material: dict):
+        existing = self.material_index.get(material['id'])
+        if existing is not None:
+            self._replace(existing, material)
+
+    def _material_remove(self, material_type: str, material_id: str):
+        material = self.material_index.pop(material_id, None)
+        if material is not None:
+            self._remove(self.materials[material_type], material)
+
+    # ========== 素材元信息和虚拟素材库 ==========
+    def _meta_info_add(self, meta_info: dict, position: int | None = None):
+        existing = self.meta_info_index.get(meta_info['id'])
+        if existing is not None:
+            self._replace(existing, meta_info)
+            return
+        self._insert(self.meta_infos, meta_info, position)
+        self.meta_info_index[meta_info['id']] = meta_info
+
+    def _meta_info_remove(self, meta_id: str):
+        meta_info = self.meta_info_index.pop(meta_id, None)
+        if meta_info is not None:
+            self._remove(self.meta_infos, meta_info)
+
+    def _folder_add(self, folder: dict, position: int | None = None):
+        if folder['id'] not in self.folder_index:
+            self._insert(self.folders, folder, position)
+            self.folder_index[folder['id']] = folder
+
+    def _folder_remove(self, folder_id: str):
+        folder = self.folder_index.pop(folder_id, None)
+        if folder is not None:
+            self._remove(self.folders, folder)
+
+    def _relation_add(self, relation: dict, position: int | None = None):
+        if relation['child_id'] not in self.relation_index:
+            self._insert(self.relations, relation, position)
+            self.relation_index[relation['child_id']] = relation
+
+    def _relation_remove(self, child_id: str):
+        relation = self.relation_index.pop(child_id, None)
+        if relation is not None:
+            self._remove(self.relations, relation)
+
+
+def replay_journal(records: list[dict], draft_info: dict, draft_meta_info: dict, draft_virtual_store: dict):
+    """在从 JSON 加载的草稿数据上按顺序重放操作日志（原地修改）"""
+    if not records:
+        return
+    replayer = _JournalReplayer(draft_info, draft_meta_info, draft_virtual_store)
+    for record in records:
+        replayer.apply(record)
@@ -3,8 +3,9 @@ from urllib.parse import urlparse, unquote
 import logging
 import json
 import hashlib
+import shutil
 import uuid
-import subprocess
+from utils.json_utils import json_dumps, json_loads, JSON_COMPACT
 logger = logging.getLogger(__name__)
 
 # 缓存目录（绝对路径）
@@ -15,6 +16,12 @@ CACHE_DIR = os.path.normpath(
     )
 )
 
+# 导出快照目录（与工程目录在同一文件系统，素材通过硬链接引用）
+SNAPSHOT_DIR = os.path.join(os.path.dirname(CACHE_DIR), 'export_snapshot')
+
+# 草稿操作日志（WAL）文件名，位于工程目录下，不导出
+DRAFT_JOURNAL_FILE_NAME = 'draft_journal.wal'
+
 
 # ==================== 工具函数 ====================
 
@@ -48,76 +55,29 @@ def get_media_duration(media_path: str) -> int:
     使用 ffprobe 获取音视频时长（毫秒）
     
     统一处理音频和视频文件，支持本地文件和 URL。
+    远程文件只范围读取文件头，结果按 URL 缓存（见 utils.media_probe）。
     
     Args:
         media_path: 媒体文件路径（本地路径或 URL）
     
     Returns:
-        时长（毫秒），失败返回 0
+        时长（毫秒）
     
     Raises:
         Exception: 当 ffprobe 执行失败、超时或输出无法解析时
     """
-    import tempfile
-    from utils.oss_utils import OssMixin
-    
-    temp_path = None
-    try:
-        # 如果是 URL，先下载到临时文件
-        if media_path.startswith('http://') or media_path.startswith('https://'):
-            oss = OssMixin()
-            with tempfile.NamedTemporaryFile(suffix=get_file_extension(media_path), delete=False) as tmp_file:
-                temp_path = tmp_file.name
-            oss.get_object_file(media_path, temp_path)
-            target_path = temp_path
-        else:
-            target_path = media_path
-        
-        # 使用 ffprobe 获取时长
-        cmd = [
-            'ffprobe',
-            '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'json',
-            target_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        
-        if result.returncode != 0:
-            raise Exception(f"ffprobe failed - exit code: {result.returncode}, error: {result.stderr}")
-        
-        data = json.loads(result.stdout)
-        duration = int(float(data['format']['duration']) * 1000)
-        
-        logger.info(f"Media duration: {media_path} -> {duration}ms")
-        return duration
-        
-    except subprocess.TimeoutExpired:
-        logger.error(f"ffprobe timeout (10s) - {media_path}")
-        raise Exception(f"ffprobe timeout (10s) - {media_path}")
-    except json.JSONDecodeError as e:
-        logger.error(f"ffprobe JSON parse failed: {e}, output: {result.stdout}")
-        raise Exception(f"ffprobe JSON parse failed: {e}, output: {result.stdout}")
-    except Exception as e:
-        logger.error(f"Get media duration failed: {media_path}, {e}")
-        raise
-    finally:
-        # 清理临时文件
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except Exception as e:
-                logger.warning(f"Failed to remove temp file: {temp_path}, {e}")
+    from utils.media_probe import probe_media
+    return probe_media(media_path)['duration']
     
 def load_json_data(path: str) -> dict:
     """加载 JSON 文件，失败时抛出异常"""
     if not os.path.exists(path):
         raise FileNotFoundError(f"File not found: {path}")
+    with open(path, 'rb') as f:
+        content = f.read()
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
+        return json_loads(content)
+    except ValueError as e:
         raise ValueError(f"Invalid JSON in {path}: {e}") from e
     
 def get_project_path(unique_id: str) -> str:
@@ -128,6 +88,23 @@ def get_resource_path(unique_id: str) -> str:
     """获取资源目录路径"""
     return os.path.join(get_project_path(unique_id), 'Resources')
 
+def get_snapshot_path(snapshot_id: str) -> str:
+    """获取导出快照目录路径"""
+    return os.path.join(SNAPSHOT_DIR, snapshot_id)
+
+def clear_snapshots():
+    """清理所有导出快照（服务启动时调用，上次未完成的导出不会再执行）"""
+    shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+
+def link_file(src: str, dest: str):
+    """硬链接文件（目标已存在时覆盖），失败时（如跨文件系统）退化为复制"""
+    if os.path.exists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
 def get_draft_path(project_path: str) -> str:
     """获取 draft_info.json 路径"""
     return os.path.join(project_path, 'draft_info.json')
@@ -140,6 +117,46 @@ def get_draft_virtual_store_path(project_path: str) -> str:
     """获取 draft_virtual_store.json 路径"""
     return os.path.join(project_path, 'draft_virtual_store.json')
 
+def get_draft_journal_path(project_path: str) -> str:
+    """获取草稿操作日志（WAL）路径"""
+    return os.path.join(project_path, DRAFT_JOURNAL_FILE_NAME)
+
+def iter_project_files(project_path: str):
+    """遍历工程目录下需要导出的文件，返回 (绝对路径, 压缩包内路径)，跳过临时文件和操作日志"""
+    for root, dirs, files in os.walk(project_path):
+        dirs.sort()
+        for file in sorted(files):
+            if file.startswith('.tmp_') or file == DRAFT_JOURNAL_FILE_NAME:
+                continue
+            file_path = os.path.join(root, file)
+            yield file_path, os.path.relpath(file_path, project_path)
+
+def get_zip_compress_type(path: str) -> int:
+    """压缩方式：JSON 使用 deflate，媒体文件本身已压缩，只存储"""
+    import zipfile
+    if get_file_extension(path) == '.json':
+        return zipfile.ZIP_DEFLATED
+    return zipfile.ZIP_STORED
+
+# 文件内容哈希缓存：(设备, inode, 大小, 修改时间) -> sha256
+_file_sha256_cache: dict[tuple, str] = {}
+
+def get_file_sha256(path: str) -> str:
+    """计算文件 SHA-256（按 inode + 大小 + 修改时间缓存，硬链接共享的文件只计算一次）"""
+    stat = os.stat(path)
+    key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    digest = _file_sha256_cache.get(key)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        if len(_file_sha256_cache) >= 100000:
+            _file_sha256_cache.clear()
+        _file_sha256_cache[key] = digest
+    return digest
+
 def url_to_filename(url: str) -> str:
     """URL → 唯一文件名 (name_hash.ext)"""
     decoded_url = unquote(url)
@@ -243,6 +260,11 @@ def build_media_segment(
         'extra_material_refs': []
     }
     
+def get_segment_end_time(segment: dict) -> int:
+    """获取片段在时间线上的结束时间（微秒）"""
+    target_timerange = segment['target_timerange']
+    return target_timerange['start'] + target_timerange['duration']
+
 def build_segmen_no_source(
     material_id: str, 
     offset_time: int, 
@@ -420,6 +442,8 @@ def write_json_file(data: dict, path: str):
     1. 写入过程中崩溃不会损坏原文件
     2. 多进程不会产生竞争
     3. 断电时数据已落盘
+    
+    序列化后端见 utils.json_utils，JSON_COMPACT=true 时不缩进
     """
     import tempfile
     
@@ -429,8 +453,8 @@ def write_json_file(data: dict, path: str):
     
     try:
         # 写入临时文件
-        with os.fdopen(fd, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json_dumps(data, indent=not JSON_COMPACT))
             f.flush()
             os.fsync(f.fileno())  # 强制刷新到磁盘
         
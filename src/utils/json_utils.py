@@ -0,0 +1,97 @@
+"""
+JSON 序列化后端（草稿落盘、加载、接口响应共用）
+
+按 JSON_BACKEND 选择实现，默认 auto：orjson > msgspec > 标准库 json。
+orjson / msgspec 为可选依赖，未安装时自动使用标准库；
+遇到后端不支持的数据（如超过 64 位的整数）时，单次调用退化为标准库。
+
+输出统一为 UTF-8 字节（不转义非 ASCII 字符），indent=True 时缩进 2 个空格。
+"""
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 序列化后端：auto / orjson / msgspec / json
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto').lower()
+# 草稿落盘使用紧凑格式（不缩进，文件更小、写入更快）
+JSON_COMPACT = os.getenv('JSON_COMPACT', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _std_dumps(data, indent: bool = False) -> bytes:
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _std_loads(data):
+    return json.loads(data)
+
+
+def _load_backend():
+    """按配置加载后端，返回 (名称, dumps, loads, 解析错误类型)"""
+    candidates = ['orjson', 'msgspec'] if JSON_BACKEND == 'auto' else [JSON_BACKEND]
+    for name in candidates:
+        if name == 'json':
+            break
+        try:
+            if name == 'orjson':
+                import orjson
+
+                def orjson_dumps(data, indent: bool = False) -> bytes:
+                    try:
+                        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+                    except TypeError:
+                        return _std_dumps(data, indent)
+
+                return 'orjson', orjson_dumps, orjson.loads, (orjson.JSONDecodeError,)
+            if name == 'msgspec':
+                import msgspec
+                encoder = msgspec.json.Encoder()
+                decoder = msgspec.json.Decoder()
+
+                def msgspec_dumps(data, indent: bool = False) -> bytes:
+                    try:
+                        buf = encoder.encode(data)
+                    except (TypeError, OverflowError, msgspec.EncodeError):
+                        return _std_dumps(data, indent)
+                    return msgspec.json.format(buf, indent=2) if indent else buf
+
+                return 'msgspec', msgspec_dumps, decoder.decode, (msgspec.DecodeError,)
+            logger.warning(f"未知的 JSON_BACKEND: {name}，使用标准库 json")
+        except ImportError:
+            if JSON_BACKEND != 'auto':
+                logger.warning(f"JSON 后端 {name} 未安装，使用标准库 json")
+    return 'json', _std_dumps, _std_loads, (json.JSONDecodeError,)
+
+
+JSON_BACKEND_NAME, _dumps, _loads, _decode_errors = _load_backend()
+logger.info(f"JSON 序列化后端: {JSON_BACKEND_NAME}")
+
+
+def json_dumps(data, indent: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 JSON 字节
+
+    Args:
+        data: 可 JSON 序列化的数据（dict/list/str/数字等）
+        indent: 是否缩进 2 个空格
+    """
+    return _dumps(data, indent)
+
+
+def json_loads(data: bytes | str):
+    """
+    解析 JSON
+
+    Raises:
+        ValueError: JSON 格式错误
+    """
+    try:
+        return _loads(data)
+    except _decode_errors as e:
+        if isinstance(e, ValueError):
+            raise
+        raise ValueError(str(e)) from e
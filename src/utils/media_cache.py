@@ -0,0 +1,197 @@
+"""
+全局媒体缓存（跨任务共享）
+
+远程素材按 URL 哈希（`url_to_filename`）存放在全局缓存目录，各工程的 `Resources/`
+通过硬链接引用缓存文件（跨文件系统时退化为复制）。多个草稿使用同一片头、BGM 时
+只下载、只存储一份。
+
+- LRU 淘汰：缓存总大小超过上限时按最近使用时间淘汰（已链接到工程中的文件不受影响）
+- 统计信息：命中次数、未命中次数、节省的下载/存储字节数
+"""
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable
+from utils.function_utils import CACHE_DIR, url_to_filename, link_file
+
+logger = logging.getLogger(__name__)
+
+
+# 全局媒体缓存目录
+MEDIA_CACHE_DIR = os.getenv(
+    'MEDIA_CACHE_DIR',
+    os.path.join(os.path.dirname(CACHE_DIR), 'media_cache')
+)
+# 缓存大小上限（MB），<=0 表示关闭全局缓存，直接下载到工程目录
+MEDIA_CACHE_MAX_SIZE = int(os.getenv('MEDIA_CACHE_MAX_SIZE', '10240'))
+
+
+class MediaCache:
+    """全局媒体缓存 - 线程安全"""
+
+    def __init__(self, cache_dir: str = MEDIA_CACHE_DIR, max_size_mb: int = MEDIA_CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        # 缓存文件名 -> 文件大小，按最近使用排序（末尾为最近使用）
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        # 正在下载或链接中的文件名 -> [锁, 使用者数量]，淘汰时跳过
+        self._pinned: dict[str, list] = {}
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def fetch(self, url: str, dest_path: str, download: Callable[[str, str], object]):
+        """
+        获取远程素材到工程目录
+
+        Args:
+            url: 素材 URL
+            dest_path: 工程内目标路径
+            download: 下载函数 download(url, local_path)
+        """
+        if not self.enabled:
+            download(url, dest_path)
+            return
+        with self.cached_file(url, download) as cache_path:
+            self._link(cache_path, dest_path)
+
+    @contextmanager
+    def cached_file(self, url: str, download: Callable[[str, str], object]):
+        """
+        获取素材在缓存中的路径（未缓存时下载），上下文内文件不会被淘汰
+
+        Usage:
+            with media_cache.cached_file(url, download) as cache_path:
+                probe(cache_path)
+        """
+        self._ensure_loaded()
+        file_name = url_to_filename(url)
+        cache_path = os.path.join(self.cache_dir, file_name)
+        key_lock = self._pin(file_name)
+        try:
+            # 同一 URL 并发请求只下载一次
+            with key_lock:
+                with self._lock:
+                    size = self._entries.get(file_name)
+                    if size is not None:
+                        self._entries.move_to_end(file_name)
+                        self.hits += 1
+                        self.bytes_saved += size
+                if size is None:
+                    size = self._download(url, cache_path, download)
+                    with self._lock:
+                        self._entries[file_name] = size
+                        self._total_bytes += size
+                        self.misses += 1
+                    logger.info(f"媒体缓存未命中，已下载: {url}, {size} bytes")
+                else:
+                    logger.info(f"媒体缓存命中: {url}")
+            yield cache_path
+        finally:
+            self._unpin(file_name)
+            self._evict()
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息"""
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_saved': self.bytes_saved,
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    # ==================== 内部方法 ====================
+
+    def _ensure_loaded(self):
+        """扫描缓存目录（懒加载，按访问时间恢复 LRU 顺序）"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            files = []
+            for entry in os.scandir(self.cache_dir):
+                if not entry.is_file():
+                    continue
+                # 清理上次异常退出遗留的临时文件
+                if entry.name.startswith('.tmp_'):
+                    os.remove(entry.path)
+                    continue
+                stat = entry.stat()
+                files.append((stat.st_atime, entry.name, stat.st_size))
+            for _, file_name, size in sorted(files):
+                self._entries[file_name] = size
+                self._total_bytes += size
+            self._loaded = True
+            logger.info(f"媒体缓存加载完成: {self.cache_dir}, {len(self._entries)} 个文件, {self._total_bytes} bytes")
+
+    def _pin(self, file_name: str) -> threading.Lock:
+        with self._lock:
+            pinned = self._pinned.setdefault(file_name, [threading.Lock(), 0])
+            pinned[1] += 1
+            return pinned[0]
+
+    def _unpin(self, file_name: str):
+        with self._lock:
+            pinned = self._pinned[file_name]
+            pinned[1] -= 1
+            if pinned[1] == 0:
+                del self._pinned[file_name]
+
+    def _download(self, url: str, cache_path: str, download: Callable[[str, str], object]) -> int:
+        """下载到临时文件后原子替换，返回文件大小"""
+        temp_path = os.path.join(self.cache_dir, f'.tmp_{os.path.basename(cache_path)}')
+        try:
+            download(url, temp_path)
+            os.replace(temp_path, cache_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return os.path.getsize(cache_path)
+
+    def _link(self, cache_path: str, dest_path: str):
+        """硬链接到工程目录，失败时（如跨文件系统）退化为复制"""
+        link_file(cache_path, dest_path)
+        # 刷新访问时间，重启后按此恢复 LRU 顺序（不修改 mtime：硬链接共享 inode，
+        # 工程内文件的 mtime 用于导出时的内容哈希缓存）
+        stat = os.stat(cache_path)
+        os.utime(cache_path, ns=(time.time_ns(), stat.st_mtime_ns))
+
+    def _evict(self):
+        """超出大小上限时按 LRU 顺序淘汰（跳过正在使用的文件）"""
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            for file_name in list(self._entries):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                if file_name in self._pinned:
+                    continue
+                size = self._entries.pop(file_name)
+                self._total_bytes -= size
+                try:
+                    os.remove(os.path.join(self.cache_dir, file_name))
+                except FileNotFoundError:
+                    pass
+                logger.info(f"媒体缓存淘汰: {file_name}, {size} bytes")
+
+
+# 进程内全局缓存实例
+media_cache = MediaCache()
@@ -0,0 +1,164 @@
+"""
+媒体预取（异步下载远程素材）
+
+添加媒体片段时只登记下载任务并立即返回草稿占位路径，实际下载在有界线程池中执行，
+不再占用任务写锁。导出前等待该任务的所有下载完成。
+
+下载状态按任务记录：
+- pending：等待下载或下载中
+- complete：已下载到工程 Resources/ 目录
+- failed：下载失败（记录错误信息，再次添加同一素材或导出时会重新下载）
+"""
+import os
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable
+from utils.media_cache import media_cache
+
+logger = logging.getLogger(__name__)
+
+
+# 下载线程池大小（所有任务共享）
+MEDIA_PREFETCH_POOL_SIZE = int(os.getenv('MEDIA_PREFETCH_POOL_SIZE', '4'))
+# 导出时等待素材下载的超时时间（秒）
+MEDIA_PREFETCH_TIMEOUT = float(os.getenv('MEDIA_PREFETCH_TIMEOUT', '600'))
+
+RESOURCE_PENDING = 'pending'
+RESOURCE_COMPLETE = 'complete'
+RESOURCE_FAILED = 'failed'
+
+
+class MediaPrefetcher:
+    """媒体预取器 - 线程安全"""
+
+    def __init__(self, pool_size: int = MEDIA_PREFETCH_POOL_SIZE):
+        self.pool_size = pool_size
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # task_id -> {url -> 下载记录}
+        self._tasks: dict[str, dict[str, dict]] = {}
+
+    def submit(self, task_id: str, url: str, dest_path: str, download: Callable[[str, str], object]):
+        """
+        登记下载任务（同一任务的同一 URL 正在下载或已下载时忽略）
+
+        目标文件已存在时只登记为已完成：检查文件和登记在同一把锁内，
+        之前被取消的下载完成时不会把重新添加的素材文件当作孤立文件删除
+
+        Args:
+            task_id: 任务ID
+            url: 素材 URL
+            dest_path: 工程内目标路径
+            download: 下载函数 download(url, local_path)
+        """
+        with self._lock:
+            resources = self._tasks.setdefault(task_id, {})
+            entry = resources.get(url)
+            if entry and entry['status'] == RESOURCE_PENDING:
+                return
+            if os.path.exists(dest_path):
+                if not entry or entry['status'] != RESOURCE_COMPLETE:
+                    future = Future()
+                    future.set_result(None)
+                    resources[url] = {
+                        'status': RESOURCE_COMPLETE,
+                        'error': None,
+                        'dest_path': dest_path,
+                        'cancelled': False,
+                        'future': future
+                    }
+                return
+            entry = {
+                'status': RESOURCE_PENDING,
+                'error': None,
+                'dest_path': dest_path,
+                'cancelled': False
+            }
+            resources[url] = entry
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.pool_size,
+                    thread_name_prefix='prefetch'
+                )
+            entry['future'] = self._executor.submit(self._run, task_id, url, entry, download)
+        logger.info(f"登记素材下载: {task_id}, {url}")
+
+    def cancel(self, task_id: str, url: str):
+        """取消下载（素材已从草稿删除），已在下载中的文件在完成后删除"""
+        with self._lock:
+            entry = self._tasks.get(task_id, {}).pop(url, None)
+            if entry:
+                entry['cancelled'] = True
+                entry['future'].cancel()
+
+    def forget(self, task_id: str, cancel: bool = True):
+        """
+        清除任务的所有下载记录
+
+        Args:
+            task_id: 任务ID
+            cancel: 是否取消未完成的下载（任务删除时）；任务移出内存时为 False，
+                未完成的下载继续执行并保留文件，重新加载后导出前会重新检查缺失的素材
+        """
+        with self._lock:
+            resources = self._tasks.pop(task_id, {})
+            if not cancel:
+                return
+            for entry in resources.values():
+                entry['cancelled'] = True
+                entry['future'].cancel()
+
+    def wait(self, task_id: str, timeout: float = MEDIA_PREFETCH_TIMEOUT) -> dict:
+        """
+        等待任务的所有下载完成
+
+        Returns:
+            下载状态（同 get_status）
+        """
+        with self._lock:
+            futures = [entry['future'] for entry in self._tasks.get(task_id, {}).values()]
+        if futures:
+            wait(futures, timeout=timeout)
+        return self.get_status(task_id)
+
+    def get_status(self, task_id: str) -> dict:
+        """获取任务的下载状态"""
+        with self._lock:
+            resources = [
+                {'url': url, 'status': entry['status'], 'error': entry['error']}
+                for url, entry in self._tasks.get(task_id, {}).items()
+            ]
+        counts = {RESOURCE_PENDING: 0, RESOURCE_COMPLETE: 0, RESOURCE_FAILED: 0}
+        for resource in resources:
+            counts[resource['status']] += 1
+        return {**counts, 'resources': resources}
+
+    def shutdown(self):
+        """服务关闭：丢弃未开始的下载（导出时会重新下载缺失的素材）"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ==================== 内部方法 ====================
+
+    def _run(self, task_id: str, url: str, entry: dict, download: Callable[[str, str], object]):
+        try:
+            media_cache.fetch(url, entry['dest_path'], download)
+            status, error = RESOURCE_COMPLETE, None
+            logger.info(f"素材下载完成: {task_id}, {url}")
+        except Exception as e:
+            status, error = RESOURCE_FAILED, str(e)
+            logger.error(f"素材下载失败: {task_id}, {url}, {e}")
+        with self._lock:
+            entry['status'] = status
+            entry['error'] = error
+            # 下载期间素材已被删除，且没有重新登记（在锁内删除，避免删除重新登记后下载的文件）
+            if entry['cancelled'] and url not in self._tasks.get(task_id, {}) and os.path.exists(entry['dest_path']):
+                os.remove(entry['dest_path'])
+
+
+# 进程内全局预取器实例
+media_prefetcher = MediaPrefetcher()
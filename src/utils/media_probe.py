@@ -0,0 +1,266 @@
+"""
+媒体信息探测（时长、宽高）
+
+- 远程素材：ffprobe 直接读取签名 URL，通过 HTTP Range 只拉取文件头/moov 等必要数据
+- 探测失败时退化为完整下载：下载到全局媒体缓存，后续添加到工程时直接复用，不重复下载
+- 探测结果按 URL 持久化缓存（重启后仍有效）：缓存文件只追加记录（每条记录一行 [URL, 媒体信息]），
+  加载时重放并压缩，运行中记录数超过缓存上限的 2 倍时重写
+"""
+import os
+import json
+import tempfile
+import threading
+import subprocess
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.function_utils import CACHE_DIR, get_file_extension
+from utils.json_utils import json_dumps, json_loads
+from utils.oss_utils import OssMixin
+from utils.media_cache import media_cache
+
+logger = logging.getLogger(__name__)
+
+
+# 探测结果缓存文件
+MEDIA_PROBE_CACHE_PATH = os.getenv(
+    'MEDIA_PROBE_CACHE_PATH',
+    os.path.join(os.path.dirname(CACHE_DIR), 'media_probe_cache.jsonl')
+)
+# 探测结果缓存条数上限（超出后淘汰最早的记录）
+MEDIA_PROBE_CACHE_SIZE = int(os.getenv('MEDIA_PROBE_CACHE_SIZE', '10000'))
+# ffprobe 超时时间（秒）
+MEDIA_PROBE_TIMEOUT = float(os.getenv('MEDIA_PROBE_TIMEOUT', '10'))
+# 探测线程池大小（限制同时运行的 ffprobe 进程数）
+MEDIA_PROBE_POOL_SIZE = int(os.getenv('MEDIA_PROBE_POOL_SIZE', '8'))
+
+# 需要探测时长的素材类型
+PROBE_MEDIA_TYPES = ['video', 'audio', 'oral']
+
+
+def run_ffprobe(target: str) -> dict:
+    """
+    使用 ffprobe 获取媒体信息
+
+    Args:
+        target: 本地路径或 URL
+
+    Returns:
+        {'duration': 时长（毫秒）, 'width': 宽度, 'height': 高度}
+
+    Raises:
+        Exception: 当 ffprobe 执行失败、超时或输出无法解析时
+    """
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-show_entries', 'format=duration:stream=codec_type,width,height',
+        '-of', 'json',
+        target
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=MEDIA_PROBE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise Exception(f"ffprobe timeout ({MEDIA_PROBE_TIMEOUT}s)")
+
+    if result.returncode != 0:
+        raise Exception(f"ffprobe failed - exit code: {result.returncode}, error: {result.stderr}")
+
+    try:
+        data = json.loads(result.stdout)
+        duration = int(float(data['format']['duration']) * 1000)
+    except (json.JSONDecodeError, KeyError, ValueError) as e:
+        raise Exception(f"ffprobe output parse failed: {e}, output: {result.stdout}")
+
+    video_stream = next(
+        (stream for stream in data.get('streams', []) if stream.get('codec_type') == 'video'),
+        {}
+    )
+    return {
+        'duration': duration,
+        'width': int(video_stream.get('width', 0)),
+        'height': int(video_stream.get('height', 0))
+    }
+
+
+class MediaProbe:
+    """媒体信息探测器（带持久化缓存）- 线程安全"""
+
+    def __init__(self, cache_path: str = MEDIA_PROBE_CACHE_PATH, max_entries: int = MEDIA_PROBE_CACHE_SIZE):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # 追加和重写缓存文件
+        # url -> 媒体信息，按写入顺序排序
+        self._cache: OrderedDict[str, dict] | None = None
+        self._file_records = 0  # 缓存文件中的记录数（含被覆盖、淘汰的记录）
+
+    def probe(self, url: str) -> dict:
+        """
+        获取媒体信息（优先读取缓存）
+
+        Returns:
+            {'duration': 时长（毫秒）, 'width': 宽度, 'height': 高度}
+        """
+        cached = self._get(url)
+        if cached is not None:
+            return dict(cached)
+        try:
+            if url.startswith('http://') or url.startswith('https://'):
+                media_info = self._probe_remote(url)
+            else:
+                media_info = run_ffprobe(url)
+        except Exception as e:
+            logger.error(f"Get media info failed: {url}, {e}")
+            raise
+        logger.info(f"Media info: {url} -> {media_info}")
+        self._put(url, media_info)
+        return dict(media_info)
+
+    # ==================== 内部方法 ====================
+
+    def _probe_remote(self, url: str) -> dict:
+        """探测远程素材：先范围读取签名 URL，失败后完整下载"""
+        oss = OssMixin()
+        try:
+            return run_ffprobe(oss.get_signed_url(url))
+        except Exception as e:
+            logger.warning(f"范围读取探测失败，改为完整下载: {url}, {e}")
+
+        if media_cache.enabled:
+            # 下载到全局缓存，添加到工程时直接复用
+            with media_cache.cached_file(url, oss.get_object_file) as cache_path:
+                return run_ffprobe(cache_path)
+
+        with tempfile.NamedTemporaryFile(suffix=get_file_extension(url), delete=False) as tmp_file:
+            temp_path = tmp_file.name
+        try:
+            oss.get_object_file(url, temp_path)
+            return run_ffprobe(temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _ensure_loaded(self):
+        """加载缓存文件（调用时必须持有锁），文件中有重复、淘汰或损坏的记录时压缩"""
+        if self._cache is not None:
+            return
+        self._cache = OrderedDict()
+        if not os.path.exists(self.cache_path):
+            return
+        legacy = False
+        try:
+            with open(self.cache_path, 'rb') as f:
+                content = f.read()
+            if content.lstrip().startswith(b'{'):
+                # 旧格式：整个文件是一个 JSON 对象，重写为追加格式
+                self._cache.update(json_loads(content))
+                legacy = True
+            else:
+                for line in content.splitlines():
+                    try:
+                        url, media_info = json_loads(line)
+                    except ValueError:
+                        continue  # 写入时崩溃留下的不完整记录
+                    self._cache[url] = media_info
+                    self._file_records += 1
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        except Exception as e:
+            logger.warning(f"媒体信息缓存加载失败，忽略: {self.cache_path}, {e}")
+            return
+        if legacy or self._file_records != len(self._cache):
+            with self._file_lock:
+                self._rewrite(list(self._cache.items()))
+            self._file_records = len(self._cache)
+
+    def _get(self, url: str) -> dict | None:
+        with self._lock:
+            self._ensure_loaded()
+            return self._cache.get(url)
+
+    def _put(self, url: str, media_info: dict):
+        """写入缓存：追加一条记录（不 fsync，丢失时重新探测），记录数超过上限 2 倍时在锁外重写"""
+        with self._lock:
+            self._ensure_loaded()
+            self._cache[url] = media_info
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self._file_records += 1
+            snapshot = None
+            if self._file_records > 2 * self.max_entries:
+                snapshot = list(self._cache.items())
+                self._file_records = len(snapshot)
+        with self._file_lock:
+            if snapshot is not None:
+                self._rewrite(snapshot)
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                with open(self.cache_path, 'ab') as f:
+                    f.write(json_dumps([url, media_info]) + b'\n')
+            except Exception as e:
+                logger.warning(f"媒体信息缓存写入失败: {self.cache_path}, {e}")
+
+    def _rewrite(self, items: list[tuple[str, dict]]):
+        """重写缓存文件（调用时必须持有 _file_lock），临时文件 + 原子重命名"""
+        try:
+            dir_name = os.path.dirname(self.cache_path)
+            os.makedirs(dir_name, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix='.tmp_')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(b''.join(json_dumps([url, media_info]) + b'\n' for url, media_info in items))
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"媒体信息缓存写入失败: {self.cache_path}, {e}")
+
+
+# 进程内全局探测器实例
+media_probe = MediaProbe()
+_probe_executor: ThreadPoolExecutor | None = None
+_probe_executor_lock = threading.Lock()
+
+
+def probe_media(url: str) -> dict:
+    """获取媒体信息（时长毫秒、宽、高），结果按 URL 缓存"""
+    return media_probe.probe(url)
+
+
+def _get_probe_executor() -> ThreadPoolExecutor:
+    global _probe_executor
+    with _probe_executor_lock:
+        if _probe_executor is None:
+            _probe_executor = ThreadPoolExecutor(
+                max_workers=MEDIA_PROBE_POOL_SIZE,
+                thread_name_prefix='probe'
+            )
+        return _probe_executor
+
+
+def resolve_media_materials(media_materials: list):
+    """
+    补齐媒体素材的时长和宽高（添加媒体片段前、任务锁外调用）
+
+    只处理未指定时长的素材：音视频在探测线程池中并行探测（同一 URL 只探测一次），
+    其他类型使用默认时长 5000 毫秒。已补齐的素材再次调用不会重复探测。
+
+    Args:
+        media_materials: JianYingMediaMaterialInfo 列表（原地修改）
+
+    Raises:
+        Exception: 任一素材探测失败时
+    """
+    pending = [m for m in media_materials if m.needs_media_info]
+    probe_urls = {m.url for m in pending if m.media_type in PROBE_MEDIA_TYPES}
+    executor = _get_probe_executor()
+    futures = {url: executor.submit(probe_media, url) for url in probe_urls}
+    for media_material in pending:
+        if media_material.media_type not in PROBE_MEDIA_TYPES:
+            media_material.duration = 5000
+            continue
+        media_info = futures[media_material.url].result()
+        media_material.duration = media_info['duration']
+        # 同一次探测已拿到宽高，未指定时一并填充
+        if not media_material.width and not media_material.height:
+            media_material.width = media_info['width']
+            media_material.height = media_info['height']
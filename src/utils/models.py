@@ -1,6 +1,6 @@
 import os
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pydantic import BaseModel, Field, model_validator
 from typing import Optional
 from urllib.parse import unquote, urlparse
@@ -33,6 +33,15 @@ class JianYingData:
     draft_info: dict
     draft_meta_info: dict
     draft_virtual_store: dict
+
+@dataclass
+class JianYingSnapshot:
+    """工程导出快照（某一时刻的草稿 JSON 和素材，导出期间不受后续修改影响）"""
+    unique_id: str
+    path: str  # 快照目录：草稿 JSON 为持有任务锁时序列化的内容，素材为工程文件的硬链接
+    json_files: dict[str, bytes]  # 持有任务锁时序列化的草稿 JSON：文件名 -> 内容（写入快照目录后清空）
+    resource_urls: list[str]  # 草稿引用的素材 URL
+    pending_resources: list[tuple[str, str]] = field(default_factory=list)  # 尚未下载完成的素材 [(URL, 文件名)]
     
 class MediaClipInfo(BaseModel):
     """媒体片段裁剪信息"""
@@ -153,19 +162,18 @@ class JianYingMediaMaterialInfo(BaseModel):
     @model_validator(mode='after')
     def set_defaults(self):
         # 自动设置 material_name
+        # 注意：校验器只做纯计算，时长/宽高探测见 utils.media_probe.resolve_media_materials
         if not self.material_name and self.url:
             parsed = urlparse(self.url)
             path = parsed.path if parsed.path else self.url
             self.material_name = os.path.basename(unquote(path))
-        
-        # 自动设置 duration
-        if (self.duration is None or self.duration <= 0) and self.url:
-            if self.media_type in ["video", "audio", "oral"]:
-                self.duration = get_media_duration(self.url)
-            else:
-                self.duration = 5000
         return self
     
+    @property
+    def needs_media_info(self) -> bool:
+        """是否需要探测媒体信息（未指定时长且有素材 URL）"""
+        return (self.duration is None or self.duration <= 0) and bool(self.url)
+    
 class JianYingInternalMaterialInfo(BaseModel):
     """剪映内部素材信息（用于贴纸、特效等复杂素材）"""
     material_info: dict = Field(..., description="内部素材信息")
@@ -465,4 +473,54 @@ class JianYingTextComplexStyle(BaseModel):
                 "text": "默认文本",
                 "complex_style_info": {}
             }
-        }
\ No newline at end of file
+        }
+# ==================== 时间线（整体构建）====================
+
+# 时间线片段类型 -> 素材字段
+TIMELINE_SEGMENT_MATERIALS = {
+    'media': 'media_material',
+    'text': 'text_material',
+    'complex_text': 'complex_text_material',
+    'sticker': 'sticker_material',
+    'filter': 'filter_material',
+    'effect': 'effect_material',
+    'audio_effect': 'audio_material'
+}
+
+class JianYingTimelineSegmentInfo(BaseModel):
+    """时间线片段（segment_type 决定使用的素材字段，其余字段同单个添加片段接口）"""
+    segment_type: str = Field(..., description="片段类型：media/text/complex_text/sticker/filter/effect/audio_effect")
+    start_time: Optional[int] = Field(None, description="插入时间点（毫秒），None表示追加到轨道末尾")
+    duration: int = Field(5000, description="显示时长（毫秒），媒体片段和音效由素材决定", gt=0)
+    transform: Optional[SegmentTransformInfo] = Field(None, description="变换信息（缩放、旋转、平移）")
+    media_material: Optional[JianYingMediaMaterialInfo] = Field(None, description="媒体素材（含调色信息 adjust_info）")
+    text_material: Optional[JianYingTextMaterialInfo] = Field(None, description="文本素材")
+    complex_text_material: Optional[JianYingTextComplexStyle] = Field(None, description="复杂文本素材")
+    sticker_material: Optional[JianYingInternalMaterialInfo] = Field(None, description="贴纸素材")
+    filter_material: Optional[JianYingInternalMaterialInfo] = Field(None, description="滤镜素材")
+    effect_material: Optional[JianYingInternalMaterialInfo] = Field(None, description="视频特效素材")
+    audio_material: Optional[dict] = Field(None, description="音效素材")
+    internal_materials: list[JianYingInternalMaterialInfo] = Field(
+        default_factory=list, description="添加到片段的内部材质（转场、动画等）"
+    )
+
+    @model_validator(mode='after')
+    def check_material(self):
+        material_field = TIMELINE_SEGMENT_MATERIALS.get(self.segment_type)
+        if material_field is None:
+            raise ValueError(
+                f"Invalid segment type: {self.segment_type}, just support {list(TIMELINE_SEGMENT_MATERIALS)}"
+            )
+        if getattr(self, material_field) is None:
+            raise ValueError(f"{material_field} is required for segment type: {self.segment_type}")
+        return self
+
+    @property
+    def material(self):
+        """片段类型对应的素材"""
+        return getattr(self, TIMELINE_SEGMENT_MATERIALS[self.segment_type])
+
+class JianYingTimelineTrackInfo(BaseModel):
+    """时间线轨道（片段按顺序添加到该轨道）"""
+    track_type: str = Field(..., description="轨道类型：audio/video/effect/filter/text/sticker/adjust")
+    segments: list[JianYingTimelineSegmentInfo] = Field(default_factory=list, description="片段列表")
@@ -2,6 +2,7 @@ import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
 import socket
+import threading
 import time
 import urllib.error
 import urllib.request
@@ -11,18 +12,132 @@ import oss2
 
 socket.setdefaulttimeout(20)
 
-class OssMixin:
-    
-    def __init__(self, *args, **kwargs):
+# 每个 bucket 客户端的 HTTP 连接池大小
+OSS_POOL_SIZE = int(os.getenv('OSS_POOL_SIZE', '10'))
+# 建立连接超时时间（秒）
+OSS_CONNECT_TIMEOUT = int(os.getenv('OSS_CONNECT_TIMEOUT', '60'))
+# 流式上传的分片大小（MB）
+OSS_MULTIPART_PART_SIZE = int(os.getenv('OSS_MULTIPART_PART_SIZE', '8'))
+
+oss2.defaults.multiget_threshold = 12 * 1024 * 1024
+oss2.defaults.multiget_part_size = 12 * 1024 * 1024
+oss2.defaults.multiget_num_threads = 10
+oss2.defaults.connection_pool_size = OSS_POOL_SIZE
+
+# 进程内共享的 OSS 客户端：(endpoint, bucket) -> oss2.Bucket，每个 bucket 复用一个带连接池的会话
+_bucket_registry: dict[tuple[str, str], oss2.Bucket] = {}
+_bucket_registry_lock = threading.Lock()
+_auth: oss2.Auth | None = None
+
+
+def get_oss_auth() -> oss2.Auth:
+    """获取 OSS 鉴权对象（进程内只创建一次）"""
+    global _auth
+    if _auth is None:
         # 从环境中读取
         ak = os.getenv('OSS_AK')
         sk = os.getenv('OSS_SK')
         assert ak and sk, 'OSS_AK or OSS_SK is not set'
-        self.auth = oss2.Auth(ak, sk)
-        oss2.defaults.multiget_threshold = 12 * 1024 * 1024
-        oss2.defaults.multiget_part_size = 12 * 1024 * 1024
-        oss2.defaults.multiget_num_threads = 10
+        _auth = oss2.Auth(ak, sk)
+    return _auth
+
+
+def get_bucket(endpoint: str, bucket_name: str) -> oss2.Bucket:
+    """获取 bucket 客户端（按 endpoint + bucket 缓存，线程安全）"""
+    key = (endpoint, bucket_name)
+    bucket = _bucket_registry.get(key)
+    if bucket is not None:
+        return bucket
+    with _bucket_registry_lock:
+        bucket = _bucket_registry.get(key)
+        if bucket is None:
+            bucket = oss2.Bucket(
+                get_oss_auth(), endpoint, bucket_name,
+                session=oss2.Session(pool_size=OSS_POOL_SIZE),
+                connect_timeout=OSS_CONNECT_TIMEOUT,
+                enable_crc=False
+            )
+            _bucket_registry[key] = bucket
+        return bucket
+
+
+class OssMultipartWriter:
+    """
+    流式写入 OSS 对象（分片上传），数据按分片大小缓冲后直接上传，不落本地临时文件
+    
+    实现 write/tell/flush，可作为 zipfile.ZipFile 的输出流（不可 seek）。
+    
+    Usage:
+        with OssMultipartWriter(bucket, key) as writer:
+            writer.write(data)
+        # 正常退出时完成上传，异常退出时取消上传
+    """
+    
+    def __init__(self, bucket: oss2.Bucket, key: str, headers: dict = None, part_size_mb: int = OSS_MULTIPART_PART_SIZE):
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size_mb * 1024 * 1024
+        self.upload_id = bucket.init_multipart_upload(key, headers=headers).upload_id
+        self._buffer = bytearray()
+        self._parts: list[oss2.models.PartInfo] = []
+        self._position = 0  # 已写入字节数
+        self.bytes_uploaded = 0  # 已上传字节数
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        """上传剩余数据并完成分片上传"""
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self.bucket.complete_multipart_upload(self.key, self.upload_id, self._parts)
+    
+    def abort(self):
+        """取消分片上传（清理已上传的分片）"""
+        try:
+            self.bucket.abort_multipart_upload(self.key, self.upload_id)
+        except Exception:
+            pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+    
+    def _upload_part(self, data: bytes):
+        part_number = len(self._parts) + 1
+        result = self.bucket.upload_part(self.key, self.upload_id, part_number, data)
+        self._parts.append(oss2.models.PartInfo(part_number, result.etag))
+        self.bytes_uploaded += len(data)
+
+
+class OssMixin:
+    
+    def __init__(self, *args, **kwargs):
+        self.auth = get_oss_auth()
         super().__init__(*args, **kwargs)
+    
+    def get_bucket_from_url(self, url):
+        """根据 URL 获取 bucket 客户端和对象 key"""
+        endpoint, bucket, key = self.get_oss_info_from_url(url)
+        return get_bucket(endpoint, bucket), key
         
     def get_oss_info_from_url(self, url):
         url = urllib.parse.unquote(url)
@@ -49,23 +164,22 @@ class OssMixin:
             try:
                 urllib.request.urlretrieve(url, filename=outfile)
             except urllib.error.HTTPError as e:
-                raise f'{str(e)}, "url": {url}'
+                raise Exception(f'{str(e)}, "url": {url}')
 
             except urllib.error.URLError as e:
                 retries += 1
                 time.sleep(10)
                 if retries >= max_retries:
-                    raise f'downloading "url": {url} time-out'
+                    raise Exception(f'downloading "url": {url} time-out')
             else:
                 return outfile
 
     def get_object_handle(self, url):
         try:
-            endpoint, bucket, key = self.get_oss_info_from_url(url)
-            bucket = oss2.Bucket(self.auth, endpoint, bucket, connect_timeout=60, enable_crc=False)
+            bucket, key = self.get_bucket_from_url(url)
             h = bucket.get_object(key)
         except oss2.exceptions.NoSuchKey as e:
-            raise f'{e.message}, "url": {url}'
+            raise Exception(f'{e.message}, "url": {url}')
         else:
             return h
         
@@ -79,27 +193,29 @@ class OssMixin:
 
     def get_object_file(self, url, outfile=None):
         try:
+            bucket, key = self.get_bucket_from_url(url)
             if outfile is None:
                 local_name = os.path.basename(key)
             else:
                 local_name = outfile
-            endpoint, bucket, key = self.get_oss_info_from_url(url)
-            bucket = oss2.Bucket(self.auth, endpoint, bucket, connect_timeout=60, enable_crc=False)
             bucket.get_object_to_file(key, local_name)
             # oss2.resumable_download(bucket, key, local_name)
         except oss2.exceptions.NoSuchKey as e:
-            raise f'{e.message}, "url": {url}'
+            raise Exception(f'{e.message}, "url": {url}')
         else:
             return outfile
 
+    def get_signed_url(self, url, expires=3600):
+        """生成带签名的临时访问 URL（私有 bucket 也可直接读取）"""
+        bucket, key = self.get_bucket_from_url(url)
+        return bucket.sign_url('GET', key, expires)
+
     def file_exists(self, url):
-        endpoint, bucket, key = self.get_oss_info_from_url(url)
-        bucket = oss2.Bucket(self.auth, endpoint, bucket, connect_timeout=60, enable_crc=False)
+        bucket, key = self.get_bucket_from_url(url)
         return bucket.object_exists(key)
 
     def post_object_file(self, url, file):
-        endpoint, bucket, key = self.get_oss_info_from_url(url)
-        bucket = oss2.Bucket(self.auth, endpoint, bucket, connect_timeout=60, enable_crc=False)
+        bucket, key = self.get_bucket_from_url(url)
         # 指定允许覆盖已存在的文件
         headers = {'x-oss-forbid-overwrite': 'false'}
         if not OssMixin.is_file_larger_than_20mb(file):
@@ -108,9 +224,14 @@ class OssMixin:
             oss2.resumable_upload(bucket, key, file, headers = headers)
         return url
     
+    def open_object_writer(self, url) -> OssMultipartWriter:
+        """打开 OSS 对象的流式写入器（分片上传，允许覆盖已存在的文件）"""
+        bucket, key = self.get_bucket_from_url(url)
+        headers = {'x-oss-forbid-overwrite': 'false'}
+        return OssMultipartWriter(bucket, key, headers=headers)
+    
     def post_object(self, url, handle):
-        endpoint, bucket, key = self.get_oss_info_from_url(url)
-        bucket = oss2.Bucket(self.auth, endpoint, bucket, connect_timeout=60, enable_crc=False)
+        bucket, key = self.get_bucket_from_url(url)
         bucket.put_object(key, handle)
         return url
 
@@ -1,7 +1,11 @@
 import os
+import copy
 import json
 import uuid
 import re
+import heapq
+import threading
+from collections import deque
 from dataclasses import dataclass
 from typing import Optional
 import logging
@@ -9,6 +13,9 @@ from urllib.parse import unquote, urlparse
 from utils.complex_text import build_complex_text_segment
 from utils.function_utils import *
 from utils.oss_utils import OssMixin
+from utils.media_prefetch import media_prefetcher
+from utils.media_probe import resolve_media_materials
+from utils.json_utils import json_dumps, json_loads
 from utils.models import *
 import shutil
 
@@ -17,6 +24,15 @@ logger = logging.getLogger(__name__)
 
 
 # ==================== 常量定义 ====================
+# 轨道变更日志长度（用于增量获取轨道），超出后更早的版本只能全量获取
+TRACK_CHANGE_LOG_SIZE = int(os.getenv('TRACK_CHANGE_LOG_SIZE', '1000'))
+# 撤销历史内存上限（MB，每个任务的撤销栈和重做栈合计，按保留的已删除/被替换数据估算），<=0 表示关闭撤销/重做
+UNDO_HISTORY_MAX_SIZE = float(os.getenv('UNDO_HISTORY_MAX_SIZE', '16'))
+# 撤销历史最多保留的步数（一次写请求为一步）
+UNDO_HISTORY_MAX_STEPS = int(os.getenv('UNDO_HISTORY_MAX_STEPS', '100'))
+# 每个撤销操作本身的估算开销（字节）
+UNDO_OP_SIZE = 128
+
 # 剪映轨道类型: 音频轨道、视频轨道、特效轨道、滤镜轨道、文本轨道、贴纸轨道、调整轨道
 JIANYING_TRACK_TYPES = ['audio', 'video', 'effect', 'filter', 'text', 'sticker', 'adjust']
 
@@ -64,6 +80,49 @@ class JianYingProtocol(OssMixin):
         self._draft_meta_info = jianying_data.draft_meta_info
         self._draft_virtual_store = jianying_data.draft_virtual_store
         self._base_info = jianying_data.baseInfo
+        # 修改版本号：每次修改草稿数据时递增，用于判断是否需要落盘
+        self._revision = 0
+        # 版本纪元：每次加载草稿时重新生成，与版本号组成 ETag（重新加载后旧 ETag 全部失效）
+        self._epoch = uuid.uuid4().hex[:12]
+        # 轨道变更日志 [(版本号, track_id)]，按版本号递增；_track_change_floor 之前的变更已被丢弃
+        self._track_changes: deque[tuple[int, str]] = deque(maxlen=TRACK_CHANGE_LOG_SIZE)
+        self._track_change_floor = 0
+        # ID 索引（首次访问时构建，之后由各修改方法维护）
+        # track_id -> track, segment_id -> (track, 片段位置), material_id -> (素材类型, 素材位置)
+        self._track_index: dict[str, dict] | None = None
+        self._segment_index: dict[str, tuple[dict, int]] = {}
+        self._material_index: dict[str, tuple[str, int]] = {}
+        # 轨道结束时间：track_id -> 片段结束时间最大堆 [(-结束时间, segment_id)]，已删除的片段延迟清理
+        self._track_end_heaps: dict[str, list[tuple[int, str]]] = {}
+        # 工程时长：轨道结束时间最大堆 [(-结束时间, track_id)]，轨道删除或结束时间变化后的记录延迟清理；
+        # None 表示需要从所有轨道重新构建（索引重建、事务回滚后），_dirty_end_tracks 为尚未重新加入堆的已修改轨道
+        self._duration_heap: list[tuple[int, str]] | None = None
+        self._dirty_end_tracks: set[str] = set()
+        # 资源引用计数：remote_url -> 引用该文件的素材数量，归零时清理本地文件、素材元信息和虚拟素材库
+        self._remote_url_refs: dict[str, int] = {}
+        # 素材元信息和虚拟素材库索引：remote_url -> (元信息, 位置)，child_id -> (虚拟关系, 位置)，
+        # parent_id -> 子节点数量（记录的位置同片段，只会偏大，见 _locate_item）
+        self._meta_info_index: dict[str, tuple[dict, int]] = {}
+        self._virtual_relation_index: dict[str, tuple[dict, int]] = {}
+        self._virtual_folder_children: dict[str, int] = {}
+        self._index_lock = threading.Lock()  # 并发读时避免重复构建索引
+        # 整体构建时间线期间暂缓更新工程时长（构建完成后统一更新一次）
+        self._defer_duration_update = False
+        # 未提交到操作日志的修改 [[操作, 参数...]]（None 表示不记录，见 utils.draft_journal）
+        self._journal: list[list] | None = None
+        # 撤销日志 [(撤销函数, 参数)]（None 表示不在事务中），以及事务开始时的版本号、工程时长等
+        self._undo_log: list[tuple] | None = None
+        self._transaction_state: tuple | None = None
+        self._undo_size = 0  # 撤销日志保留的数据估算大小（字节）
+        self._released_urls: list[str] = []  # 事务中引用计数归零的资源（事务结束后删除不再使用的本地文件）
+        # 撤销/重做历史：每步为 (撤销日志, 估算大小, 引用计数归零的资源)，合计受 UNDO_HISTORY_MAX_* 限制
+        self._undo_stack: deque[tuple] = deque()
+        self._redo_stack: deque[tuple] = deque()
+        self._history_size = 0
+        # 撤销历史可能恢复的资源：remote_url -> 步骤数（期间保留本地文件，避免撤销后重新下载）
+        self._history_url_refs: dict[str, int] = {}
+        self._history_action: tuple | None = None  # 当前事务取出的 ('undo'|'redo', 步骤)
+        self._applying_history = False  # 正在执行撤销/重做（撤销操作同时记录反向操作）
     
     # ========== 属性 ==========
     @property
@@ -86,6 +145,427 @@ class JianYingProtocol(OssMixin):
     def track_size(self) -> int:
         return len(self._draft_info['tracks'])
     
+    @property
+    def revision(self) -> int:
+        return self._revision
+    
+    @property
+    def etag(self) -> str:
+        """当前版本的 ETag，格式为 "纪元-版本号"（含引号）"""
+        return f'"{self._epoch}-{self._revision}"'
+    
+    def parse_etag(self, etag: str) -> int | None:
+        """解析本实例生成的 ETag，返回版本号；格式错误或纪元不一致（草稿已重新加载）时返回 None"""
+        epoch, _, revision = etag.strip().removeprefix('W/').strip('"').partition('-')
+        if epoch != self._epoch or not revision.isdigit():
+            return None
+        return int(revision)
+    
+    def get_changed_track_ids(self, revision: int) -> set[str] | None:
+        """
+        获取指定版本之后修改过的轨道ID（含已删除的轨道）
+        
+        Returns:
+            轨道ID集合；变更日志已不完整或版本号无效时返回 None（需全量获取）
+        """
+        if revision < self._track_change_floor or revision > self._revision:
+            return None
+        track_ids = set()
+        for change_revision, track_id in reversed(self._track_changes):
+            if change_revision <= revision:
+                break
+            track_ids.add(track_id)
+        return track_ids
+    
+    # ========== 操作日志 ==========
+    def enable_journal(self):
+        """开始记录修改（由 JianYingProject 在启用操作日志时调用）"""
+        if self._journal is None:
+            self._journal = []
+    
+    def take_journal(self) -> list[list]:
+        """
+        取出并清空未提交的修改记录
+        
+        记录引用草稿中的对象（片段、素材等），需在本次写操作结束、释放写锁前序列化，
+        从而写入的是操作结束时的数据
+        """
+        journal = self._journal or []
+        if self._journal is not None:
+            self._journal = []
+        return journal
+    
+    def _record(self, op: str, *args):
+        """记录一次修改（与 _mark_modified 配合，所有修改草稿数据的地方都需要调用）"""
+        if self._journal is not None:
+            self._journal.append([op, *args])
+    
+    # ========== 事务（失败回滚）与撤销历史 ==========
+    def begin_transaction(self):
+        """
+        开始事务：之后的每个修改都记录撤销操作，失败时由 rollback() 在内存中按相反顺序撤销
+        （回滚耗时只与修改量有关，不读取磁盘；由 JianYingTask 在获取写锁后调用）
+        """
+        self._undo_log = []
+        self._undo_size = 0
+        self._released_urls = []
+        self._transaction_state = (
+            self._revision,
+            len(self._journal) if self._journal is not None else 0,
+            self._draft_info['duration'],
+            self._base_info.duration
+        )
+    
+    def end_transaction(self):
+        """
+        结束事务（操作成功）：有修改时撤销日志作为一步加入撤销历史
+        （普通修改清空重做栈；撤销产生的反向操作加入重做栈，重做产生的加入撤销栈）
+        """
+        undo_log, self._undo_log = self._undo_log, None
+        if undo_log is None:
+            return
+        revision = self._transaction_state[0]
+        released = self._released_urls
+        action = self._history_action
+        step = (undo_log, self._undo_size + len(undo_log) * UNDO_OP_SIZE, released)
+        self._transaction_state = None
+        self._released_urls = []
+        self._undo_size = 0
+        self._history_action = None
+        
+        if self._revision == revision:
+            return
+        if UNDO_HISTORY_MAX_SIZE <= 0 or UNDO_HISTORY_MAX_STEPS <= 0:
+            # 撤销历史关闭：直接删除不再被引用的本地文件
+            self._delete_unused_files(released)
+            return
+        if action is None:
+            self._push_history(self._undo_stack, step)
+            while self._redo_stack:
+                self._drop_history_step(self._redo_stack.pop())
+        else:
+            name, applied = action
+            self._push_history(self._redo_stack if name == 'undo' else self._undo_stack, step)
+            self._drop_history_step(applied)
+        self._trim_history()
+    
+    def rollback(self):
+        """撤销本次事务的所有修改，恢复到 begin_transaction() 时的数据和版本号"""
+        undo_log, self._undo_log = self._undo_log, None
+        if undo_log is None:
+            return
+        for undo, args in reversed(undo_log):
+            undo(*args)
+        # 恢复的轨道结束时间未加入工程时长堆，下次更新时长时重新构建
+        self._duration_heap = None
+        revision, journal_size, duration, base_duration = self._transaction_state
+        self._transaction_state = None
+        self._revision = revision
+        if self._journal is not None:
+            del self._journal[journal_size:]
+        self._draft_info['duration'] = duration
+        self._base_info.duration = base_duration
+        # 取出的撤销/重做步骤放回原处
+        if self._history_action is not None:
+            name, step = self._history_action
+            self._history_action = None
+            (self._undo_stack if name == 'undo' else self._redo_stack).append(step)
+            self._history_size += step[1]
+        # 本次新增后又被撤销的素材不再被引用
+        released, self._released_urls = self._released_urls, []
+        self._undo_size = 0
+        self._delete_unused_files(released)
+        if undo_log:
+            logger.info(f"Transaction rolled back: {len(undo_log)} changes, revision={revision}")
+    
+    @property
+    def history_size(self) -> int:
+        """撤销/重做历史的估算大小（字节）"""
+        return self._history_size
+    
+    @property
+    def undo_steps(self) -> int:
+        """可撤销的步数"""
+        return len(self._undo_stack)
+    
+    @property
+    def redo_steps(self) -> int:
+        """可重做的步数"""
+        return len(self._redo_stack)
+    
+    def undo(self) -> bool:
+        """
+        撤销上一步写操作（一次写请求为一步，需在事务中调用）
+        
+        按相反顺序执行该步的撤销操作，修改同普通写操作（记录操作日志、递增版本号），之后可重做
+        
+        Returns:
+            是否有可撤销的操作
+        """
+        return self._apply_history('undo', self._undo_stack)
+    
+    def redo(self) -> bool:
+        """
+        重做上一步被撤销的写操作（需在事务中调用，其他写操作之后无法重做）
+        
+        Returns:
+            是否有可重做的操作
+        """
+        return self._apply_history('redo', self._redo_stack)
+    
+    def clear_history(self):
+        """清空撤销/重做历史，并删除只被历史引用的本地文件（任务移出内存时调用）"""
+        for stack in (self._undo_stack, self._redo_stack):
+            while stack:
+                self._drop_history_step(stack.popleft())
+        self._history_size = 0
+    
+    def _apply_history(self, name: str, stack: deque) -> bool:
+        if self._undo_log is None:
+            raise RuntimeError(f"{name} must be called in a transaction")
+        if self._history_action is not None or self._revision != self._transaction_state[0]:
+            raise RuntimeError(f"{name} cannot be combined with other changes in one transaction")
+        if not stack:
+            return False
+        step = stack.pop()
+        self._history_size -= step[1]
+        # 步骤引用的资源在事务结束（或回滚）前保持引用
+        self._history_action = (name, step)
+        self._applying_history = True
+        try:
+            for undo, args in reversed(step[0]):
+                undo(*args)
+        finally:
+            self._applying_history = False
+        self.update_project_duration()
+        logger.info(f"History {name}: {len(step[0])} changes, undo={self.undo_steps}, redo={self.redo_steps}")
+        return True
+    
+    def _push_history(self, stack: deque, step: tuple):
+        stack.append(step)
+        self._history_size += step[1]
+        for remote_url in step[2]:
+            self._history_url_refs[remote_url] = self._history_url_refs.get(remote_url, 0) + 1
+    
+    def _drop_history_step(self, step: tuple):
+        """丢弃移出历史的步骤（大小已从 _history_size 扣除或由调用方扣除）"""
+        for remote_url in step[2]:
+            count = self._history_url_refs.get(remote_url, 0) - 1
+            if count > 0:
+                self._history_url_refs[remote_url] = count
+            else:
+                self._history_url_refs.pop(remote_url, None)
+        self._delete_unused_files(step[2])
+    
+    def _trim_history(self):
+        """超出内存或步数上限时丢弃最早的撤销步骤（撤销栈为空后丢弃最远的重做步骤）"""
+        max_size = UNDO_HISTORY_MAX_SIZE * 1024 * 1024
+        while self._undo_stack or self._redo_stack:
+            if self._history_size <= max_size and len(self._undo_stack) + len(self._redo_stack) <= UNDO_HISTORY_MAX_STEPS:
+                break
+            step = (self._undo_stack or self._redo_stack).popleft()
+            self._history_size -= step[1]
+            self._drop_history_step(step)
+    
+    def _push_undo(self, undo, *args):
+        """记录撤销操作（不在事务中时忽略）"""
+        if self._undo_log is not None:
+            self._undo_log.append((undo, args))
+    
+    def _hold(self, data):
+        """撤销日志保留已删除或被替换的数据：累计估算大小（撤销历史关闭时不计算）"""
+        if self._undo_log is not None and UNDO_HISTORY_MAX_SIZE > 0:
+            self._undo_size += len(json_dumps(data))
+    
+    def _save_segment(self, segment: dict):
+        """原地修改片段前保存原数据（不在事务中时忽略）"""
+        if self._undo_log is not None:
+            data = json_dumps(segment)
+            if UNDO_HISTORY_MAX_SIZE > 0:
+                self._undo_size += len(data)
+            self._undo_log.append((self._undo_update_segment, (segment, json_loads(data))))
+    
+    def _history_change(self, record: tuple, undo: tuple, track_id: str | None = None, removed=None):
+        """
+        撤销/重做时，撤销操作产生的修改同普通修改：记录操作日志、反向操作（供重做或回滚）并标记修改
+        （事务回滚时不记录）
+        """
+        if not self._applying_history:
+            return
+        self._record(*record)
+        if removed is not None:
+            self._hold(removed)
+        self._push_undo(*undo)
+        self._mark_modified(track_id)
+    
+    def _delete_unused_files(self, remote_urls: list[str]):
+        """删除不再被草稿素材和撤销历史引用的本地文件（取消未完成的下载）"""
+        for remote_url in remote_urls:
+            if remote_url in self._remote_url_refs or remote_url in self._history_url_refs:
+                continue
+            media_prefetcher.cancel(self.data.baseInfo.unique_id, remote_url)
+            file_path = self.get_absolute_file_path(remote_url)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                logger.info(f"Local material file deleted: {remote_url}")
+    
+    # 撤销操作：按相反顺序执行，执行时数据与对应修改刚完成时一致，同时恢复索引。
+    # 每个撤销操作都有对应的反向操作（撤销历史中执行时记录，用于重做）
+    def _undo_track_change(self, replaced: tuple | None, dropped: tuple | None, floor: int):
+        if self._applying_history:
+            return  # 撤销/重做本身会记录新的轨道变更
+        changes = self._track_changes
+        changes.pop()
+        if replaced:
+            changes.append(replaced)
+        if dropped:
+            changes.appendleft(dropped)
+        self._track_change_floor = floor
+    
+    def _undo_add_track(self, track: dict):
+        tracks = self._draft_info['tracks']
+        position = next(i for i, t in enumerate(tracks) if t is track)
+        del tracks[position]
+        del self._track_index[track['id']]
+        for segment in track['segments']:
+            self._segment_index.pop(segment['id'], None)
+        end_heap = self._track_end_heaps.pop(track['id'])
+        self._history_change(
+            ('track_remove', track['id']), (self._undo_remove_track, position, track, end_heap), track['id'], track
+        )
+    
+    def _undo_remove_track(self, position: int, track: dict, end_heap: list):
+        self._draft_info['tracks'].insert(position, track)
+        self._track_index[track['id']] = track
+        for i, segment in enumerate(track['segments']):
+            self._segment_index[segment['id']] = (track, i)
+        self._track_end_heaps[track['id']] = end_heap
+        self._history_change(('track_add', position, track), (self._undo_add_track, track), track['id'])
+    
+    def _undo_insert_segment(self, track: dict, position: int):
+        segment = track['segments'].pop(position)
+        # 之后片段记录的位置偏大，结束时间堆中的记录延迟清理（见 _locate_segment）
+        del self._segment_index[segment['id']]
+        self._history_change(
+            ('segment_remove', track['id'], segment['id']),
+            (self._undo_delete_segment, track, position, segment), track['id'], segment
+        )
+    
+    def _undo_delete_segment(self, track: dict, position: int, segment: dict):
+        segments = track['segments']
+        segments.insert(position, segment)
+        # 之后的片段后移一位，重新记录实际位置（保持"记录的位置只会偏大"）
+        for i in range(position, len(segments)):
+            self._segment_index[segments[i]['id']] = (track, i)
+        heapq.heappush(self._track_end_heaps[track['id']], (-get_segment_end_time(segment), segment['id']))
+        self._history_change(
+            ('segment_add', track['id'], segment, position), (self._undo_insert_segment, track, position), track['id']
+        )
+    
+    def _undo_update_segment(self, segment: dict, saved: dict):
+        # 浅拷贝即可：恢复后片段引用 saved 中的对象，当前的嵌套对象只被拷贝引用
+        current = dict(segment)
+        segment.clear()
+        segment.update(saved)
+        if self._applying_history:
+            track_id = self._segment_index[segment['id']][0]['id']
+            self._history_change(
+                ('segment_put', track_id, segment), (self._undo_update_segment, segment, current), track_id, current
+            )
+    
+    def _undo_insert_material(self, material_type: str, position: int):
+        material = self._draft_info['materials'][material_type].pop(position)
+        # 之后素材记录的位置偏大（见 _locate_material）
+        del self._material_index[material['id']]
+        self._release_remote_url(material.get('remote_url'))
+        self._history_change(
+            ('material_remove', material_type, material['id']),
+            (self._undo_delete_material, material_type, position, material), removed=material
+        )
+    
+    def _undo_update_material(self, material_type: str, position: int, old_material: dict, material: dict):
+        self._draft_info['materials'][material_type][position] = old_material
+        self._retain_remote_url(old_material.get('remote_url'))
+        self._release_remote_url(material.get('remote_url'))
+        self._history_change(
+            ('material_put', material_type, old_material),
+            (self._undo_update_material, material_type, position, material, old_material), removed=material
+        )
+    
+    def _undo_delete_material(self, material_type: str, position: int, material: dict):
+        materials = self._draft_info['materials'][material_type]
+        materials.insert(position, material)
+        # 之后的素材后移一位，重新记录实际位置（保持"记录的位置只会偏大"）
+        for i in range(position, len(materials)):
+            self._material_index[materials[i]['id']] = (material_type, i)
+        self._retain_remote_url(material.get('remote_url'))
+        self._history_change(
+            ('material_add', material_type, material, position), (self._undo_insert_material, material_type, position)
+        )
+    
+    def _undo_add_meta_info(self, position: int, material_meta_info: dict, indexed: bool):
+        del self._draft_meta_info['draft_materials'][0]['value'][position]
+        if indexed:
+            del self._meta_info_index[material_meta_info.get('remote_url')]
+        self._history_change(
+            ('meta_info_remove', material_meta_info['id']),
+            (self._undo_remove_meta_info, position, material_meta_info, indexed), removed=material_meta_info
+        )
+    
+    def _undo_remove_meta_info(self, position: int, material_meta_info: dict, indexed: bool):
+        materials = self._draft_meta_info['draft_materials'][0]['value']
+        materials.insert(position, material_meta_info)
+        if indexed:
+            self._meta_info_index[material_meta_info.get('remote_url')] = (material_meta_info, position)
+        # 之后的元信息后移一位，重新记录实际位置（保持"记录的位置只会偏大"）
+        for i in range(position + 1, len(materials)):
+            entry = self._meta_info_index.get(materials[i].get('remote_url'))
+            if entry and entry[0] is materials[i]:
+                self._meta_info_index[materials[i].get('remote_url')] = (materials[i], i)
+        self._history_change(
+            ('meta_info_add', material_meta_info, position),
+            (self._undo_add_meta_info, position, material_meta_info, indexed)
+        )
+    
+    def _undo_add_folder(self, position: int, folder: dict):
+        del self._draft_virtual_store['draft_virtual_store'][0]['value'][position]
+        self._history_change(
+            ('folder_remove', folder['id']), (self._undo_remove_folder, position, folder), removed=folder
+        )
+    
+    def _undo_remove_folder(self, position: int, folder: dict):
+        self._draft_virtual_store['draft_virtual_store'][0]['value'].insert(position, folder)
+        self._history_change(('folder_add', folder, position), (self._undo_add_folder, position, folder))
+    
+    def _undo_add_virtual_relation(self, position: int, relation: dict):
+        del self._draft_virtual_store['draft_virtual_store'][1]['value'][position]
+        del self._virtual_relation_index[relation['child_id']]
+        parent_id = relation['parent_id']
+        count = self._virtual_folder_children[parent_id] - 1
+        if count > 0:
+            self._virtual_folder_children[parent_id] = count
+        else:
+            del self._virtual_folder_children[parent_id]
+        self._history_change(
+            ('relation_remove', relation['child_id']),
+            (self._undo_remove_virtual_relation, position, relation), removed=relation
+        )
+    
+    def _undo_remove_virtual_relation(self, position: int, relation: dict):
+        relations = self._draft_virtual_store['draft_virtual_store'][1]['value']
+        relations.insert(position, relation)
+        self._virtual_relation_index[relation['child_id']] = (relation, position)
+        # 之后的关系后移一位，重新记录实际位置
+        for i in range(position + 1, len(relations)):
+            entry = self._virtual_relation_index.get(relations[i]['child_id'])
+            if entry and entry[0] is relations[i]:
+                self._virtual_relation_index[relations[i]['child_id']] = (relations[i], i)
+        parent_id = relation['parent_id']
+        self._virtual_folder_children[parent_id] = self._virtual_folder_children.get(parent_id, 0) + 1
+        self._history_change(
+            ('relation_add', relation, position), (self._undo_add_virtual_relation, position, relation)
+        )
+    
     # ========== 静态方法 ==========
     @staticmethod
     def parse_base_info_from_draft(draft_info: dict, draft_meta_info: dict) -> JianYingBaseInfo:
@@ -100,17 +580,206 @@ class JianYingProtocol(OssMixin):
             unique_id=draft_info['id']
         )
     
+    # ========== 索引管理 ==========
+    def _ensure_indexes(self):
+        """确保 ID 索引已构建（懒加载，只在首次访问时遍历草稿）"""
+        if self._track_index is not None:
+            return
+        with self._index_lock:
+            if self._track_index is not None:
+                return
+            segment_index = {}
+            material_index = {}
+            track_end_heaps = {}
+            track_index = {}
+            for track in self._draft_info['tracks']:
+                track_index[track['id']] = track
+                end_heap = []
+                for position, segment in enumerate(track['segments']):
+                    segment_index[segment['id']] = (track, position)
+                    end_heap.append((-get_segment_end_time(segment), segment['id']))
+                heapq.heapify(end_heap)
+                track_end_heaps[track['id']] = end_heap
+            remote_url_refs = {}
+            for material_type in JIANYING_MATERIAL_TYPES:
+                for position, material in enumerate(self._draft_info['materials'][material_type]):
+                    material_index[material['id']] = (material_type, position)
+                    remote_url = material.get('remote_url')
+                    if remote_url:
+                        remote_url_refs[remote_url] = remote_url_refs.get(remote_url, 0) + 1
+            meta_info_index = {}
+            for position, material_meta_info in enumerate(self._draft_meta_info['draft_materials'][0]['value']):
+                meta_info_index.setdefault(material_meta_info.get('remote_url'), (material_meta_info, position))
+            virtual_relation_index = {}
+            virtual_folder_children = {}
+            for position, relation in enumerate(self._draft_virtual_store['draft_virtual_store'][1]['value']):
+                virtual_relation_index[relation['child_id']] = (relation, position)
+                parent_id = relation['parent_id']
+                virtual_folder_children[parent_id] = virtual_folder_children.get(parent_id, 0) + 1
+            self._segment_index = segment_index
+            self._material_index = material_index
+            self._track_end_heaps = track_end_heaps
+            self._remote_url_refs = remote_url_refs
+            self._meta_info_index = meta_info_index
+            self._virtual_relation_index = virtual_relation_index
+            self._virtual_folder_children = virtual_folder_children
+            self._duration_heap = None
+            # 最后赋值，作为索引构建完成的标志
+            self._track_index = track_index
+    
+    def _append_segment(self, track: dict, segment: dict):
+        """追加片段到轨道并更新索引"""
+        self._ensure_indexes()
+        track['segments'].append(segment)
+        self._segment_index[segment['id']] = (track, len(track['segments']) - 1)
+        self._record('segment_add', track['id'], segment)
+        self._push_undo(self._undo_insert_segment, track, len(track['segments']) - 1)
+        heapq.heappush(self._track_end_heaps[track['id']], (-get_segment_end_time(segment), segment['id']))
+        self._mark_modified(track['id'])
+    
+    def _locate_segment(self, segment_id: str) -> tuple[dict, int] | None:
+        """
+        定位片段，返回 (轨道, 片段位置)
+        
+        片段只会追加到末尾，删除片段时不更新后续片段的位置：
+        记录的位置只会偏大，从记录位置向前查找并修正即可
+        """
+        self._ensure_indexes()
+        entry = self._segment_index.get(segment_id)
+        if not entry:
+            return None
+        track, position = entry
+        segments = track['segments']
+        position = min(position, len(segments) - 1)
+        while segments[position]['id'] != segment_id:
+            position -= 1
+        if position != entry[1]:
+            self._segment_index[segment_id] = (track, position)
+        return track, position
+    
+    @staticmethod
+    def _locate_item(items: list, item: dict, position: int) -> int:
+        """
+        在列表中定位对象（素材元信息、虚拟关系），返回实际位置
+        
+        同片段：只会追加到末尾，删除时不更新之后元素的位置，记录的位置只会偏大，从记录位置向前查找即可
+        """
+        position = min(position, len(items) - 1)
+        while items[position] is not item:
+            position -= 1
+        return position
+    
+    def _delete_segment(self, segment_id: str) -> dict:
+        """从轨道删除片段并更新索引，返回被删除的片段"""
+        track, position = self._locate_segment(segment_id)
+        del self._segment_index[segment_id]
+        segment = track['segments'].pop(position)
+        self._record('segment_remove', track['id'], segment_id)
+        self._push_undo(self._undo_delete_segment, track, position, segment)
+        self._hold(segment)
+        self._mark_modified(track['id'])
+        return segment
+    
+    def _locate_material(self, material_id: str) -> tuple[str, int] | None:
+        """
+        定位素材，返回 (素材类型, 素材位置)
+        
+        同片段：素材只会追加到末尾，删除素材时保持原有顺序、不更新后续素材的位置，
+        记录的位置只会偏大，从记录位置向前查找并修正即可
+        """
+        self._ensure_indexes()
+        entry = self._material_index.get(material_id)
+        if not entry:
+            return None
+        material_type, position = entry
+        materials = self._draft_info['materials'][material_type]
+        position = min(position, len(materials) - 1)
+        while materials[position]['id'] != material_id:
+            position -= 1
+        if position != entry[1]:
+            self._material_index[material_id] = (material_type, position)
+        return material_type, position
+    
+    def _delete_material(self, material_id: str) -> tuple[str, dict]:
+        """删除素材并更新索引，返回 (素材类型, 被删除的素材)"""
+        material_type, position = self._locate_material(material_id)
+        del self._material_index[material_id]
+        material = self._draft_info['materials'][material_type].pop(position)
+        self._release_remote_url(material.get('remote_url'))
+        self._record('material_remove', material_type, material_id)
+        self._push_undo(self._undo_delete_material, material_type, position, material)
+        self._hold(material)
+        self._mark_modified()
+        return material_type, material
+    
+    def _retain_remote_url(self, remote_url: str | None):
+        """增加资源引用计数"""
+        if remote_url:
+            self._remote_url_refs[remote_url] = self._remote_url_refs.get(remote_url, 0) + 1
+    
+    def _release_remote_url(self, remote_url: str | None):
+        """减少资源引用计数，归零时移除计数项"""
+        if not remote_url:
+            return
+        count = self._remote_url_refs.get(remote_url, 0) - 1
+        if count > 0:
+            self._remote_url_refs[remote_url] = count
+        else:
+            self._remote_url_refs.pop(remote_url, None)
+            if self._transaction_state is not None:
+                self._released_urls.append(remote_url)
+    
     # ========== 项目管理 ==========
+    def _mark_modified(self, track_id: str | None = None):
+        """
+        标记草稿数据已修改（所有修改草稿数据的地方都需要调用）
+        
+        Args:
+            track_id: 被修改的轨道（轨道增删、片段增删改），只修改素材时为 None
+        """
+        self._revision += 1
+        if not track_id:
+            return
+        self._dirty_end_tracks.add(track_id)
+        changes = self._track_changes
+        replaced = dropped = None
+        floor = self._track_change_floor
+        # 同一轨道连续修改只保留最新版本
+        if changes and changes[-1][1] == track_id:
+            replaced = changes.pop()
+        elif len(changes) == changes.maxlen:
+            dropped = changes[0]
+            self._track_change_floor = dropped[0]
+        changes.append((self._revision, track_id))
+        self._push_undo(self._undo_track_change, replaced, dropped, floor)
+    
     def update_project_duration(self):
-        """更新项目总时长"""
+        """
+        更新项目总时长（所有轨道结束时间的最大值）
+        
+        只将上次更新后修改过的轨道的结束时间加入工程时长堆；堆顶记录的轨道已删除或结束时间已变化时弹出，
+        过期记录超过一半时重新构建
+        """
+        self._ensure_indexes()
+        duration_heap = self._duration_heap
+        if duration_heap is None or len(duration_heap) > 2 * len(self._track_index):
+            duration_heap = [
+                (-self.get_track_last_segment_time(track_id), track_id) for track_id in self._track_index
+            ]
+            heapq.heapify(duration_heap)
+            self._duration_heap = duration_heap
+        else:
+            for track_id in self._dirty_end_tracks:
+                if track_id in self._track_index:
+                    heapq.heappush(duration_heap, (-self.get_track_last_segment_time(track_id), track_id))
+        self._dirty_end_tracks.clear()
         max_duration = 0
-        for i in range(self.track_size):
-            track = self.get_track_by_index(i)
-            if not track:
-                continue
-            duration = self.get_track_last_segment_time(track['id'])
-            if duration > max_duration:
-                max_duration = duration
+        while duration_heap:
+            neg_end_time, track_id = duration_heap[0]
+            if track_id in self._track_index and self.get_track_last_segment_time(track_id) == -neg_end_time:
+                max_duration = -neg_end_time
+                break
+            heapq.heappop(duration_heap)
         self.base_info.duration = max_duration // 1000
         self._draft_info['duration'] = int(max_duration)
     
@@ -124,18 +793,23 @@ class JianYingProtocol(OssMixin):
         return os.path.join(get_resource_path(self.data.baseInfo.unique_id), url_to_filename(url))
     
     def url_to_resource_path(self, url: str) -> str:
-        """URL转资源路径（下载并返回草稿占位符路径）"""
+        """URL转资源路径（登记下载并返回草稿占位符路径）"""
         resource_path = get_resource_path(self.data.baseInfo.unique_id)
         file_name = url_to_filename(url)
         file_path = os.path.join(resource_path, file_name)
-        if not os.path.exists(file_path):
-            # 判断url是否以http开头，兼容本地文件和远程文件
-            if url.startswith('http'):
-                self.get_object_file(url, file_path)
-            else:
-                shutil.copy(os.getenv("JY_Res_Dir", "") + url, file_path)
+        # 判断url是否以http开头，兼容本地文件和远程文件
+        if url.startswith('http'):
+            # 远程素材异步下载（不占用任务锁），导出前等待下载完成；文件是否已存在由预取器在锁内检查
+            media_prefetcher.submit(self.data.baseInfo.unique_id, url, file_path, self.get_object_file)
+        elif not os.path.exists(file_path):
+            shutil.copy(os.getenv("JY_Res_Dir", "") + url, file_path)
         return f'##_draftpath_placeholder_0E685133-18CE-45ED-8CB8-2904A212EC80_##/Resources/{file_name}'
     
+    def get_resource_urls(self) -> list[str]:
+        """获取草稿素材引用的所有资源 URL（远程素材 URL 或本地素材路径），导出时使用"""
+        self._ensure_indexes()
+        return list(self._remote_url_refs)
+    
     # ==================== 轨道管理 ====================
     def add_track(self, track_type: str, index: int = -1) -> str:
         """添加轨道"""
@@ -146,30 +820,47 @@ class JianYingProtocol(OssMixin):
         
         new_track = build_track(track_type)
         
+        self._ensure_indexes()
         if index == -1 or index >= self.track_size:
+            index = -1
             self._draft_info['tracks'].append(new_track)
         else:
             self._draft_info['tracks'].insert(index, new_track)
+        self._record('track_add', index, {**new_track, 'segments': []})
+        self._push_undo(self._undo_add_track, new_track)
+        self._track_index[new_track['id']] = new_track
+        self._track_end_heaps[new_track['id']] = []
+        self._mark_modified(new_track['id'])
         
         logger.info(f"Track added: type={track_type}, id={new_track['id']}, index={index}")
         return new_track['id']
     
     def remove_track(self, track_id: str) -> bool:
         """删除轨道"""
-        tracks = self._draft_info['tracks']
-        for i, track in enumerate(tracks):
-            if track['id'] == track_id:
-                del tracks[i]
-                logger.info(f"Track removed: id={track_id}, index={i}")
-                return True
+        self._ensure_indexes()
+        track = self._track_index.pop(track_id, None)
+        if not track:
+            logger.warning(f"Track not found: {track_id}")
+            return False
         
-        logger.warning(f"Track not found: {track_id}")
-        return False
+        tracks = self._draft_info['tracks']
+        i = next(i for i, t in enumerate(tracks) if t is track)
+        del tracks[i]
+        for segment in track['segments']:
+            self._segment_index.pop(segment['id'], None)
+        end_heap = self._track_end_heaps.pop(track_id)
+        self._record('track_remove', track_id)
+        self._push_undo(self._undo_remove_track, i, track, end_heap)
+        self._hold(track)
+        self._mark_modified(track_id)
+        self.update_project_duration()
+        logger.info(f"Track removed: id={track_id}, index={i}")
+        return True
     
     def get_track_by_id(self, track_id: str) -> dict | None:
         """根据ID获取轨道"""
-        tracks = self._draft_info['tracks']
-        return next((track for track in tracks if track['id'] == track_id), None)
+        self._ensure_indexes()
+        return self._track_index.get(track_id)
     
     def get_track_by_index(self, index: int) -> dict | None:
         """根据索引获取轨道"""
@@ -180,12 +871,17 @@ class JianYingProtocol(OssMixin):
     
     def get_track_by_segment_id(self, segment_id: str) -> dict | None:
         """根据片段ID获取轨道"""
-        return next(
-            (track for track in self._draft_info['tracks'] 
-             for seg in track['segments'] 
-             if seg['id'] == segment_id), 
-            None
-        )
+        self._ensure_indexes()
+        entry = self._segment_index.get(segment_id)
+        return entry[0] if entry else None
+    
+    def get_segment_by_id(self, segment_id: str) -> dict | None:
+        """根据ID获取片段"""
+        entry = self._locate_segment(segment_id)
+        if not entry:
+            return None
+        track, position = entry
+        return track['segments'][position]
     
     def get_track_type_by_id(self, track_id: str) -> str | None:
         """获取轨道类型"""
@@ -197,14 +893,23 @@ class JianYingProtocol(OssMixin):
         return self._draft_info['tracks']
     
     def get_track_last_segment_time(self, track_id: str) -> int:
-        """获取轨道最后一个片段的结束时间（微秒）"""
+        """获取轨道结束时间，即所有片段结束时间的最大值（微秒）"""
         track = self.get_track_by_id(track_id)
         if not track:
             raise ValueError(f"Track not found: {track_id}")
-        if len(track['segments']) == 0:
-            return 0
-        last_segment = track['segments'][-1]
-        return last_segment['target_timerange']['start'] + last_segment['target_timerange']['duration']
+        end_heap = self._track_end_heaps[track_id]
+        # 已删除片段的记录不在堆顶时不会被清理：超过一半时按当前片段重新构建（原地修改，撤销日志可能引用该堆）
+        if len(end_heap) > 2 * len(track['segments']):
+            end_heap[:] = [(-get_segment_end_time(segment), segment['id']) for segment in track['segments']]
+            heapq.heapify(end_heap)
+        while end_heap:
+            neg_end_time, segment_id = end_heap[0]
+            entry = self._segment_index.get(segment_id)
+            if entry and entry[0] is track:
+                return -neg_end_time
+            # 片段已删除，延迟清理
+            heapq.heappop(end_heap)
+        return 0
     
     # ==================== 素材管理 ====================
     def get_materials_by_type(self, material_type: str) -> list[dict] | None:
@@ -218,7 +923,10 @@ class JianYingProtocol(OssMixin):
     def get_material(self, material_type: str, material_id: str) -> dict | None:
         """获取指定素材"""
         materials = self.get_materials_by_type(material_type)
-        return next((m for m in materials if m['id'] == material_id), None)
+        entry = self._locate_material(material_id)
+        if not entry or entry[0] != material_type:
+            return None
+        return materials[entry[1]]
     
     def get_material_by_index(self, material_type: str, index: int) -> dict | None:
         """根据索引获取素材"""
@@ -238,71 +946,86 @@ class JianYingProtocol(OssMixin):
     def add_material(self, material_type: str, material: dict) -> str:
         """添加素材"""
         materials = self.get_materials_by_type(material_type)
+        self._ensure_indexes()
         material['id'] = str(uuid.uuid4())
         materials.append(material)
+        self._material_index[material['id']] = (material_type, len(materials) - 1)
+        self._retain_remote_url(material.get('remote_url'))
+        self._record('material_add', material_type, material)
+        self._push_undo(self._undo_insert_material, material_type, len(materials) - 1)
+        self._mark_modified()
         return material['id']
     
     def update_material(self, material_type: str, material_id: str, material: dict) -> bool:
         """更新素材"""
         materials = self.get_materials_by_type(material_type)
-        idx = next((i for i, m in enumerate(materials) if m['id'] == material_id), None)
-        if idx is not None:
-            material['id'] = material_id
-            materials[idx] = material
-            return True
-        return False
+        entry = self._locate_material(material_id)
+        if not entry or entry[0] != material_type:
+            return False
+        material['id'] = material_id
+        old_material = materials[entry[1]]
+        self._retain_remote_url(material.get('remote_url'))
+        self._release_remote_url(old_material.get('remote_url'))
+        materials[entry[1]] = material
+        self._record('material_put', material_type, material)
+        self._push_undo(self._undo_update_material, material_type, entry[1], old_material, material)
+        self._hold(old_material)
+        self._mark_modified()
+        return True
     
     def remove_material(self, material_type: str, material_id: str) -> bool:
         """删除素材"""
-        materials = self.get_materials_by_type(material_type)
-        idx = next((i for i, m in enumerate(materials) if m['id'] == material_id), None)
-        if idx is not None:
-            del materials[idx]
-            return True
-        return False
+        self.get_materials_by_type(material_type)
+        self._ensure_indexes()
+        entry = self._material_index.get(material_id)
+        if not entry or entry[0] != material_type:
+            return False
+        self._delete_material(material_id)
+        return True
     
     def remove_material_by_id(self, material_id: str) -> bool:
         """根据ID删除素材（自动识别类型）"""
-        for material_type in JIANYING_MATERIAL_TYPES:
-            materials = self.get_materials_by_type(material_type)
-            idx = next((i for i, m in enumerate(materials) if m['id'] == material_id), None)
-            if idx is None:
-                continue
-            # 删除素材
-            remote_url = materials[idx].get('remote_url', None)
-            del materials[idx]
-            # 检查是否还有素材引用该文件
-            if remote_url and not self.check_material_by_remote_url(remote_url):
-                # 删除素材本地文件
-                os.remove(self.get_absolute_file_path(remote_url))
-                logger.info(f"Local material file deleted: {remote_url}")
-                # 删除虚拟文件夹和素材元信息
-                self.remove_meta_info_and_virtual_store_by_remote_url(remote_url)
-            return True
-        return False
+        self._ensure_indexes()
+        if material_id not in self._material_index:
+            return False
+        # 删除素材
+        _, material = self._delete_material(material_id)
+        remote_url = material.get('remote_url', None)
+        # 检查是否还有素材引用该文件
+        if remote_url and not self.check_material_by_remote_url(remote_url):
+            # 删除素材本地文件（可能仍在下载中）；事务中推迟到事务结束后，且不再被撤销历史引用时删除
+            if self._transaction_state is None:
+                self._delete_unused_files([remote_url])
+            # 删除虚拟文件夹和素材元信息
+            self.remove_meta_info_and_virtual_store_by_remote_url(remote_url)
+        return True
     
     def check_material_by_remote_url(self, remote_url: str) -> bool:
         """检查是否还有素材引用该文件"""
-        for material_type in JIANYING_MATERIAL_TYPES:
-            materials = self.get_materials_by_type(material_type)
-            for material in materials:
-                if 'remote_url' not in material or material['remote_url'] != remote_url:
-                    continue
-                return True
-        return False
+        self._ensure_indexes()
+        return remote_url in self._remote_url_refs
     
     def add_material_to_draft_meta_info(self, material_meta_info: dict) -> str:
         """添加素材元信息"""
+        self._ensure_indexes()
         draft_materials = self.draft_meta_info['draft_materials']
         material_meta_info['id'] = str(uuid.uuid4())
-        draft_materials[0]['value'].append(material_meta_info)
+        materials = draft_materials[0]['value']
+        materials.append(material_meta_info)
+        indexed = material_meta_info.get('remote_url') not in self._meta_info_index
+        if indexed:
+            self._meta_info_index[material_meta_info.get('remote_url')] = (material_meta_info, len(materials) - 1)
+        self._record('meta_info_add', material_meta_info)
+        self._push_undo(self._undo_add_meta_info, len(materials) - 1, material_meta_info, indexed)
+        self._mark_modified()
         return material_meta_info['id']
     
     def add_material_to_virtual_store(self, media_material: JianYingMediaMaterialInfo, meta_id: str) -> bool:
         """添加展示素材到虚拟素材库"""
+        self._ensure_indexes()
         draft_virtual_store_list1 = self.draft_virtual_store['draft_virtual_store'][1]['value']
         # meta_id 是否存在
-        if next((item for item in draft_virtual_store_list1 if item['child_id'] == meta_id), None) is not None:
+        if meta_id in self._virtual_relation_index:
             return False
         # 查找分类是否存在
         category = media_material.category
@@ -320,62 +1043,96 @@ class JianYingProtocol(OssMixin):
                 parent_info = build_folder_info(category)
                 parent_id = parent_info['id']
                 draft_virtual_store_list0.append(parent_info)
+                self._record('folder_add', parent_info)
+                self._push_undo(self._undo_add_folder, len(draft_virtual_store_list0) - 1, parent_info)
                 # 添加到根节点下
-                draft_virtual_store_list1.append({
-                    'child_id': parent_id,
-                    'parent_id': ''
-                })
+                self._add_virtual_relation(parent_id, '')
                 logger.info(f"Category created: {category}, id={parent_id}")
         # 添加素材到虚拟素材库
-        draft_virtual_store_list1.append({
-            'child_id': meta_id,
-            'parent_id': parent_id
-        })
+        self._add_virtual_relation(meta_id, parent_id)
+        self._mark_modified()
         return True
     
+    def _add_virtual_relation(self, child_id: str, parent_id: str):
+        """添加虚拟素材库父子关系并更新索引"""
+        relation = {
+            'child_id': child_id,
+            'parent_id': parent_id
+        }
+        relations = self.draft_virtual_store['draft_virtual_store'][1]['value']
+        relations.append(relation)
+        self._record('relation_add', relation)
+        self._push_undo(self._undo_add_virtual_relation, len(relations) - 1, relation)
+        self._virtual_relation_index[child_id] = (relation, len(relations) - 1)
+        self._virtual_folder_children[parent_id] = self._virtual_folder_children.get(parent_id, 0) + 1
+    
+    def _remove_virtual_relation(self, child_id: str) -> dict | None:
+        """删除虚拟素材库父子关系并更新索引，返回被删除的关系"""
+        entry = self._virtual_relation_index.pop(child_id, None)
+        if not entry:
+            return None
+        relation, position = entry
+        relations = self.draft_virtual_store['draft_virtual_store'][1]['value']
+        position = self._locate_item(relations, relation, position)
+        del relations[position]
+        self._record('relation_remove', child_id)
+        self._push_undo(self._undo_remove_virtual_relation, position, relation)
+        self._hold(relation)
+        parent_id = relation['parent_id']
+        count = self._virtual_folder_children.get(parent_id, 0) - 1
+        if count > 0:
+            self._virtual_folder_children[parent_id] = count
+        else:
+            self._virtual_folder_children.pop(parent_id, None)
+        return relation
+    
     def remove_meta_info_and_virtual_store_by_remote_url(self, remote_url: str) -> bool:
         """移除虚拟文件夹和素材元信息（如果文件夹为空则同时删除文件夹）"""
+        self._ensure_indexes()
         materials = self._draft_meta_info['draft_materials'][0]['value']
         virtual_folders = self.draft_virtual_store['draft_virtual_store'][0]['value']
-        virtual_relations = self.draft_virtual_store['draft_virtual_store'][1]['value']
         
         # 1. 查找并删除素材元信息
-        material = next((m for m in materials if m.get('remote_url') == remote_url), None)
-        if not material:
+        entry = self._meta_info_index.pop(remote_url, None)
+        if not entry:
             return False
         
+        material, position = entry
         meta_id = material['id']
-        materials.remove(material)
+        position = self._locate_item(materials, material, position)
+        del materials[position]
+        self._record('meta_info_remove', meta_id)
+        self._push_undo(self._undo_remove_meta_info, position, material, True)
+        self._hold(material)
+        self._mark_modified()
         
         # 2. 查找并删除虚拟关系
-        relation = next((r for r in virtual_relations if r['child_id'] == meta_id), None)
+        relation = self._remove_virtual_relation(meta_id)
         if not relation:
             return False
         
-        parent_id = relation['parent_id']
-        virtual_relations.remove(relation)
-        
         # 3. 如果没有父文件夹或文件夹还有其他文件，则不删除文件夹
+        parent_id = relation['parent_id']
         if not parent_id:
             return True
         
-        has_other_files = any(r['parent_id'] == parent_id for r in virtual_relations)
-        if has_other_files:
+        if parent_id in self._virtual_folder_children:
             return True
         
-        # 4. 删除空文件夹
-        folder = next((f for f in virtual_folders if f['id'] == parent_id), None)
-        if folder:
-            virtual_folders.remove(folder)
+        # 4. 删除空文件夹（同时删除文件夹挂在根节点下的关系）
+        position = next((i for i, f in enumerate(virtual_folders) if f['id'] == parent_id), None)
+        if position is not None:
+            folder = virtual_folders.pop(position)
+            self._record('folder_remove', parent_id)
+            self._push_undo(self._undo_remove_folder, position, folder)
+            self._hold(folder)
+            self._remove_virtual_relation(parent_id)
         return True
     
     def is_material_meta_info_exists(self, media_material: JianYingMediaMaterialInfo) -> bool:
         """检查素材元信息是否已存在"""
-        materials = self._draft_meta_info['draft_materials'][0]['value']
-        return next(
-            (m for m in materials if m['remote_url'] == media_material.url), 
-            None
-        ) is not None
+        self._ensure_indexes()
+        return media_material.url in self._meta_info_index
     
     # ==================== 片段查询 ====================
     def get_track_segment_size(self, track_id: str) -> int:
@@ -408,6 +1165,8 @@ class JianYingProtocol(OssMixin):
         if not track:
             raise ValueError(f"Track not found: {track_id}")
         self.check_media_track_type(track['type'], media_material)
+        # 接口层已在任务锁外补齐媒体信息，此处兼容直接调用（已补齐时不会重复探测）
+        resolve_media_materials([media_material])
         
         # 2. 计算时长和时间
         duration = self._calculate_media_duration(media_material)
@@ -543,7 +1302,7 @@ class JianYingProtocol(OssMixin):
         
         # 3. 完成（复杂文本的ID已在 build_complex_text_segment 中生成）
         segment_id = segment['id']
-        track['segments'].append(segment)
+        self._append_segment(track, segment)
         self.update_project_duration()
         
         logger.info(
@@ -593,6 +1352,100 @@ class JianYingProtocol(OssMixin):
             start_time, duration
         )
     
+    def build_timeline(self, tracks: list[JianYingTimelineTrackInfo], replace: bool = False) -> list[dict]:
+        """
+        按时间线描述一次性构建轨道和片段
+        
+        先并行探测所有媒体素材、登记所有远程素材的下载，再按顺序添加轨道和片段，
+        工程时长在构建完成后统一更新一次。
+        
+        Args:
+            tracks: 时间线轨道列表
+            replace: 是否先删除现有的所有轨道
+        
+        Returns:
+            [{'track_id': 轨道ID, 'segment_ids': [片段ID]}]，与 tracks 顺序一致
+        """
+        # 1. 并行探测媒体信息，所有远程素材提前登记下载（并行执行）
+        media_materials = [
+            segment.media_material
+            for track in tracks for segment in track.segments
+            if segment.segment_type == 'media'
+        ]
+        resolve_media_materials(media_materials)
+        urls = list(dict.fromkeys(media_material.url for media_material in media_materials))
+        
+        results = []
+        self._defer_duration_update = True
+        try:
+            for url in urls:
+                self.url_to_resource_path(url)
+            
+            if replace:
+                for track in list(self._draft_info['tracks']):
+                    # 先移除片段的素材（释放资源引用、素材元信息和虚拟素材库），再删除轨道
+                    for segment in track['segments']:
+                        self._remove_segment_materials(segment)
+                    self.remove_track(track['id'])
+            
+            # 2. 按顺序添加轨道和片段
+            for track_info in tracks:
+                track_id = self.add_track(track_info.track_type)
+                segment_ids = []
+                for segment_info in track_info.segments:
+                    segment_id = self._add_timeline_segment(track_id, segment_info)
+                    for internal_material in segment_info.internal_materials:
+                        self.add_internal_material_to_segment(segment_id, internal_material)
+                    segment_ids.append(segment_id)
+                results.append({'track_id': track_id, 'segment_ids': segment_ids})
+        except Exception:
+            # 构建失败：提前登记、但没有素材引用的下载和本地文件需要删除（事务中推迟到回滚后）
+            if self._transaction_state is not None:
+                self._released_urls.extend(urls)
+            else:
+                self._delete_unused_files(urls)
+            raise
+        finally:
+            self._defer_duration_update = False
+            self.update_project_duration()
+        
+        logger.info(
+            f"Timeline built: tracks={len(results)}, "
+            f"segments={sum(len(result['segment_ids']) for result in results)}, "
+            f"project_duration={self.base_info.duration}"
+        )
+        return results
+    
+    def _add_timeline_segment(self, track_id: str, segment_info: JianYingTimelineSegmentInfo) -> str:
+        """按片段类型添加时间线片段"""
+        segment_type = segment_info.segment_type
+        material = segment_info.material
+        if segment_type == 'media':
+            return self.add_media_segment_to_track(
+                track_id, material, segment_info.start_time, segment_info.transform
+            )
+        if segment_type == 'text':
+            return self.add_text_segment_to_track(
+                track_id, material, segment_info.start_time, segment_info.duration, segment_info.transform
+            )
+        if segment_type == 'complex_text':
+            return self.add_complex_text_segment_to_track(
+                track_id, material, segment_info.start_time, segment_info.duration, segment_info.transform
+            )
+        if segment_type == 'sticker':
+            return self.add_sticker_segment_to_track(
+                track_id, material, segment_info.start_time, segment_info.duration, segment_info.transform
+            )
+        if segment_type == 'filter':
+            return self.add_filter_segment_to_track(
+                track_id, material, segment_info.start_time, segment_info.duration
+            )
+        if segment_type == 'effect':
+            return self.add_effect_segment_to_track(
+                track_id, material, segment_info.start_time, segment_info.duration
+            )
+        return self.add_audio_effect_segment_to_track(track_id, material, segment_info.start_time)
+    
     def add_internal_material_to_segment(
         self, 
         segment_id: str, 
@@ -611,7 +1464,7 @@ class JianYingProtocol(OssMixin):
         if not track:
             raise ValueError(f"Track not found for segment: {segment_id}")
         
-        segment = next((seg for seg in track['segments'] if seg['id'] == segment_id), None)
+        segment = self.get_segment_by_id(segment_id)
         if not segment:
             raise ValueError(f"Segment not found: {segment_id}")
         
@@ -621,7 +1474,10 @@ class JianYingProtocol(OssMixin):
             raise ValueError(f"Material type not supported: {material_info.get('type')}")
         
         material_id = self.add_material(material_type, material_info)
+        self._save_segment(segment)
         segment['extra_material_refs'].append(material_id)
+        self._record('segment_put', track['id'], segment)
+        self._mark_modified(track['id'])
         return material_id
     
     # ==================== 片段更新 ====================
@@ -637,7 +1493,7 @@ class JianYingProtocol(OssMixin):
         if track['type'] != 'text':
             raise ValueError(f"Track type not supported: {track['type']}, expected: text")
         
-        segment = next((seg for seg in track['segments'] if seg['id'] == segment_id), None)
+        segment = self.get_segment_by_id(segment_id)
         if not segment:
             raise ValueError(f"Segment not found: {segment_id}")
         
@@ -661,18 +1517,18 @@ class JianYingProtocol(OssMixin):
         if not track:
             raise ValueError(f"Track not found: {segment_id}")
     
-        segment = next((seg for seg in track['segments'] if seg['id'] == segment_id), None)
+        segment = self.get_segment_by_id(segment_id)
         if not segment:
             raise ValueError(f"Segment not found: {segment_id}")
         
         material = self.get_material('texts', segment['material_id'])
         if not material:
             raise ValueError(f"Material not found: {segment['material_id']}")
-        material['text'] = text
         content = json.loads(material['content'])
         content['text'] = text
         content['styles'][0]['range'] = [0, len(text)]
-        material['content'] = json.dumps(content)
+        # 替换为新素材（不原地修改，原素材用于回滚）
+        material = {**material, 'text': text, 'content': json.dumps(content)}
         self.update_material('texts', segment['material_id'], material)
         return segment['id']
     
@@ -688,11 +1544,14 @@ class JianYingProtocol(OssMixin):
         if track['type'] not in ['video', 'text', 'sticker']:
             raise ValueError(f"Track type not supported: {track['type']}, expected: video, text, sticker")
         
-        segment = next((seg for seg in track['segments'] if seg['id'] == segment_id), None)
+        segment = self.get_segment_by_id(segment_id)
         if not segment:
             raise ValueError(f"Segment not found: {segment_id}")
         
+        self._save_segment(segment)
         self.add_transform_info_to_segment(segment, transform_info)
+        self._record('segment_put', track['id'], segment)
+        self._mark_modified(track['id'])
         return segment['id']
     
     def update_segment_adjust_info(
@@ -707,10 +1566,11 @@ class JianYingProtocol(OssMixin):
         if track['type'] != 'video':
             raise ValueError(f"Track type not supported: {track['type']}, expected: video")
         
-        segment = next((seg for seg in track['segments'] if seg['id'] == segment_id), None)
+        segment = self.get_segment_by_id(segment_id)
         if not segment:
             raise ValueError(f"Segment not found: {segment_id}")
         
+        self._save_segment(segment)
         # 需要移除原有调色信息
         new_extra_material_refs = []
         for extra_material_id in segment['extra_material_refs']:
@@ -725,6 +1585,8 @@ class JianYingProtocol(OssMixin):
         
         # 更新片段的素材引用列表
         segment['extra_material_refs'] = new_extra_material_refs
+        self._record('segment_put', track['id'], segment)
+        self._mark_modified(track['id'])
         
         # 添加新的调色信息
         self.add_adjust_info_to_segment(segment, adjust_info)
@@ -738,12 +1600,12 @@ class JianYingProtocol(OssMixin):
         if not track:
             return False
         
-        segment = next((seg for seg in track['segments'] if seg['id'] == segment_id), None)
+        segment = self.get_segment_by_id(segment_id)
         if not segment:
             return False
         
         self._remove_segment_materials(segment)
-        track['segments'].remove(segment)
+        self._delete_segment(segment_id)
         self.update_project_duration()
         logger.info(f"Segment removed: segment={segment_id}, project_duration={self.base_info.duration}")
         return True
@@ -912,8 +1774,9 @@ class JianYingProtocol(OssMixin):
     def _finalize_segment(self, track: dict, segment: dict) -> str:
         """完成片段添加：生成ID、添加到轨道、更新时长"""
         segment_id = self._generate_segment_id(segment)
-        track['segments'].append(segment)
-        self.update_project_duration()
+        self._append_segment(track, segment)
+        if not self._defer_duration_update:
+            self.update_project_duration()
         return segment_id
     
     def _remove_segment_materials(self, segment: dict) -> None:
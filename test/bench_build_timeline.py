@@ -0,0 +1,102 @@
+"""
+整体构建时间线基准测试：300 个片段的时间线，对比逐个调用单项接口和一次调用 /tasks/{task_id}/timeline
+
+不访问网络：媒体探测和 OSS 下载替换为固定延迟的模拟实现（PROBE_DELAY / DOWNLOAD_DELAY 秒），
+视频素材不指定时长（需要探测）。两种方式的结果（轨道片段数、工程时长、转场素材数）必须一致。
+
+用法：python test/bench_build_timeline.py [视频片段数，默认 100]
+"""
+import sys
+import time
+import uuid
+import logging
+from common import *
+from fastapi.testclient import TestClient
+import main
+import utils.media_probe as media_probe
+from utils.media_prefetch import media_prefetcher
+from utils.oss_utils import OssMixin
+
+PROBE_DELAY = 0.05
+DOWNLOAD_DELAY = 0.1
+
+
+def timeline_spec(media_count: int) -> list[dict]:
+    """视频轨道 media_count 个片段（每 10 个带一个转场）+ 两条各 media_count 个片段的文本轨道"""
+    tag = uuid.uuid4().hex[:8]
+    media = [
+        {
+            "segment_type": "media",
+            "media_material": {
+                "url": f"https://bench.oss-cn-hangzhou.aliyuncs.com/v/{tag}_{i}.mp4",
+                "media_type": "video",
+                "duration": None,
+                "adjust_info": {"brightness": 10}
+            },
+            "internal_materials": [{"material_info": {"type": "transition", "name": "叠化"}}] if i % 10 == 0 else []
+        }
+        for i in range(media_count)
+    ]
+    texts = [
+        {"segment_type": "text", "text_material": {"text": f"t{i}"}, "duration": 1000}
+        for i in range(media_count * 2)
+    ]
+    return [
+        {"track_type": "video", "segments": media},
+        {"track_type": "text", "segments": texts[:media_count]},
+        {"track_type": "text", "segments": texts[media_count:]}
+    ]
+
+
+def build_sequential(client: TestClient, task_id: str, tracks: list[dict]):
+    """逐个调用添加轨道、片段、内部材质接口"""
+    for track in tracks:
+        track_id = ok(client.post('/tracks', json={'task_id': task_id, 'track_type': track['track_type']}))['track_id']
+        for segment in track['segments']:
+            if segment['segment_type'] == 'media':
+                segment_id = ok(client.post('/segments/media', json={
+                    'task_id': task_id, 'track_id': track_id, 'media_material': segment['media_material']
+                }))['segment_id']
+                for internal_material in segment['internal_materials']:
+                    ok(client.post('/segments/internal-material', json={
+                        'task_id': task_id, 'segment_id': segment_id, 'internal_material': internal_material
+                    }))
+            else:
+                ok(client.post('/segments/text', json={
+                    'task_id': task_id, 'track_id': track_id,
+                    'text_material': segment['text_material'], 'duration': segment['duration']
+                }))
+
+
+def summary(client: TestClient, task_id: str) -> tuple:
+    draft_info = ok(client.get(f'/tasks/{task_id}/draft_info'))
+    return (
+        [len(track['segments']) for track in draft_info['tracks']],
+        draft_info['duration'],
+        len(draft_info['materials']['transitions'])
+    )
+
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    media_probe.probe_media = fake_probe_media(PROBE_DELAY)
+    OssMixin.get_object_file = fake_get_object_file(DOWNLOAD_DELAY)
+    media_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    with TestClient(main.app) as client:
+        sequential_task = create_task(main.task_manager, 'bench-sequential')
+        start = time.perf_counter()
+        build_sequential(client, sequential_task, timeline_spec(media_count))
+        sequential = time.perf_counter() - start
+
+        timeline_task = create_task(main.task_manager, 'bench-timeline')
+        start = time.perf_counter()
+        ok(client.post(f'/tasks/{timeline_task}/timeline', json={'tracks': timeline_spec(media_count)}))
+        timeline = time.perf_counter() - start
+
+        assert summary(client, sequential_task) == summary(client, timeline_task)
+        for task_id in (sequential_task, timeline_task):
+            media_prefetcher.wait(task_id)
+            main.task_manager.remove_task(task_id)
+
+    print(f'{media_count * 3} 个片段: 逐个调用 {sequential:.2f}s, 整体构建 {timeline:.2f}s, 加速 {sequential / timeline:.1f}x')
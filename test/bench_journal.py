@@ -0,0 +1,47 @@
+"""
+操作日志（WAL）基准测试：1 MB / 20 MB 草稿上每次修改的持久化耗时与草稿大小无关
+
+每次添加文本片段的请求结束前追加一条操作日志记录并 fsync；对照为改动前每次修改后
+重写完整的三个 JSON（JianYingProject.save）的耗时。
+
+用法：python test/bench_journal.py
+"""
+import time
+import logging
+from common import *
+from fastapi.testclient import TestClient
+import main
+
+EDITS = 50
+
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    with TestClient(main.app) as client:
+        for size_mb in (1, 20):
+            task_id = ok(client.post('/tasks', json={'name': 'bench-journal'}))['task_id']
+            with main.task_manager.get_task(task_id) as task:
+                track_id = fill_text_segments(task.jianyingProject.protocol, size_mb)
+                task.jianyingProject.save()
+
+            with main.task_manager.get_task_readonly(task_id) as task:
+                journal = task.jianyingProject.journal
+                journal_size = journal.size
+            start = time.perf_counter()
+            for i in range(EDITS):
+                ok(client.post('/segments/text', json={
+                    'task_id': task_id, 'track_id': track_id, 'text_material': {'text': f'修改{i}'}, 'duration': 100
+                }))
+            per_edit = (time.perf_counter() - start) * 1000 / EDITS
+            assert journal.records == EDITS, '修改未写入操作日志（TASK_WAL_ENABLED=false？）'
+            record_size = (journal.size - journal_size) / EDITS
+
+            with main.task_manager.get_task(task_id) as task:
+                start = time.perf_counter()
+                task.jianyingProject.save()
+                full_save = (time.perf_counter() - start) * 1000
+            print(
+                f'{size_mb:2d} MB 草稿: 每次修改（请求 + 追加日志）{per_edit:6.1f} ms, 日志记录 {record_size:5.0f} bytes; '
+                f'重写完整 JSON {full_save:7.1f} ms'
+            )
+            main.task_manager.remove_task(task_id)
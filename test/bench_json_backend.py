@@ -0,0 +1,73 @@
+"""
+JSON 后端基准测试：1 MB / 20 MB 草稿的落盘、加载和 GET /tasks/{task_id}/draft_info 响应耗时
+
+对比标准库 json（缩进，改动前的落盘方式）和当前后端（JSON_BACKEND，默认 orjson > msgspec > json）
+的缩进、紧凑（JSON_COMPACT=true）格式。落盘均为写入文件并 fsync，取多次中最快的一次。
+
+用法：python test/bench_json_backend.py
+"""
+import os
+import json
+import time
+import logging
+from common import *
+from fastapi.testclient import TestClient
+import main
+from utils.json_utils import JSON_BACKEND_NAME, json_dumps, json_loads
+from utils.function_utils import get_project_path, get_draft_path
+
+ROUNDS = 5
+
+
+def best_ms(func, rounds: int = ROUNDS) -> float:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def write_file(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    variants = {
+        '标准库 json 缩进': lambda data: json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
+        f'{JSON_BACKEND_NAME} 缩进': lambda data: json_dumps(data, indent=True),
+        f'{JSON_BACKEND_NAME} 紧凑': lambda data: json_dumps(data),
+    }
+    loads = {
+        '标准库 json 缩进': lambda content: json.loads(content),
+        f'{JSON_BACKEND_NAME} 缩进': json_loads,
+        f'{JSON_BACKEND_NAME} 紧凑': json_loads,
+    }
+
+    with TestClient(main.app) as client:
+        for size_mb in (1, 20):
+            task_id = client.post('/tasks', json={'name': 'bench-json'}).json()['data']['task_id']
+            with main.task_manager.get_task(task_id) as task:
+                fill_text_segments(task.jianyingProject.protocol, size_mb)
+                draft_info = task.jianyingProject.protocol.draft_info
+            path = get_draft_path(get_project_path(task_id)) + '.bench'
+
+            for name, dumps in variants.items():
+                save = best_ms(lambda: write_file(path, dumps(draft_info)))
+                file_size = os.path.getsize(path) / 1024 / 1024
+                load = best_ms(lambda: loads[name](read_file(path)))
+                print(f'{size_mb:2d} MB 草稿 {name:14s} 文件 {file_size:5.1f} MB: 落盘 {save:7.1f} ms, 加载 {load:7.1f} ms')
+            os.remove(path)
+
+            response = best_ms(lambda: client.get(f'/tasks/{task_id}/draft_info'), 3)
+            print(f'{size_mb:2d} MB 草稿 GET draft_info（{JSON_BACKEND_NAME}）: {response:7.1f} ms')
+            main.task_manager.remove_task(task_id)
@@ -0,0 +1,53 @@
+"""
+媒体信息缓存写入基准测试：缓存中已有 N 条记录时，每次写入新探测结果的耗时
+
+写入耗时应与缓存条数无关（只追加一条记录）。
+
+用法：python test/bench_media_probe_cache.py
+"""
+import os
+import time
+import shutil
+import tempfile
+import threading
+from common import *
+from utils.media_probe import MediaProbe
+
+PUTS = 400
+THREADS = 8
+
+
+def media_info(i: int) -> dict:
+    return {'duration': 1000 + i, 'width': 1920, 'height': 1080}
+
+
+def bench(entries: int, threads: int) -> float:
+    """返回每次写入的平均耗时（毫秒）"""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        probe = MediaProbe(os.path.join(cache_dir, 'media_probe_cache.jsonl'), max_entries=entries + PUTS)
+        probe._ensure_loaded()
+        for i in range(entries):
+            probe._cache[f'https://bench.oss-cn-hangzhou.aliyuncs.com/v/{i}.mp4'] = media_info(i)
+
+        def worker(offset: int):
+            for i in range(offset, PUTS, threads):
+                probe._put(f'https://bench.oss-cn-hangzhou.aliyuncs.com/new/{i}.mp4', media_info(i))
+
+        workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return (time.perf_counter() - start) * 1000 / PUTS
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    for entries in (100, 1000, 10000):
+        print(
+            f'{entries} 条缓存: 单线程 {bench(entries, 1):.3f} ms/次, '
+            f'{THREADS} 线程并行 {bench(entries, THREADS):.3f} ms/次'
+        )
@@ -0,0 +1,75 @@
+"""
+OSS 客户端复用基准测试：每次请求新建 Auth + Bucket（改动前）与复用进程内 bucket 客户端的单次请求开销
+
+不访问网络：请求发往本地 HTTP 服务（HEAD 立即返回 200），测量的是客户端创建和建立连接的开销。
+本地回环上建立 TCP 连接很快，真实 OSS（跨网络、HTTPS 握手）上复用连接节省的时间更多。
+
+用法：python test/bench_oss_client.py
+"""
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from common import *
+import oss2
+from utils.oss_utils import OssMixin, get_oss_auth, get_bucket, OSS_POOL_SIZE, OSS_CONNECT_TIMEOUT
+
+REQUESTS = 1000
+URL = 'https://bench.oss-cn-hangzhou.aliyuncs.com/v/clip.mp4'
+
+
+class HeadHandler(BaseHTTPRequestHandler):
+    """对象元信息请求直接返回 200（保持连接）"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def per_request(func) -> float:
+    """返回单次请求的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        func()
+    return (time.perf_counter() - start) * 1e6 / REQUESTS
+
+
+def new_client_each_time(endpoint: str, key: str):
+    """改动前：每次请求新建 Auth、Bucket（各自新建 HTTP 会话和连接）"""
+    auth = oss2.Auth(os.getenv('OSS_AK'), os.getenv('OSS_SK'))
+    bucket = oss2.Bucket(auth, endpoint, 'bench', is_cname=True, connect_timeout=OSS_CONNECT_TIMEOUT, enable_crc=False)
+    bucket.object_exists(key)
+
+
+if __name__ == '__main__':
+    server = ThreadingHTTPServer(('127.0.0.1', 0), HeadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f'http://127.0.0.1:{server.server_port}'
+    key = 'v/clip.mp4'
+
+    # 只创建客户端、解析 URL（不发请求）
+    mixin = OssMixin()
+    setup_before = per_request(lambda: oss2.Bucket(
+        oss2.Auth(os.getenv('OSS_AK'), os.getenv('OSS_SK')), 'oss-cn-hangzhou.aliyuncs.com', 'bench',
+        connect_timeout=OSS_CONNECT_TIMEOUT, enable_crc=False
+    ))
+    setup_after = per_request(lambda: mixin.get_bucket_from_url(URL))
+
+    # 发送请求（本地服务，bucket 客户端与 get_bucket 的配置一致，使用 CNAME 访问本地地址）
+    shared = oss2.Bucket(
+        get_oss_auth(), endpoint, 'bench', is_cname=True,
+        session=oss2.Session(pool_size=OSS_POOL_SIZE), connect_timeout=OSS_CONNECT_TIMEOUT, enable_crc=False
+    )
+    shared.object_exists(key)
+    request_before = per_request(lambda: new_client_each_time(endpoint, key))
+    request_after = per_request(lambda: shared.object_exists(key))
+    server.shutdown()
+
+    assert get_bucket('oss-cn-hangzhou.aliyuncs.com', 'bench') is mixin.get_bucket_from_url(URL)[0]
+    print(f'创建客户端: 每次新建 {setup_before:7.1f} us, 复用 {setup_after:7.1f} us')
+    print(f'HEAD 请求:  每次新建 {request_before:7.1f} us, 复用 {request_after:7.1f} us')
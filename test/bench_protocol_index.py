@@ -0,0 +1,78 @@
+"""
+草稿 ID 索引基准测试：1k / 10k 个片段的合成草稿上，按 ID 查找、修改、删除片段和素材的单次耗时
+
+按 ID 的操作通过索引定位，耗时应与片段数无关；同时给出线性扫描轨道查找片段的耗时作为对照。
+
+用法：python test/bench_protocol_index.py
+"""
+import time
+import uuid
+import random
+import logging
+from common import *
+from utils.function_utils import build_draft_info, build_draft_meta_info, build_draft_virtual_store
+
+OPERATIONS = 500
+
+
+def build_protocol(segment_count: int) -> tuple[JianYingProtocol, list[str]]:
+    """两条文本轨道（字幕），共 segment_count 个片段"""
+    base_info = JianYingBaseInfo(name='bench', unique_id=str(uuid.uuid4()))
+    protocol = JianYingProtocol(JianYingData(
+        base_info, build_draft_info(base_info.unique_id, 720, 1280, 0, 30),
+        build_draft_meta_info('bench'), build_draft_virtual_store()
+    ))
+    track_ids = [protocol.add_track('text'), protocol.add_track('text')]
+    segment_ids = [
+        protocol.add_text_segment_to_track(track_ids[i % 2], JianYingTextMaterialInfo(text=f'字幕{i}'), duration=100)
+        for i in range(segment_count)
+    ]
+    return protocol, segment_ids
+
+
+def per_op(func, ids: list[str]) -> float:
+    """返回单次操作的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for item_id in ids:
+        func(item_id)
+    return (time.perf_counter() - start) * 1e6 / len(ids)
+
+
+def scan_segment(protocol: JianYingProtocol, segment_id: str) -> dict:
+    """线性扫描所有轨道查找片段（对照）"""
+    return next(
+        segment for track in protocol.draft_info['tracks'] for segment in track['segments']
+        if segment['id'] == segment_id
+    )
+
+
+def bench(segment_count: int) -> dict[str, float]:
+    protocol, segment_ids = build_protocol(segment_count)
+    rng = random.Random(4)
+    sample = rng.sample(segment_ids, OPERATIONS)
+    material_ids = [protocol.get_segment_by_id(segment_id)['material_id'] for segment_id in sample]
+    order = [material['id'] for material in protocol.get_materials_by_type('texts')]
+    transform = SegmentTransformInfo(translate_x=0.1)
+    results = {
+        '线性扫描查找片段': per_op(lambda segment_id: scan_segment(protocol, segment_id), sample),
+        '查找片段': per_op(protocol.get_segment_by_id, sample),
+        '查找片段所在轨道': per_op(protocol.get_track_by_segment_id, sample),
+        '查找素材': per_op(lambda material_id: protocol.get_material('texts', material_id), material_ids),
+        '修改位置': per_op(lambda segment_id: protocol.update_segment_transform_info(segment_id, transform), sample),
+        '修改文本': per_op(lambda segment_id: protocol.update_text_content(segment_id, '修改'), sample),
+        '删除片段': per_op(protocol.remove_segment_by_id, sample),
+    }
+    # 删除素材后其余素材保持原有顺序
+    remaining = [material['id'] for material in protocol.get_materials_by_type('texts')]
+    deleted = set(material_ids)
+    assert remaining == [material_id for material_id in order if material_id not in deleted]
+    return results
+
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    results = {segment_count: bench(segment_count) for segment_count in (1000, 10000)}
+    for name in results[1000]:
+        print(f'{name:10s} ' + '  '.join(
+            f'{segment_count} 片段 {result[name]:8.1f} us/次' for segment_count, result in results.items()
+        ))
@@ -0,0 +1,56 @@
+"""
+大数据接口响应基准测试：1 MB / 20 MB 草稿的 GET draft_info、GET tracks 每次请求的 CPU 耗时
+
+对比改动前的处理方式（处理函数返回 dict，FastAPI 按 BaseResponse 校验、jsonable_encoder 转换后
+序列化，这里注册同样声明的对照接口）和当前直接序列化为 JSON 字节的接口，取多次中最快的一次。
+
+用法：python test/bench_raw_response.py
+"""
+import time
+import logging
+from common import *
+from fastapi.testclient import TestClient
+import main
+from interface.utils import BaseResponse, success_response
+
+ROUNDS = 5
+
+
+def best_cpu_ms(func) -> float:
+    times = []
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        func()
+        times.append(time.process_time() - start)
+    return min(times) * 1000
+
+
+@main.app.get("/bench/tasks/{task_id}/draft_info", response_model=BaseResponse)
+async def dict_draft_info(task_id: str):
+    """改动前：返回 dict，由 FastAPI 校验响应模型并序列化"""
+    with main.task_manager.get_task_readonly(task_id) as task:
+        return success_response("获取成功", task.jianyingProject.protocol.draft_info)
+
+
+@main.app.get("/bench/tasks/{task_id}/tracks", response_model=BaseResponse)
+async def dict_tracks(task_id: str):
+    with main.task_manager.get_task_readonly(task_id) as task:
+        protocol = task.jianyingProject.protocol
+        return success_response("获取成功", {"tracks": protocol.get_track_list(), "etag": protocol.etag})
+
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    with TestClient(main.app) as client:
+        for size_mb in (1, 20):
+            task_id = client.post('/tasks', json={'name': 'bench-response'}).json()['data']['task_id']
+            with main.task_manager.get_task(task_id) as task:
+                fill_text_segments(task.jianyingProject.protocol, size_mb)
+
+            for name in ('draft_info', 'tracks'):
+                path = f'/tasks/{task_id}/{name}'
+                assert client.get(path).json() == client.get(f'/bench{path}').json()
+                before = best_cpu_ms(lambda: client.get(f'/bench{path}'))
+                after = best_cpu_ms(lambda: client.get(path))
+                print(f'{size_mb:2d} MB 草稿 GET {name:10s}: 改动前 {before:7.1f} ms CPU, 直接序列化 {after:7.1f} ms CPU')
+            main.task_manager.remove_task(task_id)
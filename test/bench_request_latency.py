@@ -0,0 +1,107 @@
+"""
+请求延迟基准测试：并发添加媒体片段（探测、下载较慢）时 /health 和 /tasks/{task_id} 的 p50/p99 延迟
+
+不访问网络：媒体探测和 OSS 下载替换为固定延迟的模拟实现（PROBE_DELAY / DOWNLOAD_DELAY 秒），
+视频素材不指定时长（需要探测）。处理函数在业务线程池中执行，慢请求不阻塞事件循环，
+负载下两个接口的延迟应与空闲时接近；--inline 在事件循环中直接执行处理函数（改动前的行为）作为对照。
+
+用法：python test/bench_request_latency.py [并发添加片段的线程数，默认 16] [--inline]
+"""
+import sys
+import time
+import uuid
+import logging
+import threading
+from common import *
+from fastapi.testclient import TestClient
+import main
+import utils.media_probe as media_probe
+from utils.media_prefetch import media_prefetcher
+from utils.oss_utils import OssMixin
+
+PROBE_DELAY = 0.5
+DOWNLOAD_DELAY = 1.0
+MEASURE_TIME = 5
+SAMPLE_INTERVAL = 0.01
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    return f'p50 {p50:6.1f}ms p99 {p99:6.1f}ms'
+
+
+def measure(client: TestClient, task_id: str) -> dict[str, list[float]]:
+    """在 MEASURE_TIME 秒内交替请求两个接口，记录每次的延迟（秒）"""
+    latencies = {'/health': ('/health', []), '/tasks/{id}': (f'/tasks/{task_id}', [])}
+    deadline = time.perf_counter() + MEASURE_TIME
+    while time.perf_counter() < deadline:
+        for path, samples in latencies.values():
+            start = time.perf_counter()
+            assert client.get(path).status_code == 200
+            samples.append(time.perf_counter() - start)
+        time.sleep(SAMPLE_INTERVAL)
+    return {name: samples for name, (_, samples) in latencies.items()}
+
+
+async def dispatch_inline(handler, *args):
+    """在事件循环中直接执行处理函数（对照）"""
+    return handler(*args)
+
+
+def add_media_segments(client: TestClient, task_id: str, track_id: str, stop: threading.Event, count: list[int]):
+    """持续添加不指定时长的视频片段（每个片段探测一次、下载一次）"""
+    while not stop.is_set():
+        ok(client.post('/segments/media', json={
+            'task_id': task_id, 'track_id': track_id, 'media_material': {
+                'url': f'https://bench.oss-cn-hangzhou.aliyuncs.com/v/{uuid.uuid4().hex}.mp4',
+                'media_type': 'video', 'duration': None
+            }
+        }))
+        count.append(1)
+
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    media_probe.probe_media = fake_probe_media(PROBE_DELAY)
+    OssMixin.get_object_file = fake_get_object_file(DOWNLOAD_DELAY)
+    args = [arg for arg in sys.argv[1:] if arg != '--inline']
+    adders = int(args[0]) if args else 16
+    if '--inline' in sys.argv:
+        main.dispatch = dispatch_inline
+
+    with TestClient(main.app) as client:
+        query_task = ok(client.post('/tasks', json={'name': 'bench-query'}))['task_id']
+        media_tasks = [ok(client.post('/tasks', json={'name': f'bench-media{i}'}))['task_id'] for i in range(adders)]
+        media_tracks = [
+            ok(client.post('/tracks', json={'task_id': task_id, 'track_type': 'video'}))['track_id']
+            for task_id in media_tasks
+        ]
+
+        for name, samples in measure(client, query_task).items():
+            print(f'空闲: {name:12s} {percentiles(samples)}')
+
+        stop = threading.Event()
+        count = []
+        workers = [
+            threading.Thread(target=add_media_segments, args=(client, task_id, track_id, stop, count))
+            for task_id, track_id in zip(media_tasks, media_tracks)
+        ]
+        for worker in workers:
+            worker.start()
+        time.sleep(PROBE_DELAY)
+        start = time.perf_counter()
+        latencies = measure(client, query_task)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+        for name, samples in latencies.items():
+            print(f'{adders} 线程添加片段: {name:12s} {percentiles(samples)}')
+        print(f'测量期间共添加片段 {len(count)} 个（{elapsed:.1f}s）')
+
+        for task_id in [query_task] + media_tasks:
+            media_prefetcher.wait(task_id)
+            main.task_manager.remove_task(task_id)
@@ -0,0 +1,77 @@
+"""
+请求解析基准测试：添加媒体片段请求的解析（Pydantic 校验）耗时与素材大小无关
+
+不访问网络：远程素材探测替换为与素材大小成正比的模拟实现（最坏情况下探测退化为完整下载，
+按 DOWNLOAD_SPEED MB/s 计算）。素材不指定时长，媒体信息在解析之后的独立阶段补齐（探测结果按 URL 缓存），
+同一素材再次添加时不再探测。
+
+用法：python test/bench_request_parse.py
+"""
+import os
+import time
+import uuid
+import logging
+import tempfile
+
+# 探测缓存写入临时目录，每次运行都从空缓存开始
+os.environ.setdefault('MEDIA_PROBE_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'media_probe_cache.jsonl'))
+
+from common import *
+from fastapi.testclient import TestClient
+import main
+import utils.media_probe as media_probe
+from utils.media_prefetch import media_prefetcher
+from utils.oss_utils import OssMixin
+from interface.segment.add_media_segment import AddMediaSegmentRequest
+
+DOWNLOAD_SPEED = 500
+PARSES = 200
+# URL -> 模拟的素材大小（MB）
+media_sizes: dict[str, int] = {}
+
+
+def fake_probe_remote(url: str) -> dict:
+    time.sleep(media_sizes[url] / DOWNLOAD_SPEED)
+    return {'duration': 2000, 'width': 1920, 'height': 1080}
+
+
+def media_request(task_id: str, track_id: str, url: str) -> dict:
+    return {
+        'task_id': task_id, 'track_id': track_id,
+        'media_material': {'url': url, 'media_type': 'video', 'duration': None}
+    }
+
+
+def parse_ms(payload: dict) -> float:
+    """请求体解析（模型校验）的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(PARSES):
+        AddMediaSegmentRequest.model_validate(payload)
+    return (time.perf_counter() - start) * 1000 / PARSES
+
+
+def add_ms(client: TestClient, payload: dict) -> float:
+    """完整请求（解析 + 补齐媒体信息 + 添加片段）的耗时（毫秒）"""
+    start = time.perf_counter()
+    ok(client.post('/segments/media', json=payload))
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    media_probe.media_probe._probe_remote = fake_probe_remote
+    OssMixin.get_object_file = fake_get_object_file()
+
+    with TestClient(main.app) as client:
+        task_id = ok(client.post('/tasks', json={'name': 'bench-parse'}))['task_id']
+        track_id = ok(client.post('/tracks', json={'task_id': task_id, 'track_type': 'video'}))['track_id']
+        for size in (10, 100, 1000):
+            url = f'https://bench.oss-cn-hangzhou.aliyuncs.com/v/{uuid.uuid4().hex}_{size}mb.mp4'
+            media_sizes[url] = size
+            payload = media_request(task_id, track_id, url)
+            parse = parse_ms(payload)
+            first = add_ms(client, payload)
+            repeat = add_ms(client, payload)
+            print(f'{size:5d} MB 素材: 解析 {parse:6.3f} ms, 首次添加 {first:7.1f} ms, 再次添加（探测缓存）{repeat:6.1f} ms')
+        media_prefetcher.wait(task_id)
+        main.task_manager.remove_task(task_id)
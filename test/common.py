@@ -0,0 +1,170 @@
+"""
+回归测试、基准测试公共工具
+
+不访问网络：片段只使用文本、内部素材（转场）和 data/ 下的本地音频文件。
+"""
+import os
+import sys
+import json
+import time
+import random
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TEST_DIR)
+
+os.environ.setdefault('OSS_AK', 'test')
+os.environ.setdefault('OSS_SK', 'test')
+os.environ.setdefault('PROJECT_REMOTE_PATH', 'https://test.oss-cn-hangzhou.aliyuncs.com/projects')
+# 本地素材：url 为相对 JY_Res_Dir 的路径
+os.environ.setdefault('JY_Res_Dir', os.path.join(ROOT_DIR, 'data'))
+
+# 将 src 目录添加到 Python 搜索路径
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from task_manager import TaskManager
+from jianying_project import JianYingProject
+from utils.models import *
+from utils.protocol_utils import JianYingProtocol
+
+LOCAL_AUDIO_URL = '/test.mp3'
+
+
+def draft_state(protocol: JianYingProtocol) -> str:
+    """草稿数据（draft_info、素材元信息、虚拟素材库）的规范化 JSON，用于比较是否相同"""
+    return json.dumps(
+        [protocol.draft_info, protocol.draft_meta_info, protocol.draft_virtual_store],
+        sort_keys=True, ensure_ascii=False
+    )
+
+
+def disk_state(task_id: str) -> str:
+    """从磁盘重新加载草稿（读取 JSON 并重放操作日志）后的草稿数据"""
+    return draft_state(JianYingProject(JianYingBaseInfo.from_unique_id(task_id)).protocol)
+
+
+def _index_snapshot(protocol: JianYingProtocol) -> dict:
+    protocol._ensure_indexes()
+    # 记录的片段、素材位置只是查找起点（删除后可能偏大），比较定位后的位置
+    segments = {}
+    for segment_id in list(protocol._segment_index):
+        track, position = protocol._locate_segment(segment_id)
+        segments[segment_id] = (track['id'], position)
+    materials = {material_id: protocol._locate_material(material_id) for material_id in list(protocol._material_index)}
+    meta_infos = protocol.draft_meta_info['draft_materials'][0]['value']
+    relations = protocol.draft_virtual_store['draft_virtual_store'][1]['value']
+    return {
+        'tracks': dict(protocol._track_index),
+        'segments': segments,
+        'materials': materials,
+        'remote_url_refs': dict(protocol._remote_url_refs),
+        'meta_infos': {
+            url: (meta_info['id'], protocol._locate_item(meta_infos, meta_info, position))
+            for url, (meta_info, position) in protocol._meta_info_index.items()
+        },
+        'relations': {
+            child_id: protocol._locate_item(relations, relation, position)
+            for child_id, (relation, position) in protocol._virtual_relation_index.items()
+        },
+        'folder_children': dict(protocol._virtual_folder_children),
+        'track_end_times': {
+            track_id: protocol.get_track_last_segment_time(track_id) for track_id in protocol._track_index
+        },
+        'duration': protocol.draft_info['duration'],
+    }
+
+
+def check_indexes(protocol: JianYingProtocol):
+    """增量维护的索引（ID 索引、轨道结束时间、资源引用计数等）和工程时长必须与从草稿数据重新构建的一致"""
+    maintained = _index_snapshot(protocol)
+    # 增量更新（工程时长堆）得到的工程时长与修改后记录的一致
+    protocol.update_project_duration()
+    assert protocol.draft_info['duration'] == maintained['duration'], "工程时长增量更新不一致"
+    protocol._track_index = None
+    protocol.update_project_duration()
+    rebuilt = _index_snapshot(protocol)
+    for key in maintained:
+        assert maintained[key] == rebuilt[key], f"索引不一致: {key}\n维护: {maintained[key]}\n重建: {rebuilt[key]}"
+
+
+def transition() -> JianYingInternalMaterialInfo:
+    return JianYingInternalMaterialInfo(material_info={'type': 'transition', 'name': '叠化', 'duration': 500000})
+
+
+def random_edit(protocol: JianYingProtocol, rng: random.Random):
+    """对草稿执行一个随机的修改操作（轨道增删、片段增删改、内部素材）"""
+    tracks = protocol.draft_info['tracks']
+    segments = [(track, segment) for track in tracks for segment in track['segments']]
+    text_segments = [segment for track, segment in segments if track['type'] == 'text']
+    kind = rng.randrange(9)
+    if kind == 0 or not tracks:
+        protocol.add_track(rng.choice(['text', 'audio']), index=rng.choice([-1, 0]))
+    elif kind == 1 and len(tracks) > 1:
+        protocol.remove_track(rng.choice(tracks)['id'])
+    elif kind in (2, 3):
+        track = rng.choice(tracks)
+        if track['type'] == 'audio':
+            protocol.add_media_segment_to_track(track['id'], JianYingMediaMaterialInfo(
+                url=LOCAL_AUDIO_URL, media_type='audio', duration=rng.randrange(500, 3000),
+                category=rng.choice(['', '配乐', '音效'])
+            ))
+        else:
+            protocol.add_text_segment_to_track(
+                track['id'], JianYingTextMaterialInfo(text=f'文本{rng.randrange(100)}'),
+                start_time=rng.choice([None, 0, 1000]), duration=rng.randrange(200, 2000)
+            )
+    elif kind == 4 and segments:
+        protocol.remove_segment_by_id(rng.choice(segments)[1]['id'])
+    elif kind == 5 and text_segments:
+        protocol.update_segment_transform_info(
+            rng.choice(text_segments)['id'], SegmentTransformInfo(scale_x=rng.choice([0.5, 1.5]), rotate=rng.randrange(90))
+        )
+    elif kind == 6 and text_segments:
+        protocol.update_text_content(rng.choice(text_segments)['id'], f'修改{rng.randrange(100)}')
+    elif kind == 7 and segments:
+        protocol.add_internal_material_to_segment(rng.choice(segments)[1]['id'], transition())
+    elif kind == 8 and text_segments:
+        protocol.update_text_material_info(rng.choice(text_segments)['id'], JianYingTextMaterialInfo(
+            text='样式', background_color='#FFFFFF', background_alpha=rng.choice([0.5, 1.0])
+        ))
+
+
+def create_task(task_manager: TaskManager, name: str) -> str:
+    return task_manager.create_task(JianYingBaseInfo(name=name, width=720, height=1280, fps=30, duration=0))
+
+
+def ok(response) -> dict:
+    """接口调用必须成功（code 为 0），返回响应中的 data"""
+    body = response.json()
+    assert body['code'] == 0, body
+    return body['data']
+
+
+def fake_probe_media(delay: float = 0):
+    """媒体探测的模拟实现（不访问网络）：等待 delay 秒后返回固定的媒体信息"""
+    def probe_media(url: str) -> dict:
+        time.sleep(delay)
+        return {'duration': 2000, 'width': 1920, 'height': 1080}
+    return probe_media
+
+
+def fake_get_object_file(delay: float = 0):
+    """OSS 下载的模拟实现（不访问网络）：等待 delay 秒后写入 1 KB 的文件"""
+    def get_object_file(self, url: str, outfile: str = None) -> str:
+        time.sleep(delay)
+        with open(outfile, 'wb') as f:
+            f.write(b'\0' * 1024)
+        return outfile
+    return get_object_file
+
+
+def fill_text_segments(protocol: JianYingProtocol, size_mb: float) -> str:
+    """添加一条文本轨道（字幕），不断添加文本片段直到草稿 JSON 约为 size_mb MB（基准测试用），返回轨道ID"""
+    track_id = protocol.add_track('text')
+    base_size = len(json.dumps(protocol.draft_info, ensure_ascii=False))
+    batch = 200
+    for i in range(batch):
+        protocol.add_text_segment_to_track(track_id, JianYingTextMaterialInfo(text=f'字幕{i}'), duration=100)
+    segment_size = (len(json.dumps(protocol.draft_info, ensure_ascii=False)) - base_size) / batch
+    for i in range(batch, int((size_mb * 1024 * 1024 - base_size) / segment_size)):
+        protocol.add_text_segment_to_track(track_id, JianYingTextMaterialInfo(text=f'字幕{i}'), duration=100)
+    return track_id
@@ -0,0 +1,90 @@
+"""
+ETag 条件请求和增量获取轨道列表回归测试
+
+客户端保存某个版本的轨道列表和 ETag，之后用 since 增量获取并合并，结果必须与当前全部轨道一致；
+修改（包括失败回滚的写操作和撤销/重做）后 ETag 必须变化，未修改时 If-None-Match 命中返回 304。
+
+用法：python test/test_etag.py（也可以用 pytest 运行）
+"""
+import random
+from common import *
+from utils.json_utils import json_loads
+from interface.track import get_tracks
+
+
+def fetch_tracks(task_manager: TaskManager, task_id: str, if_none_match: str = None, since: str = None):
+    """调用获取轨道列表接口，返回 (状态码, 数据)"""
+    response = get_tracks.handler(task_id, task_manager, None, if_none_match, since)
+    if response.status_code == 304:
+        return 304, None
+    body = json_loads(response.body)
+    assert body['code'] == 0, body
+    assert response.headers['ETag'] == body['data']['etag']
+    return response.status_code, body['data']
+
+
+def merge_tracks(tracks: list[dict], data: dict) -> list[dict]:
+    """按增量响应更新客户端保存的轨道列表"""
+    by_id = {track['id']: track for track in tracks}
+    for track in data['tracks']:
+        by_id[track['id']] = track
+    for track_id in data['removed']:
+        by_id.pop(track_id, None)
+    return [by_id[track_id] for track_id in data['track_ids']]
+
+
+def test_incremental_tracks_match_full():
+    task_manager = TaskManager()
+    task_id = create_task(task_manager, 'test-etag')
+    rng = random.Random(20)
+    _, data = fetch_tracks(task_manager, task_id)
+    # 多个客户端，各自停留在不同的版本
+    clients = [(data['tracks'], data['etag']) for _ in range(5)]
+    for step in range(150):
+        _, current = fetch_tracks(task_manager, task_id)
+        status, _ = fetch_tracks(task_manager, task_id, if_none_match=current['etag'])
+        assert status == 304
+
+        try:
+            with task_manager.get_task(task_id) as task:
+                protocol = task.jianyingProject.protocol
+                if step % 11 == 10:
+                    protocol.undo()
+                elif step % 11 == 5:
+                    protocol.redo()
+                else:
+                    for _ in range(rng.randrange(1, 4)):
+                        random_edit(protocol, rng)
+                    if step % 7 == 0:
+                        raise RuntimeError('模拟写操作失败')
+        except RuntimeError:
+            pass
+
+        _, full = fetch_tracks(task_manager, task_id)
+        if full['tracks'] != current['tracks']:
+            assert full['etag'] != current['etag']
+
+        i = rng.randrange(len(clients))
+        tracks, etag = clients[i]
+        status, data = fetch_tracks(task_manager, task_id, if_none_match=etag, since=etag)
+        if status == 304:
+            assert tracks == full['tracks']
+            continue
+        assert not data['full']
+        assert merge_tracks(tracks, data) == full['tracks']
+        clients[i] = (full['tracks'], data['etag'])
+
+    # 草稿重新加载后旧 ETag 失效，返回全部轨道
+    with task_manager.get_task(task_id) as task:
+        task.jianyingProject.save()
+        task.jianyingProject._flush()
+    tracks, etag = clients[0]
+    status, data = fetch_tracks(task_manager, task_id, if_none_match=etag, since=etag)
+    assert status == 200 and data['full']
+    assert merge_tracks(tracks, data) == fetch_tracks(task_manager, task_id)[1]['tracks']
+    task_manager.remove_task(task_id)
+
+
+if __name__ == '__main__':
+    test_incremental_tracks_match_full()
+    print('test_etag OK')
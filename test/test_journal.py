@@ -0,0 +1,72 @@
+"""
+操作日志（WAL）重放回归测试
+
+每次写操作成功后追加的日志记录在重新加载时按顺序重放，结果必须与内存中的草稿一致：
+包括失败回滚的写操作、撤销/重做、压缩（重写 JSON）中途崩溃和末尾记录不完整。
+
+用法：python test/test_journal.py（也可以用 pytest 运行）
+"""
+import os
+import random
+from common import *
+from utils.function_utils import get_project_path, get_draft_journal_path, write_json_file
+
+
+def test_replay_matches_memory():
+    task_manager = TaskManager()
+    task_id = create_task(task_manager, 'test-journal')
+    rng = random.Random(21)
+    for step in range(200):
+        try:
+            with task_manager.get_task(task_id) as task:
+                protocol = task.jianyingProject.protocol
+                if step % 17 == 16:
+                    protocol.undo()
+                else:
+                    for _ in range(rng.randrange(1, 4)):
+                        random_edit(protocol, rng)
+                    if step % 13 == 0:
+                        raise RuntimeError('模拟写操作失败')
+        except RuntimeError:
+            pass
+
+    with task_manager.get_task_readonly(task_id) as task:
+        state = draft_state(task.jianyingProject.protocol)
+        assert task.jianyingProject.journal.records > 0
+    assert disk_state(task_id) == state
+
+    # 压缩时写完暂存 JSON、提交前崩溃：丢弃暂存文件，在旧 JSON 上重放日志
+    with task_manager.get_task_readonly(task_id) as task:
+        project = task.jianyingProject
+        paths = project._get_json_paths(get_project_path(task_id))
+        data = (project.protocol.draft_info, project.protocol.draft_meta_info, project.protocol.draft_virtual_store)
+        for item, path in zip(data, paths):
+            write_json_file(item, project.journal.staged_path(path))
+        assert disk_state(task_id) == state
+        assert not any(os.path.exists(project.journal.staged_path(path)) for path in paths)
+
+        # 提交后只替换了第一个 JSON 时崩溃：加载时完成替换并清空日志，不会在新 JSON 上重复重放
+        for item, path in zip(data, paths):
+            write_json_file(item, project.journal.staged_path(path))
+        open(project.journal._commit_path, 'wb').close()
+        os.replace(project.journal.staged_path(paths[0]), paths[0])
+        assert disk_state(task_id) == state
+        assert not os.path.exists(project.journal._commit_path)
+        assert os.path.getsize(project.journal.path) == 0
+
+    # 追加日志时崩溃：末尾不完整的记录被丢弃
+    with open(get_draft_journal_path(get_project_path(task_id)), 'ab') as f:
+        f.write(b'0badc0de {"ops": [["track_remove"')
+    assert disk_state(task_id) == state
+
+    # 压缩：完整 JSON 落盘后清空日志
+    with task_manager.get_task(task_id) as task:
+        task.jianyingProject.save()
+        assert task.jianyingProject.journal.records == 0
+    assert disk_state(task_id) == state
+    task_manager.remove_task(task_id)
+
+
+if __name__ == '__main__':
+    test_replay_matches_memory()
+    print('test_journal OK')
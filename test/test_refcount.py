@@ -0,0 +1,104 @@
+"""
+素材资源引用计数回归测试
+
+随机增删引用同一批远程素材的片段和轨道（包括失败回滚的写操作、撤销/重做、清空撤销历史），
+每一步后：引用计数与从草稿数据重新构建的一致；下载完成后工程 Resources 目录下的文件
+恰好是草稿素材或撤销历史引用的素材。
+
+不访问网络：OSS 下载替换为写入本地文件的模拟实现。
+
+用法：python test/test_refcount.py（也可以用 pytest 运行）
+"""
+import os
+import time
+import random
+from common import *
+from utils.function_utils import get_resource_path, url_to_filename
+from utils.media_prefetch import media_prefetcher
+from utils.oss_utils import OssMixin
+
+REMOTE_URLS = [f'https://test.oss-cn-hangzhou.aliyuncs.com/media/{i}.mp3' for i in range(12)]
+
+
+def fake_get_object_file(self, url: str, outfile: str = None) -> str:
+    with open(outfile, 'wb') as f:
+        f.write(url.encode())
+    return outfile
+
+
+def random_media_edit(protocol: JianYingProtocol, rng: random.Random):
+    """添加引用远程素材的片段、删除片段，或执行其他随机修改（轨道增删等）"""
+    tracks = protocol.draft_info['tracks']
+    audio_tracks = [track for track in tracks if track['type'] == 'audio']
+    segments = [segment for track in tracks for segment in track['segments']]
+    kind = rng.random()
+    if audio_tracks and kind < 0.4:
+        protocol.add_media_segment_to_track(rng.choice(audio_tracks)['id'], JianYingMediaMaterialInfo(
+            url=rng.choice(REMOTE_URLS), media_type='audio', duration=rng.randrange(500, 3000)
+        ))
+    elif segments and kind < 0.7:
+        protocol.remove_segment_by_id(rng.choice(segments)['id'])
+    else:
+        random_edit(protocol, rng)
+
+
+def check_resource_files(task_manager: TaskManager, task_id: str):
+    media_prefetcher.wait(task_id)
+    # 已取消但正在执行的下载不在等待范围内，完成后才删除文件
+    deadline = time.monotonic() + 5
+    while True:
+        with task_manager.get_task_readonly(task_id) as task:
+            protocol = task.jianyingProject.protocol
+            referenced = set(protocol._remote_url_refs) | set(protocol._history_url_refs)
+            expected = {url_to_filename(url) for url in REMOTE_URLS if url in referenced}
+            remote_files = {url_to_filename(url) for url in REMOTE_URLS}
+            files = set(os.listdir(get_resource_path(task_id))) & remote_files
+        if files == expected or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    assert files == expected, f"素材文件不一致: 多余 {files - expected}, 缺失 {expected - files}"
+
+
+def test_resource_refcount():
+    get_object_file, OssMixin.get_object_file = OssMixin.get_object_file, fake_get_object_file
+    try:
+        run_random_edits()
+    finally:
+        OssMixin.get_object_file = get_object_file
+
+
+def run_random_edits():
+    task_manager = TaskManager()
+    task_id = create_task(task_manager, 'test-refcount')
+    rng = random.Random(6)
+    for step in range(150):
+        try:
+            with task_manager.get_task(task_id) as task:
+                protocol = task.jianyingProject.protocol
+                if step % 9 == 8:
+                    protocol.undo()
+                elif step % 9 == 4:
+                    protocol.redo()
+                else:
+                    for _ in range(rng.randrange(1, 4)):
+                        random_media_edit(protocol, rng)
+                    if step % 7 == 0:
+                        raise RuntimeError('模拟写操作失败')
+        except RuntimeError:
+            pass
+        if step % 50 == 49:
+            # 任务移出内存时清空撤销历史：只被历史引用的文件被删除
+            task_manager.task_dict[task_id].clear_history()
+
+        with task_manager.get_task(task_id) as task:
+            check_indexes(task.jianyingProject.protocol)
+        check_resource_files(task_manager, task_id)
+
+    with task_manager.get_task_readonly(task_id) as task:
+        assert task.jianyingProject.protocol._remote_url_refs
+    task_manager.remove_task(task_id)
+
+
+if __name__ == '__main__':
+    test_resource_refcount()
+    print('test_refcount OK')
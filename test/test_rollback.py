@@ -0,0 +1,85 @@
+"""
+写操作失败回滚回归测试
+
+任一写操作（单个接口、批量操作、整体构建时间线）失败时，草稿数据、索引、版本号（ETag）
+必须恢复到操作前，磁盘上重放操作日志后的草稿与内存一致。
+
+用法：python test/test_rollback.py（也可以用 pytest 运行）
+"""
+import random
+from common import *
+
+
+def test_failed_write_rolls_back():
+    task_manager = TaskManager()
+    task_id = create_task(task_manager, 'test-rollback')
+    rng = random.Random(22)
+    with task_manager.get_task(task_id) as task:
+        for _ in range(30):
+            random_edit(task.jianyingProject.protocol, rng)
+
+    for _ in range(50):
+        with task_manager.get_task_readonly(task_id) as task:
+            protocol = task.jianyingProject.protocol
+            before, revision, etag = draft_state(protocol), protocol.revision, protocol.etag
+
+        # 执行若干修改后失败
+        try:
+            with task_manager.get_task(task_id) as task:
+                for _ in range(rng.randrange(1, 10)):
+                    random_edit(task.jianyingProject.protocol, rng)
+                raise RuntimeError('模拟写操作失败')
+        except RuntimeError:
+            pass
+
+        with task_manager.get_task(task_id) as task:
+            protocol = task.jianyingProject.protocol
+            assert draft_state(protocol) == before
+            assert (protocol.revision, protocol.etag) == (revision, etag)
+            # 回滚后继续修改（检查索引会重建索引，放在修改之后，检查回滚后继续增量维护的结果）
+            random_edit(protocol, rng)
+            check_indexes(protocol)
+
+    with task_manager.get_task(task_id) as task:
+        assert disk_state(task_id) == draft_state(task.jianyingProject.protocol)
+    task_manager.remove_task(task_id)
+
+
+def test_failed_timeline_build_rolls_back():
+    task_manager = TaskManager()
+    task_id = create_task(task_manager, 'test-rollback-timeline')
+    rng = random.Random(17)
+    with task_manager.get_task(task_id) as task:
+        for _ in range(20):
+            random_edit(task.jianyingProject.protocol, rng)
+        before = draft_state(task.jianyingProject.protocol)
+
+    # 替换时间线：删除现有轨道后，最后一个片段的素材类型不合法
+    tracks = [
+        JianYingTimelineTrackInfo(track_type='audio', segments=[
+            {'segment_type': 'media', 'media_material': {'url': LOCAL_AUDIO_URL, 'media_type': 'audio', 'duration': 1000}}
+        ]),
+        JianYingTimelineTrackInfo(track_type='text', segments=[
+            {'segment_type': 'text', 'text_material': {'text': '新文本'}},
+            {'segment_type': 'sticker', 'sticker_material': {'material_info': {}}}
+        ])
+    ]
+    try:
+        with task_manager.get_task(task_id) as task:
+            task.jianyingProject.protocol.build_timeline(tracks, replace=True)
+        raise AssertionError('构建应当失败')
+    except ValueError:
+        pass
+
+    with task_manager.get_task(task_id) as task:
+        protocol = task.jianyingProject.protocol
+        assert draft_state(protocol) == before
+        check_indexes(protocol)
+    assert disk_state(task_id) == before
+    task_manager.remove_task(task_id)
+
+
+if __name__ == '__main__':
+    test_failed_write_rolls_back()
+    test_failed_timeline_build_rolls_back()
+    print('test_rollback OK')
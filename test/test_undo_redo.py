@@ -0,0 +1,76 @@
+"""
+撤销/重做回归测试
+
+逐步撤销所有写操作后草稿依次恢复到每一步之前的状态，再逐步重做后依次恢复到每一步之后的状态；
+每一步的索引（ID 索引、轨道结束时间、资源引用计数等）与重新构建的一致，磁盘上重放操作日志后与内存一致。
+
+用法：python test/test_undo_redo.py（也可以用 pytest 运行）
+"""
+import random
+from common import *
+
+
+def test_undo_all_redo_all():
+    task_manager = TaskManager()
+    task_id = create_task(task_manager, 'test-undo-redo')
+    rng = random.Random(23)
+    with task_manager.get_task_readonly(task_id) as task:
+        states = [draft_state(task.jianyingProject.protocol)]
+    for _ in range(60):
+        with task_manager.get_task(task_id) as task:
+            for _ in range(rng.randrange(1, 4)):
+                random_edit(task.jianyingProject.protocol, rng)
+        with task_manager.get_task_readonly(task_id) as task:
+            protocol = task.jianyingProject.protocol
+            # 没有修改的写操作不记录撤销步骤
+            if protocol.undo_steps == len(states):
+                states.append(draft_state(protocol))
+            else:
+                assert draft_state(protocol) == states[-1]
+
+    # 撤销全部
+    for expected in reversed(states[:-1]):
+        with task_manager.get_task(task_id) as task:
+            protocol = task.jianyingProject.protocol
+            assert protocol.undo()
+        with task_manager.get_task(task_id) as task:
+            protocol = task.jianyingProject.protocol
+            assert draft_state(protocol) == expected
+            check_indexes(protocol)
+    with task_manager.get_task(task_id) as task:
+        protocol = task.jianyingProject.protocol
+        assert not protocol.undo()
+        assert (protocol.undo_steps, protocol.redo_steps) == (0, len(states) - 1)
+    assert disk_state(task_id) == states[0]
+
+    # 重做全部
+    for expected in states[1:]:
+        with task_manager.get_task(task_id) as task:
+            assert task.jianyingProject.protocol.redo()
+        with task_manager.get_task(task_id) as task:
+            protocol = task.jianyingProject.protocol
+            assert draft_state(protocol) == expected
+            check_indexes(protocol)
+    with task_manager.get_task(task_id) as task:
+        protocol = task.jianyingProject.protocol
+        assert not protocol.redo()
+        assert (protocol.undo_steps, protocol.redo_steps) == (len(states) - 1, 0)
+    assert disk_state(task_id) == states[-1]
+
+    # 撤销后新的修改清空重做历史
+    with task_manager.get_task(task_id) as task:
+        task.jianyingProject.protocol.undo()
+    with task_manager.get_task(task_id) as task:
+        random_edit(task.jianyingProject.protocol, rng)
+    with task_manager.get_task(task_id) as task:
+        protocol = task.jianyingProject.protocol
+        assert protocol.redo_steps == 0
+        check_indexes(protocol)
+        state = draft_state(protocol)
+    assert disk_state(task_id) == state
+    task_manager.remove_task(task_id)
+
+
+if __name__ == '__main__':
+    test_undo_all_redo_all()
+    print('test_undo_redo OK')